@@ -0,0 +1,28 @@
+"""Fonts and images, loaded the first time they are asked for and kept afterwards.
+Paths are relative to the Assets folder next to this file, so the game can be started from any working directory"""
+import functools
+import os
+import pygame as pg
+
+
+assetDirectory = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Assets")
+
+
+@functools.lru_cache(maxsize=None)
+def font(size, name="Roboto") -> pg.font.Font:
+    """SysFont searches every installed font the first time, so each size is only looked up once"""
+    if not pg.font.get_init():
+        pg.font.init()
+    return pg.font.SysFont(name, int(size), False, False)
+
+
+@functools.lru_cache(maxsize=None)
+def image(name) -> pg.Surface:
+    surface = pg.image.load(os.path.join(assetDirectory, name))
+    return surface.convert_alpha() if pg.display.get_surface() else surface #converting needs a window
+
+
+@functools.lru_cache(maxsize=None)
+def scaledImage(name, size) -> pg.Surface:
+    """size is a tuple of ints, so equal sizes share one surface"""
+    return pg.transform.scale(image(name), size)
@@ -0,0 +1,30 @@
+"""Scrolls a viewport across the endless field, revealing along the way, and reports the loaded chunks, their memory and the store size.
+python benchmarks/chunks_benchmark.py [steps]"""
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chunks import ChunkedBoard
+
+
+if __name__ == "__main__":
+    steps = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    board = ChunkedBoard(0)
+    viewport = (48, 27) #cells of a 1280x720 window
+    start = time.perf_counter()
+    print("{:>8}{:>12}{:>14}{:>16}{:>14}".format("step", "explored", "loaded", "loaded KiB", "stored"))
+    explored = set()
+    for step in range(steps + 1):
+        x, y = step*4, (step*3) % 2000 - 1000 #diagonal zigzag, 4 cells per step
+        board.setViewport(x, y, *viewport)
+        board.window(x, y, *viewport)
+        explored.update(board.chunks)
+        if step % 5 == 0: #reveal and flag around the middle of the screen, the chunks become changed and have to be stored
+            board.reveal(x + viewport[0]//2, y + viewport[1]//2)
+            board.toggleFlag(x + viewport[0]//2 + 3, y + viewport[1]//2)
+            board.exploded = False #keep exploring after hitting a mine
+        if step % (steps//5 or 1) == 0:
+            print("{:>8}{:>12}{:>14}{:>16.1f}{:>14}".format(step, len(explored), len(board.chunks), sum(cells.nbytes for cells in board.chunks.values())/1024, len(board.store)))
+    print("{:.2f} ms per step".format((time.perf_counter() - start)/(steps + 1)*1000))
+    board.close()
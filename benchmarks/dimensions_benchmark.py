@@ -0,0 +1,25 @@
+"""Reports generation and first flood fill times of 2D and 3D boards, up to 100x100x100.
+python benchmarks/dimensions_benchmark.py [repeats]"""
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from board import Board
+from generator import findStart, generateMines
+
+
+if __name__ == "__main__":
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print("{:<16}{:>10}{:>16}{:>18}{:>14}".format("board", "mines", "generate ms", "flood fill ms", "opened"))
+    for dimensions, mineAmount in (((30, 19), 60), ((2000, 2000), 400000), ((30, 30, 30), 500), ((100, 100, 100), 50000), ((100, 100, 100), 1000)):
+        generateTimes, fillTimes = [], []
+        for seed in range(repeats):
+            start = time.perf_counter()
+            board = Board(generateMines(dimensions, mineAmount, np.random.default_rng(seed)))
+            generated = time.perf_counter()
+            board.reveal(*findStart(board, np.random.default_rng(seed)))
+            generateTimes.append(generated - start)
+            fillTimes.append(time.perf_counter() - generated)
+        print("{:<16}{:>10}{:>16.1f}{:>18.1f}{:>14}".format("x".join(map(str, dimensions)), mineAmount, sorted(generateTimes)[repeats//2]*1000, sorted(fillTimes)[repeats//2]*1000, board.revealedSafeAmount))
@@ -0,0 +1,65 @@
+"""Times board generation against mine density and board size.
+Compares the old rejection sampling with random.randint to the single pass mine placement, times the whole board setup
+(placement, counting, start selection and the first reveal) and reports batch generation throughput.
+python benchmarks/generation_benchmark.py"""
+import os
+import sys
+import random
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from board import neighborCounts
+from generator import NoSafeStartError, generateBoard, generateMineBatch, generateMines
+
+
+sizes = [(10, 10), (30, 19), (100, 100), (1000, 1000)]
+densities = [0.1, 0.5, 0.9, 0.99]
+legacyCellLimit = 100*100 #rejection sampling gets too slow to measure above this
+repeats = 5
+
+
+def rejectionSampling(dimensions, mineAmount):
+    """The mine placement that was used before, kept for comparison"""
+    mines = np.zeros(dimensions, dtype=bool)
+    for _ in range(mineAmount):
+        while mines[(x := random.randint(0, dimensions[0]-1)), (y := random.randint(0, dimensions[1]-1))]:
+            continue
+        mines[x, y] = True
+    return mines
+
+
+def timeit(function, *args, **kwargs):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function(*args, **kwargs)
+    return (time.perf_counter() - start)/repeats*1000
+
+
+def generateOrFail(dimensions, mineAmount, seed):
+    try:
+        generateBoard(dimensions, mineAmount, seed)
+    except NoSafeStartError: #dense boards fail cleanly, the failure is part of the measured time
+        pass
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    generateOrFail((10, 10), 6, 0) #warm up numpy before measuring
+    print("{:<12}{:>9}{:>15}{:>15}{:>15}".format("size", "density", "rejection ms", "placement ms", "board ms"))
+    for dimensions in sizes:
+        cellAmount = dimensions[0]*dimensions[1]
+        for density in densities:
+            mineAmount = int(cellAmount*density)
+            legacy = "{:.3f}".format(timeit(rejectionSampling, dimensions, mineAmount)) if cellAmount <= legacyCellLimit else "-"
+            placement = timeit(generateMines, dimensions, mineAmount, rng)
+            board = timeit(generateOrFail, dimensions, mineAmount, 0)
+            print("{:<12}{:>9}{:>15}{:>15.3f}{:>15.3f}".format("{}x{}".format(*dimensions), density, legacy, placement, board))
+
+    print()
+    for dimensions, mineAmount in [((10, 10), 6), ((17, 15), 30), ((30, 19), 60)]:
+        batchSize = 100000
+        start = time.perf_counter()
+        counts = neighborCounts(generateMineBatch(dimensions, mineAmount, batchSize, rng))
+        elapsed = time.perf_counter() - start
+        print("batch {}x{} with {} mines: {:.0f} boards/s (generation and counting)".format(*dimensions, mineAmount, batchSize/elapsed))
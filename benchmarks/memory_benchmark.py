@@ -0,0 +1,77 @@
+"""Measures the memory per cell and the build time of a board against its size.
+Compares the packed Board with the previous representation, where every cell was a full Button with its own Vectors and Rects
+next to one array per state. Visible cells still get a Button, but only while they are drawn or clicked.
+python benchmarks/memory_benchmark.py"""
+import os
+import sys
+import time
+import tracemalloc
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pygame as pg
+from vectors_likeablejuniper import Vector
+from board import Board, neighborCounts
+
+
+sizes = [(10, 10), (100, 100), (500, 500), (1000, 1000), (2000, 2000)]
+density = 0.15
+legacyCellLimit = 300*300 #the per cell objects get too big to measure above this
+buttonSize, buttonMargin = 24, 3
+
+
+class LegacyButton:
+    """The attributes every cell used to carry, kept for comparison"""
+    def __init__(self, position: Vector, coordinates: Vector, dimensions: Vector, colors, flagImage: pg.Surface, mineImage: pg.Surface):
+        self.position = position
+        self.coordinates = coordinates
+        self.dimensions = dimensions
+        self.center = self.position + self.dimensions/2
+        self.colors = colors
+        self.revealed = self.flagged = self.isMine = False
+        self.count = 0
+        self.flagImage = flagImage
+        self.flagRect = flagImage.get_rect()
+        self.flagRect.center = self.center.components
+        self.mineImage = mineImage
+        self.mineRect = mineImage.get_rect()
+        self.mineRect.center = (self.center - Vector(1, 1)).components
+
+
+def legacyBoard(mines):
+    """One array per state like the board used to have, plus a Button per cell"""
+    width, height = mines.shape
+    counts = neighborCounts(mines)
+    arrays = (mines.copy(), counts, np.zeros(mines.shape, dtype=bool), np.zeros(mines.shape, dtype=bool), counts.astype(np.int16))
+    image = pg.Surface((16, 16))
+    dimensions = Vector(buttonSize, buttonSize)
+    field = [[LegacyButton(Vector(x, y)*(buttonSize+buttonMargin), Vector(x, y), dimensions, [], image, image) for y in range(height)] for x in range(width)]
+    return arrays, field
+
+
+def measure(build, *args):
+    """Returns the bytes still allocated by the result of build and the seconds it took. Tracing slows allocations down, so it is timed in a separate run"""
+    start = time.perf_counter()
+    build(*args)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    result = build(*args)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size, elapsed
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    print("{:<12}{:>15}{:>12}{:>18}{:>15}".format("size", "board B/cell", "board ms", "legacy B/cell", "legacy ms"))
+    for dimensions in sizes:
+        cellAmount = dimensions[0]*dimensions[1]
+        mines = rng.random(dimensions) < density
+        boardBytes, boardTime = measure(Board, mines)
+        if cellAmount <= legacyCellLimit:
+            legacyBytes, legacyTime = measure(legacyBoard, mines)
+            legacy = "{:>18.1f}{:>15.1f}".format(legacyBytes/cellAmount, legacyTime*1000)
+        else:
+            legacy = "{:>18}{:>15}".format("-", "-")
+        print("{:<12}{:>15.2f}{:>12.1f}{}".format("{}x{}".format(*dimensions), boardBytes/cellAmount, boardTime*1000, legacy))
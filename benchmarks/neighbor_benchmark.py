@@ -0,0 +1,93 @@
+"""Times neighbor lookups: the per cell Vector arithmetic the game used before, the neighbors computed per call and the precomputed table.
+Also times a whole reveal against the Vector flood fill it replaced.
+python benchmarks/neighbor_benchmark.py"""
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from vectors_likeablejuniper import Vector
+from board import Board, computeNeighbors, neighborCounts, neighborTable
+
+
+sizes = [(10, 10), (30, 19), (100, 100), (500, 500)]
+revealDensity = 0.05 #few mines, so a single reveal opens most of the field
+repeats = 5
+perCellLimit = 100*100 #one call per cell gets too slow to measure above this
+
+
+def legacyNeighbors(coordinates: Vector, fieldDimensions: Vector) -> list[Vector]:
+    """The shifted Vector loop with its bounds check, kept for comparison"""
+    neighbors = []
+    for xShift in range(-1, 2):
+        for yShift in range(-1, 2):
+            if xShift == yShift == 0:
+                continue
+            shiftedCoordinates = coordinates + Vector(xShift, yShift)
+            if Vector(0, 0) <= shiftedCoordinates < fieldDimensions:
+                neighbors.append(shiftedCoordinates)
+    return neighbors
+
+
+def legacyReveal(mines: np.ndarray, counts: np.ndarray, start):
+    """Flood fill walking one cell at a time with Vector neighbors"""
+    fieldDimensions = Vector(mines.shape)
+    revealed = np.zeros(mines.shape, dtype=bool)
+    revealed[start] = True
+    stack = [Vector(start)]
+    while stack:
+        coordinates = stack.pop()
+        if counts[int(coordinates[0]), int(coordinates[1])] != 0:
+            continue
+        for neighbor in legacyNeighbors(coordinates, fieldDimensions):
+            index = (int(neighbor[0]), int(neighbor[1]))
+            if not revealed[index]:
+                revealed[index] = True
+                stack.append(neighbor)
+    return revealed
+
+
+def timeit(function, *args):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function(*args)
+    return (time.perf_counter() - start)/repeats*1000
+
+
+def perCell(lookup, cellAmount):
+    for cell in range(cellAmount):
+        lookup(cell)
+
+
+def reveal(mines, start):
+    Board(mines).reveal(*start)
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    print("neighbors of every cell, one cell per call (ms)")
+    print("{:<12}{:>12}{:>12}{:>12}{:>14}".format("size", "Vector", "computed", "table", "table build"))
+    for dimensions in [dimensions for dimensions in sizes if dimensions[0]*dimensions[1] <= perCellLimit]:
+        width, height = dimensions
+        cellAmount = width*height
+        fieldDimensions = Vector(dimensions)
+        vectorTime = timeit(perCell, lambda cell: legacyNeighbors(Vector(*divmod(cell, height)), fieldDimensions), cellAmount)
+        computedTime = timeit(perCell, lambda cell: computeNeighbors(cell, dimensions), cellAmount)
+        neighborTable.cache_clear()
+        buildTime = timeit(lambda: (neighborTable.cache_clear(), neighborTable(dimensions)))
+        table = neighborTable(dimensions)
+        tableTime = timeit(perCell, lambda cell: table[cell], cellAmount)
+        print("{:<12}{:>12.2f}{:>12.2f}{:>12.2f}{:>14.3f}".format("{}x{}".format(*dimensions), vectorTime, computedTime, tableTime, buildTime))
+
+    print()
+    print("revealing a field with {:.0%} mines from one cell (ms)".format(revealDensity))
+    print("{:<12}{:>12}{:>12}".format("size", "Vector", "padded"))
+    for dimensions in sizes:
+        mines = rng.random(dimensions) < revealDensity
+        counts = neighborCounts(mines)
+        zeroCells = np.argwhere((counts == 0) & ~mines)
+        start = tuple(int(i) for i in zeroCells[np.abs(zeroCells - np.array(dimensions)//2).sum(axis=1).argmin()]) #start in the middle, cells near a corner may be cut off
+        vectorTime = timeit(legacyReveal, mines, counts, start)
+        paddedTime = timeit(reveal, mines, start)
+        print("{:<12}{:>12.2f}{:>12.2f}".format("{}x{}".format(*dimensions), vectorTime, paddedTime))
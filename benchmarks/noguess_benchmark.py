@@ -0,0 +1,23 @@
+"""Reports the latency percentiles of generating no-guess boards per preset and worker count.
+python benchmarks/noguess_benchmark.py [boards]"""
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generator import difficultyPresets
+from noguess import NoGuessGenerator
+
+
+if __name__ == "__main__":
+    boards = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    timeout = 5
+    print("{:<10}{:>9}{:>10}{:>10}{:>10}{:>10}".format("preset", "workers", "no-guess", "p50 ms", "p90 ms", "p99 ms"))
+    for workers in sorted({1, max((os.cpu_count() or 2) - 1, 1)}):
+        for name, (dimensions, mineAmount) in difficultyPresets.items():
+            generator = NoGuessGenerator(workers, seed=0)
+            generator.generate(dimensions, mineAmount, timeout) #starts the pool, not measured
+            generator.latencies.clear()
+            noGuessAmount = sum(generator.generate(dimensions, mineAmount, timeout)[2] for _ in range(boards))
+            percentiles = generator.latencyPercentiles()
+            print("{:<10}{:>9}{:>10}{:>10.1f}{:>10.1f}{:>10.1f}".format(name, workers, "{}/{}".format(noGuessAmount, boards), percentiles[50]*1000, percentiles[90]*1000, percentiles[99]*1000))
+            generator.close()
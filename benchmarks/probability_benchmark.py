@@ -0,0 +1,48 @@
+"""Reports mine probability computation times on half played preset boards, cold and for the next move with the component cache.
+python benchmarks/probability_benchmark.py [boards]"""
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from board import Board
+from generator import difficultyPresets, generateFallback
+from probability import ProbabilityEngine, constraintComponents, solveComponent
+from solver import Frontier, solve
+
+
+if __name__ == "__main__":
+    boards = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    print("{:<10}{:>8}{:>12}{:>10}{:>16}{:>16}{:>14}".format("preset", "boards", "components", "classes", "cold ms (p50)", "cold ms (max)", "next move ms"))
+    for name, (dimensions, mineAmount) in difficultyPresets.items():
+        rng = np.random.default_rng(0)
+        coldTimes, moveTimes, componentAmounts, classAmounts = [], [], [], []
+        for _ in range(boards):
+            board, _ = generateFallback(dimensions, mineAmount, int(rng.integers(2**63)))
+            fullGame = Board(board.mines)
+            solve(fullGame, np.random.default_rng(0))
+            #replay the solver's revealed cells until about half of the field is open, the usual state hints are asked for in
+            for cell in np.flatnonzero(fullGame.revealed.reshape(-1) & ~fullGame.mines.reshape(-1))[::2]:
+                if board.revealedSafeAmount*2 >= board.cells.size - mineAmount:
+                    break
+                if not board.revealed.flat[cell]:
+                    board.reveal(*divmod(int(cell), dimensions[1]))
+            if board.isOver:
+                continue
+            engine = ProbabilityEngine()
+            start = time.perf_counter()
+            probabilities = engine(board)
+            coldTimes.append(time.perf_counter() - start)
+            components = constraintComponents(Frontier(board))
+            componentAmounts.append(len(components))
+            classAmounts.append(sum(len(solveComponent(tuple(sorted(constraints)), lambda: False)[0]) for constraints in components))
+
+            safest = np.nanargmin(probabilities) #play the safest move, then recompute with the cache of the previous state
+            if board.mines.flat[safest]:
+                continue
+            board.reveal(*divmod(int(safest), dimensions[1]))
+            start = time.perf_counter()
+            engine(board)
+            moveTimes.append(time.perf_counter() - start)
+        print("{:<10}{:>8}{:>12.1f}{:>10.1f}{:>16.2f}{:>16.2f}{:>14.2f}".format(name, len(coldTimes), np.mean(componentAmounts), np.mean(classAmounts), np.median(coldTimes)*1000, max(coldTimes)*1000, np.median(moveTimes)*1000))
@@ -0,0 +1,115 @@
+"""Compares redrawing the whole field every frame with the dirty-rectangle renderer.
+Reports frames per second and CPU time per frame for the easy/medium/hard presets and a 200x200 custom board,
+then pans a camera over a 1000x1000 board at several zoom levels, down to the overview texture.
+Runs without a visible window: python benchmarks/render_benchmark.py"""
+import os
+import sys
+import time
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pygame as pg
+from board import CELL_FLAGGED, Board
+from renderer import BoardRenderer, TileCache, ViewportRenderer, lodCellStep
+
+
+windowSize = (1280, 720)
+frameAmount = 300
+timeLimit = 10 #seconds per run, slow runs stop early and are averaged over the frames they managed
+boardSettings = {"easy": ((10, 10), 6), "medium": ((17, 15), 30), "hard": ((30, 19), 60), "custom 200x200": ((200, 200), 4000)}
+buttonColors = [(55, 74, 84), (81, 117, 135), (116, 176, 207), (186, 181, 255), (52, 207, 235), (173, 2, 119)]
+numberColors = [(0, 0, 0), (55, 41, 255), (0, 156, 18), (240, 24, 24), (195, 0, 230), (255, 215, 36), (0, 138, 207), (116, 32, 161), (252, 3, 161)]
+background = (100, 100, 100)
+viewportSettings = ((1000, 1000), 150000)
+viewportCellSteps = {"zoom 1": None, "16 px cells": 16, "lod limit": lodCellStep, "overview": lodCellStep - 1, "whole board": 0} #pixels per cell, None keeps the default size, 0 fits the whole board
+
+
+def createRenderer(dimensions, mineAmount, rng):
+    mines = np.zeros(dimensions[0]*dimensions[1], dtype=bool)
+    mines[rng.choice(mines.size, mineAmount, replace=False)] = True
+    board = Board(mines.reshape(dimensions))
+    x, y = np.argwhere((board.counts == 0) & ~board.mines)[0]
+    board.reveal(x, y)
+
+    buttonSize = min(windowSize[0]/dimensions[0], windowSize[1]/dimensions[1])*0.85
+    buttonMargin = buttonSize*0.15
+    fieldStartPos = ((windowSize[0] - dimensions[0]*(buttonSize+buttonMargin))/2, (windowSize[1] - dimensions[1]*(buttonSize+buttonMargin))/2)
+    countFont = pg.font.Font(None, max(int(buttonSize), 4))
+    image = pg.Surface((max(int(buttonSize*0.7), 1),)*2)
+    return BoardRenderer(board, fieldStartPos, buttonSize, buttonMargin, TileCache(buttonColors, numberColors, countFont, image, image), background)
+
+
+def run(screen, dimensions, mineAmount, dirty):
+    rng = np.random.default_rng(0)
+    renderer = createRenderer(dimensions, mineAmount, rng)
+    board = renderer.board
+    startWall, startCpu = time.perf_counter(), time.process_time()
+    frame = 0
+    while frame < frameAmount and time.perf_counter() - startWall < timeLimit:
+        hoveredCoords = (frame//3 % dimensions[0], frame//7 % dimensions[1]) #the mouse wanders slowly over the field
+        if frame % 30 == 0:
+            board.toggleFlag(*hoveredCoords)
+        elif frame % 30 == 15 and not board.cells[hoveredCoords] & CELL_FLAGGED:
+            board.reveal(*hoveredCoords)
+
+        if dirty:
+            pg.display.update(renderer(screen, hoveredCoords, False))
+        else:
+            renderer.invalidate()
+            renderer(screen, hoveredCoords, False)
+            pg.display.update()
+        frame += 1
+    wall, cpu = time.perf_counter() - startWall, time.process_time() - startCpu
+    return frame/wall, cpu/frame*1000
+
+
+def runViewport(screen, cellStep):
+    """Pans diagonally while flagging and revealing cells in the middle of the screen every few frames"""
+    rng = np.random.default_rng(0)
+    dimensions, mineAmount = viewportSettings
+    mines = np.zeros(dimensions[0]*dimensions[1], dtype=bool)
+    mines[rng.choice(mines.size, mineAmount, replace=False)] = True
+    board = Board(mines.reshape(dimensions))
+    buttonSize = min(windowSize)/30
+    countFont = pg.font.Font(None, int(buttonSize))
+    image = pg.Surface((int(buttonSize*0.7),)*2)
+    renderer = ViewportRenderer(board, screen.get_rect(), buttonSize, buttonSize*0.15, TileCache(buttonColors, numberColors, countFont, image, image), bounds=dimensions)
+    if cellStep is not None:
+        renderer.zoom = max(cellStep/renderer.baseCellStep, renderer.minZoom)
+    renderer.centerOn(dimensions[0]//2, dimensions[1]//2)
+
+    startWall, startCpu = time.perf_counter(), time.process_time()
+    frame = 0
+    while frame < frameAmount and time.perf_counter() - startWall < timeLimit:
+        renderer.pan(renderer.cellStep/4, renderer.cellStep/6) #the same share of the screen at every zoom
+        hoveredCoords = renderer.cellAt(screen.get_rect().center)
+        if hoveredCoords is not None and frame % 30 == 0:
+            board.toggleFlag(*hoveredCoords)
+        elif hoveredCoords is not None and frame % 30 == 15 and not board.cells[hoveredCoords] & CELL_FLAGGED:
+            board.reveal(*hoveredCoords)
+        screen.fill(background)
+        renderer(screen, hoveredCoords, False)
+        pg.display.update()
+        frame += 1
+    wall, cpu = time.perf_counter() - startWall, time.process_time() - startCpu
+    x, y, width, height = renderer.visibleCells()
+    return frame/wall, cpu/frame*1000, width*height, renderer.isOverview
+
+
+if __name__ == "__main__":
+    pg.init()
+    screen = pg.display.set_mode(windowSize)
+    print("{:<16}{:>14}{:>16}{:>14}{:>16}".format("board", "full fps", "full ms/frame", "dirty fps", "dirty ms/frame"))
+    for name, (dimensions, mineAmount) in boardSettings.items():
+        fullFps, fullCpu = run(screen, dimensions, mineAmount, False)
+        dirtyFps, dirtyCpu = run(screen, dimensions, mineAmount, True)
+        print("{:<16}{:>14.1f}{:>16.3f}{:>14.1f}{:>16.3f}".format(name, fullFps, fullCpu, dirtyFps, dirtyCpu))
+
+    print()
+    print("viewport on a {}x{} board".format(*viewportSettings[0]))
+    print("{:<16}{:>14}{:>12}{:>16}{:>10}".format("zoom", "visible cells", "fps", "ms/frame", "overview"))
+    for name, cellStep in viewportCellSteps.items():
+        fps, cpu, visibleAmount, isOverview = runViewport(screen, cellStep)
+        print("{:<16}{:>14}{:>12.1f}{:>16.3f}{:>10}".format(name, visibleAmount, fps, cpu, "yes" if isOverview else "no"))
+    pg.quit()
@@ -0,0 +1,58 @@
+"""Records solver games on the presets and reports disk use and replay throughput per thousand games, next to the size of a plain JSON record.
+python benchmarks/replay_benchmark.py [games]"""
+import json
+import os
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from generator import difficultyPresets, generateFallback
+from replay import ACTION_DELTA_ON, Replay, appendReplay, play, readReplays
+from solver import solve
+
+
+class ThinkingClock:
+    """Fake clock for recording solver games, every call advances by a random pause like a human player needs between clicks"""
+    def __init__(self, rng: np.random.Generator, meanSeconds=0.6):
+        self.rng = rng
+        self.meanSeconds = meanSeconds
+        self.time = 0
+
+    def __call__(self):
+        self.time += self.rng.exponential(self.meanSeconds)
+        return self.time
+
+
+if __name__ == "__main__":
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    print("{:<10}{:>8}{:>14}{:>16}{:>16}{:>16}{:>16}{:>14}".format("preset", "games", "actions/game", "KB/1000 games", "JSON KB/1000", "record s/1000", "replay s/1000", "x real time"))
+    for name, (dimensions, mineAmount) in difficultyPresets.items():
+        rng = np.random.default_rng(0)
+        path = os.path.join(tempfile.mkdtemp(prefix="minesweeper_replays_"), "replays.bin")
+        replays = []
+        start = time.perf_counter()
+        for _ in range(games):
+            seed = int(rng.integers(2**63))
+            board, _ = generateFallback(dimensions, mineAmount, seed)
+            replay = Replay(dimensions, mineAmount, seed, clock=ThinkingClock(rng))
+            replay.record(ACTION_DELTA_ON) #the game starts in delta mode by default
+            solve(board, rng, recorder=replay)
+            appendReplay(path, replay)
+            replays.append((replay, board.won))
+        recordTime = time.perf_counter() - start
+        size = os.path.getsize(path)
+        jsonSize = sum(len(json.dumps({"dimensions": replay.dimensions, "mines": replay.mineAmount, "seed": replay.seed, "actions": replay.actions})) for replay, _ in replays) #the obvious text format, for comparison
+
+        start = time.perf_counter()
+        mismatches = sum(play(replay)[0].won != won for replay, (_, won) in zip(readReplays(path), replays))
+        replayTime = time.perf_counter() - start
+        if mismatches:
+            print("{} replays ended differently than the recorded games".format(mismatches))
+        actionAmount = sum(len(replay.actions) for replay, _ in replays)
+        playedTime = sum(replay.actions[-1][0] for replay, _ in replays)/1000 #how long the games took to play at human speed
+        #bytes per game are KB per thousand games
+        print("{:<10}{:>8}{:>14.1f}{:>16.1f}{:>16.1f}{:>16.2f}{:>16.2f}{:>14.0f}".format(name, games, actionAmount/games, size/games, jsonSize/games, recordTime/games*1000, replayTime/games*1000, playedTime/replayTime))
+        os.remove(path)
+        os.rmdir(os.path.dirname(path))
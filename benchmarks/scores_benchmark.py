@@ -0,0 +1,74 @@
+"""Fills a score store with random games and reports load, append and query times against scanning every record,
+then damages the end of the file like a crash would and times the recovery.
+python benchmarks/scores_benchmark.py [records]"""
+import os
+import sys
+import tempfile
+import time
+import zlib
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from scores import ScoreStore, checksumFormat, recordDtype, recordFormat, recordSize
+
+
+if __name__ == "__main__":
+    amount = int(sys.argv[1]) if len(sys.argv) > 1 else 300000
+    difficulties = ("easy", "medium", "hard")
+    rng = np.random.default_rng(0)
+    path = os.path.join(tempfile.mkdtemp(prefix="minesweeper_scores_"), "scores.bin")
+
+    #filled in one go, one write and sync per record would take minutes
+    records = bytearray()
+    for difficulty, seconds, won in zip(rng.choice(difficulties, amount).tolist(), rng.lognormal(4, 0.5, amount).tolist(), (rng.random(amount) < 0.6).tolist()):
+        record = recordFormat.pack(difficulty.encode(), seconds, 0, won)
+        records += record + checksumFormat.pack(zlib.crc32(record))
+    with open(path, "wb") as f:
+        f.write(records)
+    print("{} records, {:.1f} MB".format(amount, os.path.getsize(path)/1e6))
+
+    start = time.perf_counter()
+    store = ScoreStore(path)
+    print("load and index without a saved index: {:.1f} ms".format((time.perf_counter() - start)*1000))
+    store.close()
+    start = time.perf_counter()
+    store = ScoreStore(path)
+    print("load with the saved index: {:.1f} ms".format((time.perf_counter() - start)*1000))
+
+    for syncWrites in (True, False):
+        store.syncWrites = syncWrites
+        start = time.perf_counter()
+        for _ in range(200):
+            store.add("hard", float(rng.lognormal(4, 0.5)), True)
+        print("append, sync {}: {:.3f} ms per record".format("on" if syncWrites else "off", (time.perf_counter() - start)/200*1000))
+
+    queries = 1000
+    start = time.perf_counter()
+    for _ in range(queries):
+        store.best("hard"), store.top("hard", 10), store.percentile("hard", 90), store.rank("hard", 60)
+    indexed = (time.perf_counter() - start)/queries*1000
+    start = time.perf_counter()
+    for _ in range(10):
+        with open(path, "rb") as f:
+            scanned = np.frombuffer(f.read(), dtype=recordDtype)
+        times = np.sort(scanned["seconds"][(scanned["difficulty"] == b"hard") & scanned["won"]])
+        times[0], times[:10], times[int(len(times)*0.9)], np.searchsorted(times, 60)
+    scanning = (time.perf_counter() - start)/10*1000
+    print("best + top 10 + percentile + rank: {:.4f} ms indexed, {:.1f} ms scanning the file".format(indexed, scanning))
+    expected = store.top("hard", 5)
+    store.file.close() #crashes without saving the index, the 400 records appended above are only in the store
+
+    #a crash in the middle of a write leaves part of a record, a bad sector a wrong checksum
+    with open(path, "r+b") as f:
+        f.seek(-recordSize*3 + 20, os.SEEK_END)
+        f.write(b"\xff")
+        f.seek(0, os.SEEK_END)
+        f.write(recordFormat.pack(b"hard", 1.0, 0, True)[:20])
+    start = time.perf_counter()
+    recovered = ScoreStore(path)
+    print("recovered {} in {:.1f} ms, {} record skipped, torn record {}".format(recovered, (time.perf_counter() - start)*1000, recovered.skippedAmount, "removed" if os.path.getsize(path) % recordSize == 0 else "kept"))
+    print("top 5 hard times {}".format("unchanged" if recovered.top("hard", 5) == expected else "changed"))
+    recovered.close()
+    for leftover in os.listdir(os.path.dirname(path)):
+        os.remove(os.path.join(os.path.dirname(path), leftover))
+    os.rmdir(os.path.dirname(path))
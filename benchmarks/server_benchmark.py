@@ -0,0 +1,133 @@
+"""Load test of the game server. Starts server.py in its own process and connects many clients that each keep a set of games open,
+playing random moves on them: reveals, flags, chords and state requests, starting a new game whenever one is over.
+Every client rebuilds its boards from the changed cells alone and compares them to a full state request at the end.
+Reports requests per second and latency percentiles over TCP and, where available, a Unix socket.
+python benchmarks/server_benchmark.py [connections] [games per connection] [seconds] [difficulty]"""
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import json
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from server import VALUE_HIDDEN
+
+
+serverPath = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "server.py")
+commandShares = (("reveal", 0.7), ("flag", 0.15), ("chord", 0.1), ("state", 0.05))
+
+
+class Client:
+    """One connection, one request in flight at a time like a bot waiting for the result of its move"""
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.latencies = []
+        self.commandAmounts = dict.fromkeys(("new", "close") + tuple(command for command, _ in commandShares), 0)
+
+    async def request(self, **request) -> dict:
+        start = time.perf_counter()
+        self.writer.write(json.dumps(request, separators=(",", ":")).encode() + b"\n")
+        answer = json.loads(await self.reader.readline())
+        self.latencies.append(time.perf_counter() - start)
+        self.commandAmounts[request["cmd"]] = self.commandAmounts.get(request["cmd"], 0) + 1
+        if not answer["ok"]:
+            raise RuntimeError(answer["error"])
+        return answer
+
+    async def newGame(self, difficulty, seed) -> list:
+        """[game id, dimensions, cells as seen by the player, last version, whether it is over]"""
+        answer = await self.request(cmd="new", difficulty=difficulty, seed=seed)
+        view = np.full(int(np.prod(answer["dimensions"])), VALUE_HIDDEN, dtype=np.int8)
+        view[answer["cells"]] = answer["values"]
+        return [answer["game"], answer["dimensions"], view, answer["version"], answer["over"]]
+
+    async def play(self, gameAmount, difficulty, deadline, rng: np.random.Generator):
+        games = [await self.newGame(difficulty, int(rng.integers(2**63))) for _ in range(gameAmount)]
+        commands, shares = zip(*commandShares)
+        while time.perf_counter() < deadline:
+            game = games[int(rng.integers(len(games)))]
+            gameId, dimensions, view, version, isOver = game
+            if isOver:
+                await self.request(cmd="close", game=gameId)
+                games[games.index(game)] = await self.newGame(difficulty, int(rng.integers(2**63)))
+                continue
+            command = commands[rng.choice(len(commands), p=shares)]
+            if command == "state":
+                answer = await self.request(cmd="state", game=gameId, since=version)
+            else:
+                candidates = np.flatnonzero(view >= 0 if command == "chord" else view < 0)
+                if candidates.size == 0:
+                    continue
+                cell = np.unravel_index(int(rng.choice(candidates)), dimensions)
+                answer = await self.request(cmd=command, game=gameId, cell=[int(coordinate) for coordinate in cell])
+            view[answer["cells"]] = answer["values"]
+            game[3], game[4] = answer["version"], answer["over"]
+
+        mismatches = 0
+        for gameId, _, view, _, _ in games:
+            answer = await self.request(cmd="state", game=gameId, since=0)
+            full = np.full(view.size, VALUE_HIDDEN, dtype=np.int8)
+            full[answer["cells"]] = answer["values"]
+            mismatches += int((full != view).any())
+        return mismatches
+
+
+async def loadTest(address, connectionAmount, gameAmount, seconds, difficulty):
+    if isinstance(address, tuple):
+        connections = [await asyncio.open_connection(*address) for _ in range(connectionAmount)]
+    else:
+        connections = [await asyncio.open_unix_connection(address) for _ in range(connectionAmount)]
+    clients = [Client(reader, writer) for reader, writer in connections]
+    start = time.perf_counter()
+    deadline = start + seconds
+    mismatches = await asyncio.gather(*(client.play(gameAmount, difficulty, deadline, np.random.default_rng(i)) for i, client in enumerate(clients)))
+    elapsed = time.perf_counter() - start
+    latencies = np.concatenate([client.latencies for client in clients])*1000
+    commandAmounts = {command: sum(client.commandAmounts[command] for client in clients) for command in clients[0].commandAmounts}
+    stats = await clients[0].request(cmd="stats") #after counting, it is not part of the load
+    for _, writer in connections:
+        writer.close()
+    return latencies.size/elapsed, np.percentile(latencies, 50), np.percentile(latencies, 99), stats["games"], sum(mismatches), commandAmounts
+
+
+def startServer(address):
+    """Runs server.py in its own process and waits until it listens, returns the process and the line it printed"""
+    process = subprocess.Popen([sys.executable, serverPath, address], stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    if not line.startswith("listening on"):
+        process.kill()
+        raise RuntimeError("Server didn't start: {!r}".format(line))
+    return process, line.split()[-1]
+
+
+if __name__ == "__main__":
+    connectionAmount = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    gameAmount = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    seconds = float(sys.argv[3]) if len(sys.argv) > 3 else 5
+    difficulty = sys.argv[4] if len(sys.argv) > 4 else "medium"
+    print("{} connections with {} {} games each, {} s per transport".format(connectionAmount, gameAmount, difficulty, seconds))
+    print("{:<12}{:>14}{:>12}{:>12}{:>14}{:>14}".format("transport", "requests/s", "p50 ms", "p99 ms", "open games", "mismatches"))
+
+    transports = [("tcp", "0")]
+    if hasattr(socket, "AF_UNIX"):
+        transports.append(("unix", os.path.join(tempfile.mkdtemp(prefix="minesweeper_server_"), "server.sock")))
+    for name, listenAddress in transports:
+        process, where = startServer(listenAddress)
+        try:
+            host, _, port = where.rpartition(":")
+            address = (host, int(port)) if name == "tcp" else where
+            requestRate, p50, p99, openGames, mismatches, commandAmounts = asyncio.run(loadTest(address, connectionAmount, gameAmount, seconds, difficulty))
+        finally:
+            process.terminate()
+            process.wait()
+        print("{:<12}{:>14.0f}{:>12.3f}{:>12.3f}{:>14}{:>14}".format(name, requestRate, p50, p99, openGames, mismatches))
+    print("requests of the last run: {}".format(", ".join("{} {}".format(command, amount) for command, amount in commandAmounts.items())))
+    for _, listenAddress in transports[1:]:
+        if os.path.exists(listenAddress):
+            os.remove(listenAddress)
+        os.rmdir(os.path.dirname(listenAddress))
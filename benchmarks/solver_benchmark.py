@@ -0,0 +1,16 @@
+"""Plays the easy, medium and hard presets with the solver and reports the win rate and boards per second.
+python benchmarks/solver_benchmark.py [games]"""
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generator import difficultyPresets
+from solver import solveBatch
+
+
+if __name__ == "__main__":
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    print("{:<10}{:>8}{:>12}{:>12}".format("preset", "games", "win rate", "boards/s"))
+    for name, (dimensions, mineAmount) in difficultyPresets.items():
+        result = solveBatch(dimensions, mineAmount, games)
+        print("{:<10}{:>8}{:>12.3f}{:>12.1f}".format(name, result["games"], result["winRate"], result["boardsPerSecond"]))
@@ -0,0 +1,61 @@
+"""Times a cold start in fresh interpreters: importing the headless core with pygame blocked, importing main without opening a window
+and launching the game until its first frame is shown. Runs without a visible window: python benchmarks/startup_benchmark.py"""
+import os
+import subprocess
+import sys
+import time
+
+
+repeats = 5
+repositoryDirectory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+coreModules = ("board", "generator", "solver", "replay", "scores", "chunks", "noguess", "prefetch", "probability")
+
+#each child prints the seconds it measured itself on its last line
+importCore = """
+import sys, time
+sys.modules["pygame"] = None #any import of pygame fails
+start = time.perf_counter()
+import {}
+print(time.perf_counter() - start)
+""".format(", ".join(coreModules))
+
+importMain = """
+import sys, time
+start = time.perf_counter()
+import main
+import pygame as pg
+assert not pg.display.get_init(), "importing main opened the display"
+print(time.perf_counter() - start)
+"""
+
+firstFrame = """
+import os, runpy, sys, time
+start = time.perf_counter()
+import pygame as pg
+def update(*rects):
+    print(time.perf_counter() - start, flush=True)
+    os._exit(0)
+pg.display.update = update
+sys.argv = ["main.py"]
+runpy.run_path("main.py", run_name="__main__")
+"""
+
+
+def measure(code):
+    """Median of the seconds the child reported and of the whole process lifetime including interpreter startup"""
+    inside, total = [], []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, "-c", code], cwd=repositoryDirectory, capture_output=True, text=True, env=dict(os.environ, SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy", PYGAME_HIDE_SUPPORT_PROMPT="1"))
+        total.append(time.perf_counter() - start)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr)
+        inside.append(float(result.stdout.split()[-1]))
+    return sorted(inside)[repeats//2], sorted(total)[repeats//2]
+
+
+if __name__ == "__main__":
+    print("{:<28}{:>14}{:>16}".format("", "measured ms", "process ms"))
+    for name, code in (("import headless core", importCore), ("import main, no window", importMain), ("launch until first frame", firstFrame)):
+        inside, total = measure(code)
+        print("{:<28}{:>14.1f}{:>16.1f}".format(name, inside*1000, total*1000))
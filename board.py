@@ -0,0 +1,330 @@
+import functools
+import itertools
+import math
+import numpy as np
+
+
+#bits of the packed cell state, the lowest five bits hold the amount of surrounding mines, up to 26 on a 3D board
+CELL_COUNT_MASK = 31
+CELL_MINE = 32
+CELL_REVEALED = 64
+CELL_FLAGGED = 128
+
+maxDimensions = 3 #a 4D cell has 80 neighbors, more than the count bits can hold
+neighborTableEntryLimit = 1 << 21 #the table takes 4 bytes per neighbor of every cell, bigger boards compute their neighbors on every call instead
+
+
+def neighborCounts(grid: np.ndarray, fieldAxes=2) -> np.ndarray:
+    """Counts the set cells among the 3^d-1 surrounding cells of every cell of a d dimensional field in one vectorized pass.
+    The sum over a cell's surrounding box is separable, so it takes two shifted adds per axis instead of one per neighbor.
+    The last fieldAxes axes are the field axes, any leading axes are treated as a batch of independent boards."""
+    cells = grid.astype(np.uint8)
+    counts = cells
+    for axis in range(grid.ndim - fieldAxes, grid.ndim):
+        lower = (slice(None),)*axis + (slice(None, -1),)
+        upper = (slice(None),)*axis + (slice(1, None),)
+        summed = counts.copy()
+        summed[upper] += counts[lower]
+        summed[lower] += counts[upper]
+        counts = summed
+    return counts - cells #the cell itself isn't its own neighbor
+
+
+@functools.lru_cache(maxsize=None)
+def neighborOffsets(dimensionAmount) -> np.ndarray:
+    """Coordinate shifts to the 3^d-1 neighbors of a cell as rows, in the order of the neighbor table's columns"""
+    offsets = np.array([shift for shift in itertools.product((-1, 0, 1), repeat=dimensionAmount) if any(shift)], dtype=np.intp)
+    offsets.flags.writeable = False
+    return offsets
+
+
+def flatIndex(cell, dimensions) -> int:
+    """Flat index of a cell given by its coordinates, numpy's ravel_multi_index costs more than this for a single cell"""
+    index = 0
+    for coordinate, size in zip(cell, dimensions):
+        index = index*size + int(coordinate)
+    return index
+
+
+def cellCoordinates(index, dimensions) -> tuple:
+    """Coordinates of a flat index, the inverse of flatIndex"""
+    coordinates = []
+    for size in dimensions[:0:-1]:
+        index, coordinate = divmod(int(index), size)
+        coordinates.append(coordinate)
+    return (int(index), *coordinates[::-1])
+
+
+def flatStrides(dimensions) -> np.ndarray:
+    """Distance between flat indices of cells one step apart along each axis"""
+    return np.cumprod((*dimensions[1:], 1)[::-1])[::-1]
+
+
+@functools.lru_cache(maxsize=8)
+def neighborTable(dimensions) -> np.ndarray:
+    """Flat indices of the neighbors of every cell of a board shape as rows, -1 outside of the field.
+    Built once per shape and shared by every board of that shape, so it is read only"""
+    table = computeNeighbors(np.arange(math.prod(dimensions)), dimensions).astype(np.int32)
+    table.flags.writeable = False
+    return table
+
+
+def neighborMatrix(indices: np.ndarray, dimensions) -> np.ndarray:
+    """Returns the flat indices of the 3^d-1 neighbors of every given flat index as rows, neighbors outside of the field are -1"""
+    dimensions = tuple(int(size) for size in dimensions)
+    if math.prod(dimensions)*(3**len(dimensions) - 1) <= neighborTableEntryLimit:
+        return neighborTable(dimensions)[np.asarray(indices).reshape(-1)]
+    return computeNeighbors(indices, dimensions)
+
+
+def computeNeighbors(indices: np.ndarray, dimensions) -> np.ndarray:
+    """Same as neighborMatrix, but without the table. Each neighbor is the cell's flat index plus a fixed offset,
+    it only has to be dropped where the cell lies on the border the shift crosses"""
+    indices = np.asarray(indices).reshape(-1)
+    coordinates = np.unravel_index(indices, dimensions)
+    hasLower = [axisCoordinates > 0 for axisCoordinates in coordinates]
+    hasUpper = [axisCoordinates < size - 1 for axisCoordinates, size in zip(coordinates, dimensions)]
+    offsets = neighborOffsets(len(dimensions))
+    neighbors = np.full((indices.size, len(offsets)), -1, dtype=np.intp)
+    for column, (shift, flatOffset) in enumerate(zip(offsets.tolist(), (offsets @ flatStrides(dimensions)).tolist())):
+        valid = None
+        for axis, axisShift in enumerate(shift):
+            if axisShift:
+                axisValid = hasLower[axis] if axisShift < 0 else hasUpper[axis]
+                valid = axisValid if valid is None else valid & axisValid
+        neighbors[valid, column] = indices[valid] + flatOffset
+    return neighbors
+
+
+def neighborIndices(indices: np.ndarray, dimensions) -> np.ndarray:
+    """Returns the flat indices of all in-bounds neighbors of the given flat indices. Neighbors shared by several cells appear multiple times."""
+    neighbors = neighborMatrix(indices, dimensions)
+    return neighbors[neighbors >= 0]
+
+
+class Board:
+    """Headless game state of a single field, no pygame required. Every cell is packed into one byte of cells (indexed [x, y] or [x, y, z]) using the CELL_ bits.
+    mines, counts, revealed and flagged unpack the whole field into new arrays, single cells should be read from cells directly."""
+    def __init__(self, mines: np.ndarray):
+        mines = np.asarray(mines, dtype=bool)
+        if not 1 <= mines.ndim <= maxDimensions:
+            raise ValueError("Boards have 1 to {} dimensions, not {}".format(maxDimensions, mines.ndim))
+        self.dimensions = mines.shape
+        self.mineAmount = int(mines.sum())
+        self.cells = neighborCounts(mines, mines.ndim)
+        self.cells[mines] |= CELL_MINE
+        self.flagAmount = 0
+        #counts never change after creation, the delta counts are kept up to date on every flag toggle so switching modes is just a swap
+        self.deltaCounts = self.counts.astype(np.int8) #may become negative if too many flags are placed, never below -26
+        self.useDelta = False
+        self.revealedSafeAmount = 0
+        self.exploded = False
+        self.gameOverReported = False #listeners hear about the end of the game once, with its first result
+        self.gameOverListeners = []
+        self.changeListeners = []
+
+    def __repr__(self):
+        return "Board(dimensions: {}, mines: {}, revealed: {}, flagged: {})".format(self.dimensions, self.mineAmount, int(self.revealed.sum()), int(self.flagged.sum()))
+
+    @property
+    def mines(self) -> np.ndarray:
+        return (self.cells & CELL_MINE) != 0
+
+    @property
+    def counts(self) -> np.ndarray:
+        return self.cells & CELL_COUNT_MASK
+
+    @property
+    def revealed(self) -> np.ndarray:
+        return (self.cells & CELL_REVEALED) != 0
+
+    @property
+    def flagged(self) -> np.ndarray:
+        return (self.cells & CELL_FLAGGED) != 0
+
+    def inBounds(self, *cell):
+        return len(cell) == len(self.dimensions) and all(0 <= coordinate < size for coordinate, size in zip(cell, self.dimensions))
+
+    @property
+    def won(self):
+        return not self.exploded and self.revealedSafeAmount == self.cells.size - self.mineAmount
+
+    @property
+    def isOver(self):
+        return self.exploded or self.won
+
+    def onGameOver(self, callback):
+        """Registers callback(won) to be called once the game is won or lost. Fires immediately if the game is already over."""
+        self.gameOverListeners.append(callback)
+        if self.isOver:
+            callback(self.won)
+
+    def onChange(self, callback):
+        """Registers callback(changedCells) to be called with the flat indices of cells that were revealed or (un)flagged"""
+        self.changeListeners.append(callback)
+
+    def setViewport(self, x, y, width, height):
+        """The whole field is always in memory, so unlike chunks.ChunkedBoard nothing depends on what is on screen"""
+
+    def displayWindow(self, x, y, width, height) -> tuple[np.ndarray, np.ndarray]:
+        """Packed cells of a rectangle inside the field plus the counts to display there, only the rectangle is read"""
+        return self._displayWindow((slice(x, x + width), slice(y, y + height)))
+
+    def _displayWindow(self, window) -> tuple[np.ndarray, np.ndarray]:
+        cells = self.cells[window] #a view, the counts are masked from it so a frame's cost depends on the window and not the board
+        return cells, self.deltaCounts[window] if self.useDelta else cells & CELL_COUNT_MASK
+
+    @property
+    def displayCounts(self) -> np.ndarray:
+        return self.deltaCounts if self.useDelta else self.counts
+
+    def setDeltaMode(self, useDelta):
+        self.useDelta = bool(useDelta)
+
+    def toggleFlag(self, *cell):
+        if self.isOver or self.cells[cell] & CELL_REVEALED: #a finished board is frozen
+            return
+        change = -1 if self.cells[cell] & CELL_FLAGGED else 1
+        self.cells[cell] ^= CELL_FLAGGED
+        self.flagAmount += change
+        self.deltaCounts[tuple(slice(max(coordinate-1, 0), coordinate+2) for coordinate in cell)] -= change #only the surrounding cells are affected
+        self.deltaCounts[cell] += change #the cell itself isn't its own neighbor
+        self._changed(np.array([flatIndex(cell, self.dimensions)], dtype=np.intp))
+
+    def reveal(self, *cell) -> np.ndarray:
+        """Reveals a cell and, if it has no surrounding mines, the whole connected region of zeroes including its border.
+        The region is opened breadth first in batches, so stack depth is constant and every cell is visited once.
+        Returns the flat indices of all newly revealed cells, nothing once the game is over."""
+        cells = self.cells.reshape(-1) #flat view, writing to it writes to the board
+        start = flatIndex(cell, self.dimensions)
+        if self.isOver or cells[start] & CELL_REVEALED:
+            return np.empty(0, dtype=np.intp)
+        cells[start] |= CELL_REVEALED
+        if cells[start] & CELL_MINE: #mines are never expanded, so only the clicked cell can be one
+            self.exploded = True
+            self._changed(np.array([start], dtype=np.intp))
+            self._gameOver()
+            return np.array([start], dtype=np.intp)
+
+        newCells = np.array([start], dtype=np.intp)
+        if cells[start] & CELL_COUNT_MASK == 0:
+            newCells = np.concatenate((newCells, self._openRegion(cell)))
+        self._changed(newCells)
+
+        wasOver = self.isOver
+        self.revealedSafeAmount += newCells.size
+        if self.won and not wasOver:
+            self._gameOver()
+        return newCells
+
+    def chord(self, *cell) -> np.ndarray:
+        """Reveals every hidden neighbor without a flag of a revealed cell, once as many neighbors are flagged as it has surrounding mines.
+        Returns the flat indices of all newly revealed cells, stops at the first mine like a single reveal does."""
+        cells = self.cells.reshape(-1)
+        index = flatIndex(cell, self.dimensions)
+        if not cells[index] & CELL_REVEALED or cells[index] & CELL_MINE:
+            return np.empty(0, dtype=np.intp)
+        neighbors = neighborIndices(np.array([index], dtype=np.intp), self.dimensions)
+        if np.count_nonzero(cells[neighbors] & CELL_FLAGGED) != cells[index] & CELL_COUNT_MASK:
+            return np.empty(0, dtype=np.intp)
+        opened = [np.empty(0, dtype=np.intp)]
+        for neighbor in neighbors[(cells[neighbors] & (CELL_REVEALED | CELL_FLAGGED)) == 0].tolist():
+            opened.append(self.reveal(*cellCoordinates(neighbor, self.dimensions))) #cells opened by an earlier neighbor's region return nothing
+            if self.exploded:
+                break
+        return np.concatenate(opened)
+
+    def _openRegion(self, start) -> np.ndarray:
+        """Reveals the region of zeroes around the already revealed start cell and its border, returns the flat indices of the opened cells.
+        The region is searched on a copy with a border of revealed cells, where every neighbor is the cell's flat index plus a fixed offset
+        without bounds checks. This beats gathering rows of the neighbor table on every size but the smallest boards, where both are equal"""
+        paddedDimensions = tuple(size + 2 for size in self.dimensions)
+        flatOffsets = neighborOffsets(len(self.dimensions)) @ flatStrides(paddedDimensions)
+        space = np.pad(self.cells, 1, constant_values=CELL_REVEALED).reshape(-1) #the border is never opened
+        frontier = np.array([flatIndex((coordinate + 1 for coordinate in start), paddedDimensions)], dtype=np.intp)
+        firstPosition = np.empty(space.size, dtype=np.intp) #only read where it was just written, so it needs no initialization
+        opened = []
+        while frontier.size:
+            neighbors = (frontier[:, None] + flatOffsets).reshape(-1)
+            neighbors = neighbors[(space[neighbors] & CELL_REVEALED) == 0]
+            positions = np.arange(neighbors.size)
+            firstPosition[neighbors] = positions
+            neighbors = neighbors[firstPosition[neighbors] == positions] #one entry per cell remains, without sorting
+            space[neighbors] |= CELL_REVEALED
+            opened.append(neighbors)
+            frontier = neighbors[(space[neighbors] & (CELL_COUNT_MASK | CELL_MINE)) == 0] #ignore delta and only expand cells without any surrounding mines, as the user may have placed some false flags
+        opened = np.concatenate(opened)
+        opened = np.ravel_multi_index(tuple(axisCoordinates - 1 for axisCoordinates in np.unravel_index(opened, paddedDimensions)), self.dimensions)
+        self.cells.reshape(-1)[opened] |= CELL_REVEALED
+        return opened
+
+    def _changed(self, changedCells):
+        for callback in self.changeListeners:
+            callback(changedCells)
+
+    def _gameOver(self):
+        if self.gameOverReported:
+            return
+        self.gameOverReported = True
+        for callback in self.gameOverListeners:
+            callback(self.won)
+
+
+class BoardSlice:
+    """2D cross-section of a board with more than two dimensions: the first two axes at the fixed coordinates of the others, its depth.
+    It offers the parts of the Board interface the renderers and game screens use with cells indexed [x, y], everything else is the board's"""
+    mines, counts, revealed, flagged, displayCounts = Board.mines, Board.counts, Board.revealed, Board.flagged, Board.displayCounts #these only read cells and deltaCounts
+
+    def __init__(self, board: Board, depth=None):
+        self.board = board
+        self.dimensions = board.dimensions[:2]
+        self.depth = tuple(depth) if depth is not None else (0,)*(len(board.dimensions) - 2)
+        self.changeListeners = []
+        board.onChange(self._boardChanged)
+
+    def __getattr__(self, name):
+        return getattr(self.board, name)
+
+    def __repr__(self):
+        return "BoardSlice(depth: {}, board: {})".format(self.depth, self.board)
+
+    @property
+    def cells(self) -> np.ndarray:
+        return self.board.cells[(slice(None), slice(None), *self.depth)]
+
+    @property
+    def deltaCounts(self) -> np.ndarray:
+        return self.board.deltaCounts[(slice(None), slice(None), *self.depth)]
+
+    def select(self, *depth):
+        """Shows another cross-section, coordinates outside of the board are clamped to it"""
+        depth = tuple(min(max(int(coordinate), 0), size - 1) for coordinate, size in zip(depth, self.board.dimensions[2:]))
+        if depth != self.depth:
+            self.depth = depth
+            self._changed(np.arange(self.dimensions[0]*self.dimensions[1])) #every cell on screen shows something else now
+
+    def onChange(self, callback):
+        """Registers callback(changedCells) to be called with the flat indices inside of the slice of cells that were revealed or (un)flagged"""
+        self.changeListeners.append(callback)
+
+    def displayWindow(self, x, y, width, height) -> tuple[np.ndarray, np.ndarray]:
+        return self.board._displayWindow((slice(x, x + width), slice(y, y + height), *self.depth))
+
+    def toggleFlag(self, x, y):
+        self.board.toggleFlag(x, y, *self.depth)
+
+    def reveal(self, x, y) -> np.ndarray:
+        """Reveals like Board.reveal, the region may spread into other slices. Returns the flat indices of the newly revealed cells of the whole board"""
+        return self.board.reveal(x, y, *self.depth)
+
+    def _boardChanged(self, changedCells):
+        coordinates = np.unravel_index(changedCells, self.board.dimensions)
+        inSlice = np.ones(len(changedCells), dtype=bool)
+        for axisCoordinates, coordinate in zip(coordinates[2:], self.depth):
+            inSlice &= axisCoordinates == coordinate
+        if inSlice.any():
+            self._changed(coordinates[0][inSlice]*self.dimensions[1] + coordinates[1][inSlice])
+
+    def _changed(self, changedCells):
+        for callback in self.changeListeners:
+            callback(changedCells)
@@ -0,0 +1,214 @@
+"""Endless board without fixed dimensions. The field is split into square chunks whose mines are generated from the world seed
+and the chunk coordinates the first time a chunk is needed, so any chunk can be regenerated at any time.
+Only chunks near the viewport stay in memory, chunks the player changed are written to an on-disk store when they are evicted."""
+import dbm
+import os
+import shutil
+import tempfile
+import numpy as np
+from board import CELL_COUNT_MASK, CELL_FLAGGED, CELL_MINE, CELL_REVEALED, neighborCounts
+
+
+chunkSize = 32
+minDensity = 0.12 #below this the regions without surrounding mines can go on forever, so a single reveal would never stop
+chunkMargin = 1 #chunks this far around the viewport are kept loaded, so scrolling doesn't reload them immediately
+maxLoadedChunks = 256 #evicting only starts above this, chunks around the viewport are never evicted even if there are more
+
+
+class ChunkStore:
+    """Revealed and flagged bits of changed chunks, two bits per cell in a dbm file. Unchanged chunks are never stored, they are regenerated from the seed"""
+    def __init__(self, path=None):
+        self.directory = None
+        if path is None:
+            self.directory = tempfile.mkdtemp(prefix="minesweeper_chunks_")
+            path = os.path.join(self.directory, "chunks")
+        self.database = dbm.open(path, "n")
+
+    def __contains__(self, key):
+        return self.encodeKey(key) in self.database
+
+    def encodeKey(self, key):
+        return "{},{}".format(*key)
+
+    def save(self, key, cells: np.ndarray):
+        revealed = (cells & CELL_REVEALED) != 0
+        flagged = (cells & CELL_FLAGGED) != 0
+        self.database[self.encodeKey(key)] = np.packbits(np.stack((revealed, flagged))).tobytes()
+
+    def load(self, key, cells: np.ndarray):
+        """Sets the stored bits on freshly generated cells"""
+        revealed, flagged = np.unpackbits(np.frombuffer(self.database[self.encodeKey(key)], dtype=np.uint8))[:2*cells.size].reshape(2, *cells.shape).astype(bool)
+        cells[revealed] |= CELL_REVEALED
+        cells[flagged] |= CELL_FLAGGED
+
+    def __len__(self):
+        return len(self.database)
+
+    def close(self):
+        self.database.close()
+        if self.directory is not None:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class ChunkedBoard:
+    """Endless game state addressed by global (x, y) coordinates, which may be negative. Cells are packed like Board.cells.
+    The 3x3 cells around (0, 0) never hold a mine, so the game can always start there"""
+    def __init__(self, seed, density=0.2, storePath=None):
+        if not minDensity <= density < 1:
+            raise ValueError("Endless mine density has to be in [{}, 1), got {}".format(minDensity, density))
+        self.seed = int(seed)
+        self.density = density
+        self.chunks = {} #(chunkX, chunkY) -> packed cells of that chunk
+        self.changed = set() #loaded chunks that differ from their generated state
+        self.store = ChunkStore(storePath)
+        self.viewport = None #(x, y, width, height) in cells, set by setViewport
+        self.flagAmount = 0
+        self.revealedSafeAmount = 0
+        self.exploded = False
+        self.useDelta = False
+        self.gameOverListeners = []
+
+    def __repr__(self):
+        return "ChunkedBoard(seed: {}, loaded chunks: {}, stored chunks: {}, revealed: {}, flagged: {})".format(self.seed, len(self.chunks), len(self.store), self.revealedSafeAmount, self.flagAmount)
+
+    @property
+    def won(self): #an endless board can't be cleared
+        return False
+
+    @property
+    def isOver(self):
+        return self.exploded
+
+    def onGameOver(self, callback):
+        """Registers callback(won) to be called once a mine is revealed. Fires immediately if that already happened."""
+        self.gameOverListeners.append(callback)
+        if self.isOver:
+            callback(False)
+
+    def setDeltaMode(self, useDelta):
+        self.useDelta = bool(useDelta)
+
+    def chunkMines(self, chunkX, chunkY) -> np.ndarray:
+        """Mines of a chunk, the same for every call"""
+        rng = np.random.default_rng([self.seed, chunkX & 0xffffffff, chunkY & 0xffffffff]) #the seed sequence needs non negative entries
+        mines = rng.random((chunkSize, chunkSize)) < self.density
+        startX, startY = -chunkX*chunkSize, -chunkY*chunkSize #local position of (0, 0)
+        mines[max(startX-1, 0):max(startX+2, 0), max(startY-1, 0):max(startY+2, 0)] = False
+        return mines
+
+    def chunk(self, chunkX, chunkY) -> np.ndarray:
+        """Packed cells of a chunk, generated or reloaded if needed. Counts include the mines of the surrounding chunks"""
+        key = (chunkX, chunkY)
+        if key not in self.chunks:
+            surrounding = np.block([[self.chunkMines(chunkX+xShift, chunkY+yShift) for yShift in range(-1, 2)] for xShift in range(-1, 2)])
+            cells = neighborCounts(surrounding)[chunkSize:2*chunkSize, chunkSize:2*chunkSize].copy() #a view would keep all 9 chunks alive
+            cells[surrounding[chunkSize:2*chunkSize, chunkSize:2*chunkSize]] |= CELL_MINE
+            if key in self.store:
+                self.store.load(key, cells)
+                self.changed.add(key)
+            self.chunks[key] = cells
+        return self.chunks[key]
+
+    def groupByChunk(self, xs: np.ndarray, ys: np.ndarray):
+        """Yields every touched chunk's cells with the positions of the given cells in it as (cells, positions, localX, localY)"""
+        chunkXs, chunkYs = xs // chunkSize, ys // chunkSize
+        keys, inverse = np.unique(np.stack((chunkXs, chunkYs)), axis=1, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        for i, (chunkX, chunkY) in enumerate(keys.T):
+            positions = np.flatnonzero(inverse == i)
+            yield (int(chunkX), int(chunkY)), positions, xs[positions] % chunkSize, ys[positions] % chunkSize
+
+    def cellValues(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        values = np.empty(xs.size, dtype=np.uint8)
+        for key, positions, localX, localY in self.groupByChunk(xs, ys):
+            values[positions] = self.chunk(*key)[localX, localY]
+        return values
+
+    def setBits(self, xs: np.ndarray, ys: np.ndarray, bits):
+        for key, positions, localX, localY in self.groupByChunk(xs, ys):
+            self.chunk(*key)[localX, localY] |= bits
+            self.changed.add(key)
+
+    def window(self, x, y, width, height) -> np.ndarray:
+        """Copy of the packed cells of a rectangle of the field, indexed [x, y] relative to its corner"""
+        cells = np.empty((width, height), dtype=np.uint8)
+        for chunkX in range(x // chunkSize, (x + width - 1) // chunkSize + 1):
+            for chunkY in range(y // chunkSize, (y + height - 1) // chunkSize + 1):
+                left, top = max(x, chunkX*chunkSize), max(y, chunkY*chunkSize)
+                right, bottom = min(x + width, (chunkX + 1)*chunkSize), min(y + height, (chunkY + 1)*chunkSize)
+                cells[left-x:right-x, top-y:bottom-y] = self.chunk(chunkX, chunkY)[left-chunkX*chunkSize:right-chunkX*chunkSize, top-chunkY*chunkSize:bottom-chunkY*chunkSize]
+        return cells
+
+    def displayWindow(self, x, y, width, height) -> tuple[np.ndarray, np.ndarray]:
+        """Packed cells of a rectangle plus the counts to display there, which have flagged neighbors subtracted in delta mode"""
+        padded = self.window(x-1, y-1, width+2, height+2) #the border holds the flags that reduce the counts at the edges
+        cells = padded[1:-1, 1:-1]
+        counts = (cells & CELL_COUNT_MASK).astype(np.int8)
+        if self.useDelta:
+            counts -= neighborCounts((padded & CELL_FLAGGED) != 0)[1:-1, 1:-1].astype(np.int8)
+        return cells, counts
+
+    def toggleFlag(self, x, y):
+        cells = self.chunk(x // chunkSize, y // chunkSize)
+        localX, localY = x % chunkSize, y % chunkSize
+        if cells[localX, localY] & CELL_REVEALED:
+            return
+        self.flagAmount += -1 if cells[localX, localY] & CELL_FLAGGED else 1
+        cells[localX, localY] ^= CELL_FLAGGED
+        self.changed.add((x // chunkSize, y // chunkSize))
+
+    def reveal(self, x, y) -> np.ndarray:
+        """Reveals a cell and, if it has no surrounding mines, the connected region of zeroes including its border, loading chunks as the region reaches them.
+        Returns the global coordinates of all newly revealed cells as rows of (x, y)"""
+        xs, ys = np.array([x]), np.array([y])
+        if self.cellValues(xs, ys)[0] & CELL_REVEALED:
+            return np.empty((0, 2), dtype=np.int64)
+        self.setBits(xs, ys, CELL_REVEALED)
+        if self.cellValues(xs, ys)[0] & CELL_MINE:
+            self.exploded = True
+            for callback in self.gameOverListeners:
+                callback(False)
+            return np.array([[x, y]])
+
+        newCells = [np.stack((xs, ys), axis=1)]
+        expandable = (self.cellValues(xs, ys) & (CELL_COUNT_MASK | CELL_MINE)) == 0
+        frontierX, frontierY = xs[expandable], ys[expandable]
+        shifts = np.array([(xShift, yShift) for xShift in range(-1, 2) for yShift in range(-1, 2) if xShift or yShift])
+        while frontierX.size:
+            neighbors = np.unique(np.stack(((frontierX[:, None] + shifts[:, 0]).reshape(-1), (frontierY[:, None] + shifts[:, 1]).reshape(-1)), axis=1), axis=0)
+            neighborX, neighborY = neighbors[:, 0], neighbors[:, 1]
+            values = self.cellValues(neighborX, neighborY)
+            hidden = (values & CELL_REVEALED) == 0
+            neighborX, neighborY, values = neighborX[hidden], neighborY[hidden], values[hidden]
+            self.setBits(neighborX, neighborY, CELL_REVEALED)
+            newCells.append(np.stack((neighborX, neighborY), axis=1))
+            expandable = (values & (CELL_COUNT_MASK | CELL_MINE)) == 0 #ignore delta and only expand cells without any surrounding mines, as the user may have placed some false flags
+            frontierX, frontierY = neighborX[expandable], neighborY[expandable]
+        newCells = np.concatenate(newCells)
+        self.revealedSafeAmount += len(newCells)
+        self.evict()
+        return newCells
+
+    def setViewport(self, x, y, width, height):
+        """Tells the board which cells are on screen, chunks far from them may be evicted"""
+        self.viewport = (x, y, width, height)
+        self.evict()
+
+    def evict(self):
+        """Drops the chunks furthest from the viewport once more than maxLoadedChunks are loaded. Changed chunks are written to the store first"""
+        if self.viewport is None or len(self.chunks) <= maxLoadedChunks:
+            return
+        x, y, width, height = self.viewport
+        left, top = x // chunkSize - chunkMargin, y // chunkSize - chunkMargin
+        right, bottom = (x + width - 1) // chunkSize + chunkMargin, (y + height - 1) // chunkSize + chunkMargin
+        distance = lambda key: max(left - key[0], key[0] - right, top - key[1], key[1] - bottom, 0) #in chunks, 0 inside the kept area
+        for key in sorted(self.chunks, key=distance, reverse=True)[:len(self.chunks) - maxLoadedChunks]:
+            if distance(key) == 0: #the viewport alone needs more chunks than the limit
+                break
+            if key in self.changed:
+                self.store.save(key, self.chunks[key])
+                self.changed.discard(key)
+            del self.chunks[key]
+
+    def close(self):
+        self.store.close()
@@ -0,0 +1,76 @@
+"""Board generation, the same seed always produces the same board."""
+import numpy as np
+from board import Board
+
+
+difficultyPresets = {"easy": ((10, 10), 6), "medium": ((17, 15), 30), "hard": ((30, 19), 60)} #field dimensions and mine amount
+
+
+class NoSafeStartError(ValueError):
+    """Raised when a board has no cell without surrounding mines to start on"""
+
+
+def neighborhoodMask(dimensions, cell) -> np.ndarray:
+    """Mask of a cell and its 3^d-1 surrounding cells"""
+    mask = np.zeros(dimensions, dtype=bool)
+    mask[tuple(slice(max(coordinate-1, 0), coordinate+2) for coordinate in cell)] = True
+    return mask
+
+
+def generateMines(dimensions, mineAmount, rng: np.random.Generator, excluded: np.ndarray = None) -> np.ndarray:
+    """Samples the mine positions without replacement in a single pass, never placing a mine on an excluded cell"""
+    cellAmount = int(np.prod(dimensions))
+    candidates = np.arange(cellAmount) if excluded is None else np.flatnonzero(~excluded)
+    if not 0 <= mineAmount <= candidates.size:
+        raise ValueError("Cannot place {} mines on {} free cells".format(mineAmount, candidates.size))
+    mines = np.zeros(cellAmount, dtype=bool)
+    mines[rng.choice(candidates, mineAmount, replace=False)] = True
+    return mines.reshape(dimensions)
+
+
+def generateMineBatch(dimensions, mineAmount, batchSize, rng: np.random.Generator) -> np.ndarray:
+    """Generates many independent mine layouts at once, shape (batchSize, *dimensions). Use board.neighborCounts to count all of them in one pass"""
+    cellAmount = int(np.prod(dimensions))
+    if not 0 <= mineAmount <= cellAmount:
+        raise ValueError("Cannot place {} mines on {} cells".format(mineAmount, cellAmount))
+    mines = np.zeros((batchSize, cellAmount), dtype=bool)
+    if mineAmount:
+        positions = np.argpartition(rng.random((batchSize, cellAmount)), mineAmount-1, axis=1)[:, :mineAmount] #the mineAmount smallest random keys of each row are a uniform sample without replacement
+        np.put_along_axis(mines, positions, True, axis=1)
+    return mines.reshape(batchSize, *dimensions)
+
+
+def findStart(board: Board, rng: np.random.Generator):
+    """Picks a random cell without any surrounding mines"""
+    zeroCells = np.flatnonzero((board.counts == 0) & ~board.mines)
+    if zeroCells.size == 0:
+        raise NoSafeStartError("Board has no cell without surrounding mines")
+    return tuple(int(i) for i in np.unravel_index(rng.choice(zeroCells), board.dimensions))
+
+
+def generateBoard(dimensions, mineAmount, seed=None, firstClick=None, safeStart=True) -> tuple[Board, tuple]:
+    """Creates a board and reveals its start cell, the same seed always produces the same board.
+    If firstClick is given, no mines are placed on or around it and it becomes the start. Otherwise, if safeStart is set, a random cell without surrounding mines is picked.
+    Returns the board and the start cell (None if safeStart is disabled and no firstClick is given)"""
+    dimensions = tuple(int(size) for size in dimensions)
+    rng = np.random.default_rng(seed)
+    excluded = None if firstClick is None else neighborhoodMask(dimensions, firstClick)
+    board = Board(generateMines(dimensions, mineAmount, rng, excluded))
+
+    if firstClick is not None:
+        start = tuple(firstClick)
+    elif safeStart:
+        start = findStart(board, rng)
+    else:
+        return board, None
+    board.reveal(*start)
+    return board, start
+
+
+def generateFallback(dimensions, mineAmount, seed=None) -> tuple[Board, tuple]:
+    """Like generateBoard, but starts without anything revealed if the board has no cell without surrounding mines.
+    The same seed always produces the same board either way"""
+    try:
+        return generateBoard(dimensions, mineAmount, seed)
+    except NoSafeStartError:
+        return generateBoard(dimensions, mineAmount, seed, safeStart=False)
@@ -1,275 +1,279 @@
 import pygame as pg
 from vectors_likeablejuniper import Vector
-import ctypes
-import random
+import functools
+import os
+import sys
 import time
-import json
+import numpy as np
+from chunks import ChunkedBoard
+from board import CELL_COUNT_MASK, CELL_FLAGGED, CELL_MINE, CELL_REVEALED, Board, BoardSlice, neighborIndices
+from generator import difficultyPresets, generateFallback
+from noguess import NoGuessGenerator
+from profiler import FrameProfiler, InstanceCounter
+from prefetch import Prefetcher
+from scores import ScoreStore
+from replay import ACTION_DELTA_OFF, ACTION_DELTA_ON, ACTION_FLAG, ACTION_REVEAL, Replay, appendReplay
+from renderer import STATE_HEAT_SHIFT, BoardRenderer, GlyphCache, TileCache, ViewportRenderer, cellAt, heatColor, heatStates
+from probability import ProbabilityWorker
+from solver import Frontier
+from widgets import DeltaButton, ExitButton, GenericLocationButton, InputField, MainMenuButton, Text, TimedModeButton, TimeText, convertTime
+import assets
 
 
-user32 = ctypes.windll.user32
-screensize = Vector(user32.GetSystemMetrics(0), user32.GetSystemMetrics(1))
-screencenter = 0.5 * screensize
-
 ### Parameters ###
 buttonScale = 1 #reduce this to increase amount of buttons that can be displayed without overflow, default: 1, range: (0, 1]
 useFullscreen = False #should the game be launched in fullscreen or not, default: False
 windowResizeFactor = 0.8 #in case fullscreen isn't used, how big, relative to the entire screen size, should the window be? default: 0.8, range: (0, 1]
+screenSize = None #(width, height) of the screen in pixels, None detects it, default: None
 deltaModeEnabled = True #whether or not placed flags should reduce adjacent cell's count by 1. Can be changed during runtime by button press, default: True
+useDirtyRendering = True #only redraw cells that changed and only update those parts of the window while ingame, default: True
+noGuessWorkers = 0 #amount of worker processes searching for boards that can be solved without guessing, 0 uses all but one CPU core, default: 0
+noGuessTimeout = 2 #seconds to search for a no-guess board before falling back to a normal one, default: 2
+usePrefetch = True #prepare the next board of every difficulty in the background so starting a game doesn't have to wait for it, default: True
+frameRate = 60 #maximum frames per second, 0 removes the cap, default: 60
+useIdleWait = True #sleep until the next input while nothing on screen is moving instead of rendering frames that look the same, default: True
+idleTimeout = 1000 #longest time in milliseconds to sleep without any input, default: 1000
+endlessMineDensity = 0.2 #share of cells holding a mine in endless mode, range: [0.12, 1), default: 0.2
+panSpeed = 20 #cells per second the field scrolls while an arrow key is held, in endless mode and on the game screen, default: 20
+maxCustomSize = 2000 #largest width and height the custom menu accepts, default: 2000
+maxCustomDepth = 100 #largest depth the custom menu accepts, boards deeper than 1 are 3D and shown one layer at a time (page up/down), default: 100
+zoomStep = 1.15 #zoom factor per mouse wheel step on the game screen, default: 1.15
+replayPath = "replays.bin" #file the replay of every finished game is appended to, relative to the folder of this file, see replay.py, None disables recording, default: "replays.bin"
+scorePath = "scores.bin" #append-only file every finished timed game is stored in, relative to the folder of this file, see scores.py, default: "scores.bin"
+profileTracePath = None #file to write the phase times of every frame to as CSV while the profiler overlay (P key) is shown, e.g. "trace.csv", default: None
 ### End Parameters ###
 
-pg.init()
-if useFullscreen:
-    windowSize = screensize
-    windowCenter = screencenter
-    screen = pg.display.set_mode((0, 0), pg.FULLSCREEN) #(0, 0) makes fullscreen window fit to screen size without being stretched
-else:
-    screen = pg.display.set_mode((windowSize := (screensize*windowResizeFactor)).components)
-    windowCenter = windowSize*0.5
+gameDirectory = os.path.dirname(os.path.abspath(__file__)) #like the Assets folder, data files are next to this file, so the game can be started from any working directory
 
-pg.display.set_caption("2D-Minesweeper")
-pg.display.set_icon(pg.image.load("Assets/mine.png"))
 
-pg.font.init()
-mainFont = pg.font.SysFont("Roboto", int(2/35*windowSize[0]), False, False)
-titleFont = pg.font.SysFont("Roboto", int(3/40*windowSize[0]), False, False)
-countFont = pg.font.SysFont("Roboto", int(1/35*windowSize[0]*buttonScale), False, False)
+def dataPath(path):
+    """Resolves a relative path of a data file against the game's folder, absolute paths are kept"""
+    return os.path.join(gameDirectory, path)
 
 
-def convertTime(seconds):
-    if seconds == "-":
-        return seconds
-    minutes = int(seconds // 60)
-    seconds  = round(seconds - minutes*60, 1)
-    return "{}:{}".format(minutes, seconds)
+def detectScreenSize() -> Vector:
+    """Size of the main screen in pixels, the screenSize parameter overrides it"""
+    if screenSize:
+        return Vector(*screenSize)
+    if sys.platform == "win32":
+        import ctypes
+        user32 = ctypes.windll.user32
+        return Vector(user32.GetSystemMetrics(0), user32.GetSystemMetrics(1))
+    pg.display.init()
+    return Vector(*pg.display.get_desktop_sizes()[0])
 
 
-class Text:
-    def __init__(self, center, font: pg.font.Font, text=None):
-        self.center = center
-        self.font = font
-        if text:
-            self.textObj = self.font.render(text, True, (0, 0, 0))
-            self.textRect = self.textObj.get_rect(center=self.center)
-    
-    def __call__(self, screen: pg.Surface, dynamicText=None):
-        if dynamicText:
-            textObj = self.font.render(dynamicText, True, (0, 0, 0))
-            textRect = textObj.get_rect(center=self.center)
-            screen.blit(textObj, textRect)
-        else:
-            screen.blit(self.textObj, self.textRect)
-
-
-class TimeText:
-    def __init__(self, center):
-        self.startTime = time.time()
-        self.lastPausedTime = self.startTime
-        self.paused = False
-        #prevent time text from moving around from recentering every call by setting position on initiate
-        textObj = mainFont.render(convertTime(0), True, (0, 0, 0))
-        textRect = textObj.get_rect(center=center)
-        self.position = textRect[:2]
-    
-    def __call__(self, screen: pg.Surface):
-        seconds = (self.lastPausedTime if self.paused else time.time()) - self.startTime
-        text = convertTime(seconds)
-        textObj = mainFont.render(text, True, (0, 0, 0))
-        screen.blit(textObj, self.position)
-
-    def restartClock(self):
-        self.startTime = time.time()
-        self.paused = False
-
-    def pause(self):
-        self.paused = True
-        self.lastPausedTime = time.time()
-    
-    def currentClock(self):
-        return (self.lastPausedTime if self.paused else time.time()) - self.startTime
+### Constants ###
+defaultButtonColors = [(23, 55, 83), (27, 67, 83), (33, 118, 156), (52, 119, 163), (39, 123, 179), (22, 130, 201)] #passive ground color, hovered ground color, clicked ground color, passive border color, hovered border color, clicked border color
+buttonColors = [(55, 74, 84), (81, 117, 135), (116, 176, 207), (186, 181, 255), (52, 207, 235), (173, 2, 119)] #passive color, hovered color, clicked color, revealed color, highlight color (hidden), highlight color (revealed)
+numberColors = [(0, 0, 0), (55, 41, 255), (0, 156, 18), (240, 24, 24), (195, 0, 230), (255, 215, 36), (0, 138, 207), (116, 32, 161), (252, 3, 161)]
+deltaButtonColors = defaultButtonColors
+mainMenuButtonColors = defaultButtonColors
+difficultyButtonColors = defaultButtonColors
+exitButtonColors = defaultButtonColors
+timedModeButtonColors = defaultButtonColors
+customModeButtonColors = defaultButtonColors
+mineCountColors = [(0, 0, 0), (191, 34, 34)]
+hintColors = [(40, 200, 90), (220, 50, 50), (240, 200, 40)] #safe cell, mine, best guess if nothing can be deduced
+backgroundColor = (100, 100, 100)
 
+LOC_MAIN_MENU = 0
+LOC_INGAME_UNTIMED = 1
+LOC_INGAME_TIMED = 2
+LOC_CUSTOM_MENU = 3
+LOC_ENDLESS = 4
+LOC_LAYERED = 5
+LOC_EXIT = -1 #will be set to -1 for one frame before quitting the game
 
-class Button:
-    def __init__(self, position: Vector, coordinates: Vector, dimensions: Vector, colors: list[list[int, int, int]], flagImage: pg.Surface, mineImage: pg.Surface):
-        self.position = position #position on the screen
-        self.coordinates = coordinates #position in the field
-        self.dimensions = dimensions
-        self.center = self.position + self.dimensions/2
-        self.colors = colors
-        self.count = 0
-        self.displayCount = 0
-        self.isMine = False
-        self.revealed = False
-        self.flagged = False
+DIFFICULTY_DEFAULT = 0
+#these are named for easy access to dictionary via dict[difficulty]
+DIFFICULTY_EASY = "easy"
+DIFFICULTY_MEDIUM = "medium"
+DIFFICULTY_HARD = "hard"
+DIFFICULTY_CUSTOM = "custom"
+difficultyList = (DIFFICULTY_EASY, DIFFICULTY_MEDIUM, DIFFICULTY_HARD, DIFFICULTY_CUSTOM)
+difficultyNames = {DIFFICULTY_EASY: "Easy", DIFFICULTY_MEDIUM: "Medium", DIFFICULTY_HARD: "Hard", DIFFICULTY_CUSTOM: "Custom"}
+difficultySettingDict = {iterDifficulty: (Vector(difficultyPresets[iterDifficulty][0]), difficultyPresets[iterDifficulty][1], False, iterDifficulty) for iterDifficulty in difficultyList[:-1]}
+difficultyButtonSpread = 0.2
 
-        self.flagImage = flagImage
-        self.flagRect = self.flagImage.get_rect()
-        self.flagRect.center = self.center
 
+def isIngame(virtualLocation):
+    return virtualLocation in (LOC_INGAME_UNTIMED, LOC_INGAME_TIMED)
+
+
+#everything sized relative to the window is set by openWindow, the worker processes started by the no-guess pool import this file under another name and never open one
+windowSize = windowCenter = None
+buttonSize = buttonSizeVector = buttonMargin = mineCountCenter = None
+mainFont = titleFont = mainGlyphs = None
+deltaModeButton = mainMenuButton = titleText = timeText = timedModeButton = noGuessModeButton = exitButton = None
+difficultySelectButtons = difficultyHighscoreTexts = None
+customModeButton = endlessModeButton = customModeTitle = customInputFields = customStartButton = customErrorText = None
+
+noGuessGenerator = NoGuessGenerator(noGuessWorkers or None) #worker processes are started on the first no-guess board
+frameProfiler = FrameProfiler(("events", "input", "cells", "widgets", "display"), tracePath=profileTracePath, counter=InstanceCounter(Vector))
+boardPrefetcher = None #started by main
+
+
+class Field:
+    """Places the cells of a board on the screen. Nothing is stored per cell, Buttons are only created for the cells that are drawn or interacted with.
+    replay records every action taken on the board"""
+    def __init__(self, board: Board, startPos: Vector, colors: list[list[int, int, int]], flagImage: pg.Surface, mineImage: pg.Surface, replay: Replay = None):
+        self.board = board
+        self.replay = replay
+        self.position = startPos #top left corner of the first cell
+        self.cellStep = buttonSize + buttonMargin
+        self.colors = colors
+        self.flagImage = flagImage
         self.mineImage = mineImage
-        self.mineRect = self.mineImage.get_rect()
-        self.mineRect.center = self.center - Vector([round(windowSize[0]/1500) for _ in range(2)]) #centering is approximately 1 pixel offset, reverse that        
+
+    def button(self, x, y) -> "Button":
+        return Button(self, x, y)
+
+    def record(self, action, index=None):
+        """Adds an action on the cell at index, or one without a cell, to the replay. Nothing is added once the game is over, the replay was saved then"""
+        if self.replay is not None and not self.board.isOver:
+            self.replay.record(action, -1 if index is None else index[0]*self.board.dimensions[1] + index[1])
+
+    def cellPosition(self, x, y) -> Vector:
+        return self.position + Vector(x, y)*self.cellStep
+
+    def visibleCells(self):
+        """Indices of all cells that are at least partly inside the window"""
+        width, height = self.board.dimensions
+        xRange, yRange = [range(max(int(-self.position[axis] // self.cellStep), 0), min(int((windowSize[axis] - self.position[axis]) // self.cellStep) + 1, size)) for axis, size in enumerate((width, height))]
+        return ((x, y) for x in xRange for y in yRange)
+
+
+class Button:
+    """View of a single cell of a Board, all game state is read from and written to the board and the screen position is computed from the index"""
+    def __init__(self, field: Field, x, y):
+        self.field = field
+        self.board = field.board
+        self.index = (x, y) #index into the board arrays
+        self.colors = field.colors
 
     def __repr__(self):
         return str("Button(revealed: {}, flagged: {}, isMine: {})".format(self.revealed, self.flagged, self.isMine))
+
+    @property
+    def position(self) -> Vector: #position on the screen
+        return self.field.cellPosition(*self.index)
+
+    @property
+    def coordinates(self) -> Vector: #position in the field
+        return Vector(self.index)
+
+    @property
+    def dimensions(self) -> Vector:
+        return buttonSizeVector
+
+    @property
+    def center(self) -> Vector:
+        return self.position + buttonSizeVector/2
+
+    @property
+    def isMine(self):
+        return bool(self.board.cells[self.index] & CELL_MINE)
+
+    @property
+    def count(self):
+        return int(self.board.cells[self.index] & CELL_COUNT_MASK)
+
+    @property
+    def displayCount(self):
+        return int(self.board.deltaCounts[self.index]) if self.board.useDelta else self.count
+
+    @property
+    def revealed(self):
+        return bool(self.board.cells[self.index] & CELL_REVEALED)
+
+    @property
+    def flagged(self):
+        return bool(self.board.cells[self.index] & CELL_FLAGGED)
     
-    def __call__(self, screen: pg.Surface, field, fieldDimensions, mouseData):
-        mousePos, islClick, isrClick, isNewClick = mouseData
-        isHovered = self.position < mousePos < self.position + self.dimensions
-        
-        currentColor = self.colors[3] if self.revealed else self.colors[int(isHovered) + int((islClick or isrClick) and isHovered)] #allows the button to assume three different colors based on whether its neutral, hovered or clicked
+    def draw(self, screen: pg.Surface, isHovered, isPressed):
+        currentColor = self.colors[3] if self.revealed else self.colors[int(isHovered) + int(isPressed and isHovered)] #allows the button to assume three different colors based on whether its neutral, hovered or clicked
         pg.draw.rect(screen, currentColor, self.position.components + self.dimensions.components)
         
         if self.flagged:
-            screen.blit(self.flagImage, self.flagRect)
+            screen.blit(self.field.flagImage, self.field.flagImage.get_rect(center=self.center.components))
         elif self.revealed:
             if self.isMine:
-                screen.blit(self.mineImage, self.mineRect)
+                imageOffset = round(windowSize[0]/1500) #centering is approximately 1 pixel offset, reverse that
+                screen.blit(self.field.mineImage, self.field.mineImage.get_rect(center=(self.center - Vector(imageOffset, imageOffset)).components))
             elif self.displayCount != 0:
-                renderedFont = countFont.render(str(self.displayCount), True, numberColors[self.displayCount%len(numberColors)])
+                renderedFont = tiles("board").digits[self.displayCount]
                 countRect = renderedFont.get_rect()
                 countRect.center = self.center
                 screen.blit(renderedFont, countRect)
 
-        if isHovered and isNewClick:
+    def handleInput(self, field, fieldDimensions, mouseData):
+        """Only called for the hovered cell"""
+        mousePos, islClick, isrClick, isNewClick = mouseData
+        if isNewClick and not self.board.isOver: #actions are recorded first, the game over listeners that save the replay may run inside of them
             if isrClick and not self.revealed:
-                self.flagged = bool((int(self.flagged) + 1) % 2)
+                self.field.record(ACTION_FLAG, self.index)
+                self.board.toggleFlag(*self.index)
             
             if islClick and not self.revealed and not self.flagged:
+                self.field.record(ACTION_REVEAL, self.index)
                 field = self.reveal(field, fieldDimensions)
             
-        return field, isHovered
+        return field
 
 
     def highlight_adjacent(self, field, screen, useDelta):
         pg.draw.rect(screen, self.colors[5], self.position.components + self.dimensions.components, 2)
-        for xShift in range(-1, 2):
-            for yShift in range(-1, 2):
-                targetCoords = self.coordinates + Vector(xShift, yShift)
-                if Vector(0, 0) <= targetCoords < fieldDimensions: #make sure coordinates are inside the field
-                    targetCell: Button = field[targetCoords[0]][targetCoords[1]]
-                    if not (targetCell.revealed or (targetCell.flagged and useDelta)): #only highlight if target isn't revealed and isn't flagged (logical simplification of "not A and not (B and x)" to "not (A or (B and x))")
-                        pg.draw.rect(screen, targetCell.colors[4], targetCell.position.components + targetCell.dimensions.components, 2)
+        height = self.board.dimensions[1]
+        flatIndex = self.index[0]*height + self.index[1]
+        for target in (flatIndex, *neighborIndices(flatIndex, self.board.dimensions)): #cells outside of the field are left out
+            targetCell: Button = field.button(*divmod(int(target), height))
+            if not (targetCell.revealed or (targetCell.flagged and useDelta)): #only highlight if target isn't revealed and isn't flagged (logical simplification of "not A and not (B and x)" to "not (A or (B and x))")
+                pg.draw.rect(screen, targetCell.colors[4], targetCell.position.components + targetCell.dimensions.components, 2)
 
 
     def reveal(self, field, fieldDimensions):
-        self.revealed = True
-        if self.count == 0: #ignore delta and only reveal if the cell actually has no mines surrounding it, as the user may have placed some false flags
-            for xShift in range(-1, 2):
-                for yShift in range(-1, 2):
-                    shiftVector = Vector(xShift, yShift)
-                    revealCoords = self.coordinates + shiftVector
-                    if Vector(0, 0) <= revealCoords < fieldDimensions: #make sure coordinates are inside the field
-                        targetButton: Button = field[revealCoords[0]][revealCoords[1]]
-                        if not targetButton.revealed:
-                            field = targetButton.reveal(field, fieldDimensions) #recursive call to reveal groups of zeroes
-        
+        self.board.reveal(*self.index)
         return field
 
 
-    def updateCount(self, field: list[list[list["Button"]]], fieldDimensions, useDelta):
-        self.count = 0
-        surroundingFlags = 0
-        for xShift in range(-1, 2):
-            for yShift in range(-1, 2):
-                shiftVector = Vector(xShift, yShift)
-                checkCoords = self.coordinates + shiftVector
-                if Vector(0, 0) <= checkCoords < fieldDimensions: #make sure coordinates are inside the field
-                        targetCell: Button = field[checkCoords[0]][checkCoords[1]]
-                        self.count += int(targetCell.isMine)
-                        surroundingFlags += int(targetCell.flagged)
-        self.displayCount = self.count - [0, surroundingFlags][int(useDelta)]
-
-
-class DeltaButton:
-    """Specifically for a button which has a toggleable function and displays whether or not its toggled"""
-    def __init__(self, center: Vector, dimensions: Vector, colors, text):
-        self.position = center - 0.5*dimensions
-        self.dimensions = dimensions
-        self.colors = colors
-        self.textObj = mainFont.render(text, True, (0, 0, 0))
-        textRect = self.textObj.get_rect(center=[center[0]-self.dimensions[0]*0.5, center[1]])
-        textRect.centerx -= textRect.width*0.5 + 10
-        self.textRect = textRect
-        self.crossRectScale = 0.6
-        self.crossRect = (self.position+self.dimensions*(1-self.crossRectScale)/2).components + (self.dimensions*self.crossRectScale).components
-
-    def __call__(self, screen: pg.Surface, mouseData, deltaModeEnabled):
-        mousePos, islClick, isrClick, isNewClick = mouseData
-        isHovered = self.position < mousePos < self.position + self.dimensions
-        isNewlClick = islClick and isNewClick
-
-        screen.blit(self.textObj, self.textRect)
-
-        pg.draw.rect(screen, self.colors[int(isHovered)+int(islClick and isHovered)], self.position.components+self.dimensions.components) #ground color
-        pg.draw.rect(screen, self.colors[2+int(isHovered)+int(islClick and isHovered)], self.position.components+self.dimensions.components, 3) #border color
-
-        if deltaModeEnabled:
-            pg.draw.line(screen, (161, 7, 2), self.crossRect[:2], (Vector(self.crossRect[:2])+self.dimensions*self.crossRectScale).components, 3)
-            pg.draw.line(screen, (161, 7, 2), (Vector(self.crossRect[:2])+Vector(self.dimensions[0]*self.crossRectScale, 0)).components, (Vector(self.crossRect[:2])+Vector(0, self.dimensions[0]*self.crossRectScale)).components, 3)
-
-        if isNewlClick and isHovered:
-            deltaModeEnabled = bool((int(deltaModeEnabled)+1) % 2)
-
-        return deltaModeEnabled
+def buildGame(difficultySettings, isNoGuess) -> tuple[Field, Board]:
+    """Generates a board for the difficulty with its start already revealed, plus the buttons displaying it"""
+    fieldDimensions = difficultySettings[0]
+    mineAmount = difficultySettings[1]
+    width, height = int(fieldDimensions[0]), int(fieldDimensions[1])
 
+    fieldStartPos = (windowSize - (Vector(fieldDimensions.components[:2])-Vector(1, 1))*(buttonSize+buttonMargin)) / 2 #where the top left corner of the field is placed
 
-class TimedModeButton:
-    """Specifically for a button which has a toggleable function and displays whether or not its toggled"""
-    def __init__(self, center: Vector, dimensions: Vector, colors, text):
-        self.position = center - 0.5*dimensions
-        self.dimensions = dimensions
-        self.colors = colors
-        self.textObj = mainFont.render(text, True, (0, 0, 0))
-        textRect = self.textObj.get_rect(center=[center[0]-self.dimensions[0]*0.5, center[1]])
-        textRect.centerx -= textRect.width*0.5 + 10
-        self.textRect = textRect
-        self.crossRectScale = 0.6
-        self.crossRect = (self.position+self.dimensions*(1-self.crossRectScale)/2).components + (self.dimensions*self.crossRectScale).components
-
-    def __call__(self, screen: pg.Surface, mouseData, isTimed):
-        mousePos, islClick, isrClick, isNewClick = mouseData
-        isHovered = self.position < mousePos < self.position + self.dimensions
-        isNewlClick = islClick and isNewClick
+    if isNoGuess:
+        board, start, _, seed = noGuessGenerator.generate((width, height), mineAmount, noGuessTimeout)
+    else:
+        seed = int(np.random.default_rng().integers(2**63)) #kept for the replay, which recreates the board from it
+        board, start = generateFallback((width, height), mineAmount, seed) #a field too crowded for a cell without surrounding mines starts without anything revealed
 
-        screen.blit(self.textObj, self.textRect)
+    flagImage = assets.scaledImage("flag.png", (int(buttonSize*0.7), int(buttonSize*0.7)))
+    mineImage = assets.scaledImage("mine.png", (int(buttonSize*0.9), int(buttonSize*0.9)))
+    return Field(board, fieldStartPos, buttonColors, flagImage, mineImage, Replay((width, height), mineAmount, seed)), board
 
-        pg.draw.rect(screen, self.colors[int(isHovered)+int(islClick and isHovered)], self.position.components+self.dimensions.components) #ground color
-        pg.draw.rect(screen, self.colors[2+int(isHovered)+int(islClick and isHovered)], self.position.components+self.dimensions.components, 3) #border color
 
-        if isTimed:
-            pg.draw.line(screen, (161, 7, 2), self.crossRect[:2], (Vector(self.crossRect[:2])+self.dimensions*self.crossRectScale).components, 3)
-            pg.draw.line(screen, (161, 7, 2), (Vector(self.crossRect[:2])+Vector(self.dimensions[0]*self.crossRectScale, 0)).components, (Vector(self.crossRect[:2])+Vector(0, self.dimensions[0]*self.crossRectScale)).components, 3)
+@functools.lru_cache(maxsize=None)
+def tiles(purpose) -> TileCache:
+    """Tile cache for purpose "board", "viewport" or "endless", built on the first game since the menus don't draw cells. Zooming rebuilds the tiles of the cameras, so they don't share them with the board"""
+    countFont = assets.font(1/35*windowSize[0]*buttonScale)
+    return TileCache(buttonColors, numberColors, countFont, assets.scaledImage("flag.png", (int(buttonSize*0.7), int(buttonSize*0.7))), assets.scaledImage("mine.png", (int(buttonSize*0.9), int(buttonSize*0.9))), round(windowSize[0]/1500), hintColors)
 
-        if isNewlClick and isHovered:
-            isTimed = bool((int(isTimed)+1) % 2)
 
-        return isTimed
-
-
-class MainMenuButton:
-    def __init__(self, center: Vector, dimensions: Vector, colors, icon: pg.Surface):
-        self.position = center - 0.5*dimensions
-        self.center = center
-        self.dimensions = dimensions
-        self.colors = colors
-        self.icon = pg.transform.scale(icon, self.dimensions*0.6)
-        self.iconRect = self.icon.get_rect()
-        self.iconRect.center = self.center
-    
-    def __call__(self, screen, mouseData, virtualLocation):
-        mousePos, islClick, isrClick, isNewClick = mouseData
-        isHovered = self.position < mousePos < self.position + self.dimensions
-        isNewlClick = islClick and isNewClick
-
-        pg.draw.rect(screen, self.colors[int(isHovered)+int(islClick and isHovered)], self.position.components+self.dimensions.components) #ground color
-        pg.draw.rect(screen, self.colors[2+int(isHovered)+int(islClick and isHovered)], self.position.components+self.dimensions.components, 3) #border color
-
-        screen.blit(self.icon, self.iconRect)
-
-        if isNewClick and isHovered:
-            virtualLocation = LOC_MAIN_MENU
-
-        return virtualLocation
+def startRecording(field: Field, board: Board):
+    """Called when a game is shown, its replay is saved once it is won or lost"""
+    field.replay.restartClock()
+    if replayPath is not None:
+        isSaved = False
+        def saveReplay(won):
+            nonlocal isSaved
+            if not isSaved: #exactly one replay per game, even if the end is reported again
+                isSaved = True
+                appendReplay(dataPath(replayPath), field.replay)
+        board.onGameOver(saveReplay)
 
 
 class DifficultySelectButton:
@@ -282,303 +286,504 @@ class DifficultySelectButton:
         self.textRect = self.textObj.get_rect(center=self.center)
         self.difficultySettings = difficultySettings
     
-    def __call__(self, screen: pg.Surface, field, fieldDimensions: Vector, mineAmount, mouseData, virtualLocation, currentDifficulty):
-        mousePos, islClick, isrClick, isNewClick = mouseData
-        isHovered = self.position < mousePos < self.position + self.dimensions
-        isNewlClick = islClick and isNewClick
-
-        pg.draw.rect(screen, self.colors[int(isHovered)+int(islClick and isHovered)], self.position.components+self.dimensions.components) #ground color
-        pg.draw.rect(screen, self.colors[2+int(isHovered)+int(islClick and isHovered)], self.position.components+self.dimensions.components, 3) #border color
-        screen.blit(self.textObj, self.textRect)
-
-        if isNewlClick and isHovered:
-            fieldDimensions = self.difficultySettings[0]
-            mineAmount = self.difficultySettings[1]
-
-            fieldStartPos = (windowSize - (Vector(fieldDimensions.components[:2])-Vector(1, 1))*(buttonSize+buttonMargin)) / 2 #where the top left corner of the field is placed, will be set again once fieldDimensions is defined after selecting difficulty
-
-            field: list[list[Button]] = [[Button(fieldStartPos + Vector(x, y)*(buttonSize+buttonMargin), Vector(x, y), buttonSizeVector, buttonColors, flagImage, mineImage) for y in range(fieldDimensions[1])] for x in range(fieldDimensions[0])]
-
-            #randomly distribute the mines in the field
-            for _ in range(mineAmount):
-                while field[(xCoord := random.randint(0, fieldDimensions[0]-1))][(yCoord := random.randint(0, fieldDimensions[1]-1))].isMine:
-                    continue
-                field[xCoord][yCoord].isMine = True
-            
-            for xi, x in enumerate(field):
-                for yi, y in enumerate(x):
-                    y.updateCount(field, fieldDimensions, False)
-
-            #find a suitable start
-            while field[(xCoord := random.randint(0, fieldDimensions[0]-1))][(yCoord := random.randint(0, fieldDimensions[1]-1))].count != 0:
-                continue
-            field = field[xCoord][yCoord].reveal(field, fieldDimensions)
-        
-
-
-            return field, self.difficultySettings[0], self.difficultySettings[1], [LOC_INGAME_UNTIMED, LOC_INGAME_TIMED][self.difficultySettings[2]], self.difficultySettings[3]
-
-        return field, fieldDimensions, mineAmount, virtualLocation, currentDifficulty
-
-
-class ExitButton:
-    def __init__(self, center: Vector, dimensions: Vector, colors):
-        self.position = center - 0.5*dimensions
-        self.center = center
-        self.dimensions = dimensions
-        self.colors = colors
-        self.textObj = mainFont.render("Exit", True, (0, 0, 0))
-        self.textRect = self.textObj.get_rect(center=self.center)
-    
-    def __call__(self, screen: pg.Surface, mouseData, virtualLocation):
+    def __call__(self, screen: pg.Surface, field, board, fieldDimensions: Vector, mineAmount, mouseData, virtualLocation, currentDifficulty, isNoGuess):
         mousePos, islClick, isrClick, isNewClick = mouseData
         isHovered = self.position < mousePos < self.position + self.dimensions
         isNewlClick = islClick and isNewClick
 
         pg.draw.rect(screen, self.colors[int(isHovered)+int(islClick and isHovered)], self.position.components+self.dimensions.components) #ground color
         pg.draw.rect(screen, self.colors[2+int(isHovered)+int(islClick and isHovered)], self.position.components+self.dimensions.components, 3) #border color
-
         screen.blit(self.textObj, self.textRect)
 
         if isNewlClick and isHovered:
-            return LOC_EXIT
-
-        return virtualLocation
-
-
-class GenericLocationButton:
-    def __init__(self, center: Vector, dimensions: Vector, colors, text, targetLocation):
-        self.position = center - 0.5*dimensions
-        self.center = center
-        self.dimensions = dimensions
-        self.colors = colors
-        self.textObj = mainFont.render(text, True, (0, 0, 0))
-        self.textRect = self.textObj.get_rect(center=self.center)
-        self.targetLocation = targetLocation
-    
-    def __call__(self, screen: pg.Surface, mouseData, virtualLocation):
-        mousePos, islClick, isrClick, isNewClick = mouseData
-        isHovered = self.position < mousePos < self.position + self.dimensions
-        isNewlClick = islClick and isNewClick
-
-        pg.draw.rect(screen, self.colors[int(isHovered)+int(islClick and isHovered)], self.position.components+self.dimensions.components) #ground color
-        pg.draw.rect(screen, self.colors[2+int(isHovered)+int(islClick and isHovered)], self.position.components+self.dimensions.components, 3) #border color
-        screen.blit(self.textObj, self.textRect)
-
-        if isNewlClick and isHovered:
-            return self.targetLocation
-
-        return virtualLocation
-
-
-class InputField:
-    def __init__(self, center: Vector, dimensions: Vector, text, ):
-        self.center = center
-        self.dimensions = dimensions
-        self.position = self.center - 0.5*self.dimensions
-        self.text = text
-
-
-def checkWin(field: list[list[list[Button]]], cellAmount, mineAmount) -> tuple[bool, bool]:
-    """Returns tuple in format (bool, bool). The first bool indicates whether or not the game is won, the second whether or not the clock should be stopped."""
-    revealedCount = 0
-    for xi, x in enumerate(field):
-        for yi, y in enumerate(x):
-            if y.revealed:
-                revealedCount += 1
-                if y.isMine: return False, True #if a mine has been uncovered, you cannot win the game anymore but the timer should be paused
-    
-    if revealedCount == cellAmount-mineAmount: #if all non-mine cells have been revealed
-        return True, True
-    
-    return False, False
-
-
-def renderIngameFrame(field: list[list[Button]], fieldDimensions: Vector, screen: pg.Surface, mouseData: tuple[tuple, bool, bool, bool], deltaModeButton: DeltaButton, deltaModeEnabled: bool, mineData: tuple[int, Vector, list], mainMenuButton: MainMenuButton, virtualLocation: int, difficulty: str, highscores: dict[float, float, float]):
+            if usePrefetch:
+                field, board = boardPrefetcher.take((self.difficultySettings[3], isNoGuess))
+            else:
+                field, board = buildGame(self.difficultySettings, isNoGuess)
+            return field, board, self.difficultySettings[0], self.difficultySettings[1], [LOC_INGAME_UNTIMED, LOC_INGAME_TIMED][self.difficultySettings[2]], self.difficultySettings[3]
+
+        return field, board, fieldDimensions, mineAmount, virtualLocation, currentDifficulty
+
+
+def scoreRecorder(scoreStore: ScoreStore, difficulty):
+    """Game over listener of a timed game. Every finished timed game is stored right away, so a crash later on doesn't lose it,
+    and only once with its first result"""
+    isRecorded = False
+    def recordScore(won):
+        nonlocal isRecorded
+        if not isRecorded:
+            isRecorded = True
+            scoreStore.add(difficulty, timeText.currentClock(), won)
+    return recordScore
+
+
+def restoreArea(screen: pg.Surface, rect: pg.Rect, boardRenderer: BoardRenderer):
+    """Clears an area of the screen back to the background and the cached field so widgets can be redrawn on top of it"""
+    screen.fill(backgroundColor, rect)
+    overlap = rect.clip(boardRenderer.screenRect())
+    if overlap:
+        screen.blit(boardRenderer.surface, overlap, overlap.move(-boardRenderer.origin[0], -boardRenderer.origin[1]))
+
+
+def requestHint(board: Board):
+    """Returns the cells that are certainly safe, certainly mines and, only if nothing can be deduced, the best guess as sets of flat indices, plus the board state they belong to"""
+    frontier = Frontier(board)
+    safe, mines = frontier.deduce()
+    guess = set() if (safe or mines or board.isOver) else {frontier.guess(board)} - {None} #None if every hidden cell is flagged
+    return safe, mines, guess, (board, board.revealedSafeAmount, board.flagAmount)
+
+
+def moveCamera(viewRenderer: ViewportRenderer, cameraInput: tuple[int, tuple], mousePos, frameTime):
+    """Pans while an arrow key is held or the middle mouse button drags, cameraInput holds the mouse wheel steps and the drag distance of this frame"""
+    wheelSteps, drag = cameraInput
+    pressedKeys = pg.key.get_pressed()
+    direction = [pressedKeys[positive] - pressedKeys[negative] for positive, negative in ((pg.K_RIGHT, pg.K_LEFT), (pg.K_DOWN, pg.K_UP))]
+    distance = panSpeed*viewRenderer.cellStep*min(frameTime, 0.1) #a long frame doesn't jump the camera
+    viewRenderer.pan(direction[0]*distance - drag[0], direction[1]*distance - drag[1]) #dragging moves the field along with the mouse
+    if wheelSteps:
+        viewRenderer.zoomAt(zoomStep**wheelSteps, mousePos)
+
+
+def renderIngameFrame(field: Field, board: Board, fieldDimensions: Vector, screen: pg.Surface, mouseData: tuple[tuple, bool, bool, bool], deltaModeButton: DeltaButton, deltaModeEnabled: bool, mineData: tuple[int, Vector, list], mainMenuButton: MainMenuButton, virtualLocation: int, boardRenderer: BoardRenderer, hintData, viewRenderer: ViewportRenderer, cameraInput, frameTime, heatmap=None):
+    """Boards that don't fit into the window, or once the camera was moved, are drawn through viewRenderer.
+    heatmap holds the mine probability of every cell by flat index while the overlay is shown.
+    Returns the rects of the screen that need to be updated as the last value, None if the whole screen has to be updated"""
     mineAmount, mineCountCenter, mineCountColors = mineData
 
-    hoveredCoords = None
-    flagCount = 0
-    for xi, x in enumerate(field):
-        for yi, y in enumerate(x):
-            if y.flagged:
-                flagCount += 1
-            field, isHovered = y(screen, field, fieldDimensions, mouseData)
-            y.updateCount(field, fieldDimensions, deltaModeEnabled)
-            if isHovered:
-                hoveredCoords = Vector(xi, yi)
-    
-    winData = checkWin(field, fieldDimensions[0]*fieldDimensions[1], mineAmount)
-
-    if winData[1] and not timeText.paused:
-        timeText.pause()
-    
-    if winData[0] and virtualLocation == LOC_INGAME_TIMED:
-        if timeText.currentClock() < highscores[difficulty] or (highscores[difficulty] == -1): #if no highscore has been set yet, set it to the current time
-            highscores[difficulty] = timeText.currentClock()
-
-    if hoveredCoords:
-        field[hoveredCoords[0]][hoveredCoords[1]].highlight_adjacent(field, screen, deltaModeEnabled)
+    if board.useDelta != deltaModeEnabled: #delta mode was toggled since the last frame
+        board.setDeltaMode(deltaModeEnabled)
+        field.record(ACTION_DELTA_ON if deltaModeEnabled else ACTION_DELTA_OFF)
+
+    if viewRenderer is None or viewRenderer.board is not board:
+        viewRenderer = ViewportRenderer(board, screen.get_rect(), buttonSize, buttonMargin, tiles("viewport"), (field.position*-1).components, board.dimensions) #starts out showing the field where the fixed layout puts it
+    moveCamera(viewRenderer, cameraInput, mouseData[0], frameTime)
+    useViewport = viewRenderer.isMoved or min(field.position.components) < 0 #the field is centered, so it overflows on both sides at once
+
+    if useViewport:
+        hoveredCoords = None if viewRenderer.isOverview else viewRenderer.cellAt(mouseData[0]) #cells are too small to aim at in the overview
+    else:
+        hoveredCoords = cellAt(mouseData[0], field.position, buttonSize, buttonMargin, board.dimensions) #the first cell sits at the field's start position
+    if hoveredCoords is not None:
+        field = field.button(*hoveredCoords).handleInput(field, fieldDimensions, mouseData)
+    if hintData and hintData[3] != (board, board.revealedSafeAmount, board.flagAmount): #hints are outdated once the board changed
+        hintData = None
+    frameProfiler.mark("input")
+
+    updateRects = None
+    if useViewport:
+        screen.fill(backgroundColor) #the main loop leaves the previous frame on screen for the dirty renderer
+        viewRenderer(screen, hoveredCoords, mouseData[1] or mouseData[2], hintData[:3] if hintData else None, heatmap)
+        frameProfiler.mark("cells")
+    elif useDirtyRendering:
+        if boardRenderer is None or boardRenderer.board is not board:
+            boardRenderer = BoardRenderer(board, field.position, buttonSize, buttonMargin, tiles("board"), backgroundColor)
+        updateRects = boardRenderer(screen, hoveredCoords, mouseData[1] or mouseData[2], hintData[:3] if hintData else None, heatmap)
+        frameProfiler.mark("cells")
+
+        #widgets are redrawn every frame on top of a restored copy of their area
+        hudRects = [pg.Rect(0, 0, windowSize[0], windowSize[1]/5)]
+        if virtualLocation == LOC_INGAME_TIMED:
+            hudRects.append(pg.Rect(0, windowSize[1]*0.8, windowSize[0], windowSize[1]*0.2))
+        for rect in hudRects:
+            restoreArea(screen, rect, boardRenderer)
+        updateRects += hudRects
+    else:
+        for x, y in field.visibleCells():
+            field.button(x, y).draw(screen, (x, y) == hoveredCoords, mouseData[1] or mouseData[2])
+
+        if hoveredCoords is not None:
+            field.button(*hoveredCoords).highlight_adjacent(field, screen, deltaModeEnabled)
+
+        if heatmap is not None:
+            heatLevels = heatStates(heatmap) >> STATE_HEAT_SHIFT
+            heatCells = np.flatnonzero(heatLevels) #revealed cells and cells without a tint are skipped in numpy, not one by one
+            for cell, heatLevel in zip(heatCells.tolist(), heatLevels[heatCells].tolist()):
+                heatButton: Button = field.button(*divmod(cell, board.dimensions[1]))
+                pg.draw.rect(screen, heatColor(hintColors, heatLevel), pg.Rect(heatButton.position.components + heatButton.dimensions.components).inflate(-buttonSize*0.6, -buttonSize*0.6))
+
+        if hintData:
+            for hintColor, cells in zip(hintColors, hintData[:3]):
+                for cell in cells:
+                    hintedButton: Button = field.button(*divmod(cell, board.dimensions[1]))
+                    pg.draw.rect(screen, hintColor, pg.Rect(hintedButton.position.components + hintedButton.dimensions.components).inflate(-6, -6), 2)
+        frameProfiler.mark("cells")
+    flagCount = board.flagAmount
 
     deltaModeEnabled = deltaModeButton(screen, mouseData, deltaModeEnabled)
     virtualLocation = mainMenuButton(screen, mouseData, virtualLocation)
     
-    mineCountRender = mainFont.render("Mines left: {}".format(mineAmount-flagCount), True, mineCountColors[int(flagCount>mineAmount)])
-    mineCountRect = mineCountRender.get_rect(center=mineCountCenter)
-    screen.blit(mineCountRender, mineCountRect)
+    mainGlyphs(screen, "Mines left: {}".format(mineAmount-flagCount), mineCountColors[int(flagCount>mineAmount)], center=mineCountCenter)
 
     if virtualLocation == LOC_INGAME_TIMED:
         timeText(screen)
 
-    return virtualLocation, field, deltaModeEnabled, highscores
+    return virtualLocation, field, board, deltaModeEnabled, boardRenderer, hintData, viewRenderer, updateRects
 
 
-def renderMainMenuFrame(screen: pg.Surface, mouseData: tuple[tuple, bool, bool, bool], isTimed, highscores):
+def renderMainMenuFrame(screen: pg.Surface, mouseData: tuple[tuple, bool, bool, bool], isTimed, isNoGuess, scoreStore: ScoreStore):
 
     virtualLocation = LOC_MAIN_MENU
 
     difficulty = DIFFICULTY_DEFAULT #when difficulty changes, this will not be called again before moving into the game
 
-    field = fieldDimensions = mineAmount = None
+    field = board = fieldDimensions = mineAmount = None
 
     titleText(screen)
 
     for i, iterDifficulty in enumerate(difficultyList[:-1]):
-        field, fieldDimensions, mineAmount, virtualLocation, difficulty = difficultySelectButtons[i](screen, field, fieldDimensions, mineAmount, mouseData, virtualLocation, difficulty)
-        difficultyHighscoreTexts[i](screen, convertTime(highscores[iterDifficulty] if highscores[iterDifficulty] > 0 else "-"))
+        field, board, fieldDimensions, mineAmount, virtualLocation, difficulty = difficultySelectButtons[i](screen, field, board, fieldDimensions, mineAmount, mouseData, virtualLocation, difficulty, isNoGuess)
+        bestTime = scoreStore.best(iterDifficulty)
+        difficultyHighscoreTexts[i](screen, convertTime(bestTime if bestTime is not None else "-"))
     
     isTimed = timedModeButton(screen, mouseData, isTimed)
+    if (isNoGuess := noGuessModeButton(screen, mouseData, isNoGuess)) and usePrefetch:
+        for iterDifficulty in difficultyList[:-1]:
+            boardPrefetcher.prefetch((iterDifficulty, True)) #does nothing if the board is already prepared
 
     if virtualLocation > 0: #if a new difficulty has been selected, reset the time
         if isTimed:
             virtualLocation = LOC_INGAME_TIMED
             timeText.restartClock()
+        startRecording(field, board)
+        board.onGameOver(lambda won: timeText.pause()) #winning or losing stops the clock
+        if isTimed:
+            board.onGameOver(scoreRecorder(scoreStore, difficulty))
     
     virtualLocation = customModeButton(screen, mouseData, virtualLocation)
+    virtualLocation = endlessModeButton(screen, mouseData, virtualLocation)
 
     virtualLocation = exitButton(screen, mouseData, virtualLocation)
 
-    return virtualLocation, field, fieldDimensions, isTimed, mineAmount, difficulty
+    return virtualLocation, field, board, fieldDimensions, isTimed, isNoGuess, mineAmount, difficulty
 
 
-def renderCustomMenuFrame(screen, mouseData):
-    virtualLocation = LOC_CUSTOM_MENU
-    field = fieldDimensions = mineAmount = None
+def renderEndlessFrame(screen: pg.Surface, mouseData: tuple[tuple, bool, bool, bool], endlessRenderer: ViewportRenderer, deltaModeEnabled: bool, cameraInput, frameTime):
+    """Starts a new endless board if endlessRenderer is None. Returns the location, the renderer (holding the board and the camera) and the delta mode"""
+    virtualLocation = LOC_ENDLESS
+    if endlessRenderer is None:
+        board = ChunkedBoard(np.random.default_rng().integers(2**63), endlessMineDensity)
+        board.reveal(0, 0) #no mines are placed around the origin
+        endlessRenderer = ViewportRenderer(board, pg.Rect(0, windowSize[1]/5, windowSize[0], windowSize[1]*0.8), buttonSize, buttonMargin, tiles("endless"))
+        endlessRenderer.centerOn(0, 0)
+    board: ChunkedBoard = endlessRenderer.board
+    if board.useDelta != deltaModeEnabled:
+        board.setDeltaMode(deltaModeEnabled)
 
-    customModeTitle(screen)
+    moveCamera(endlessRenderer, cameraInput, mouseData[0], frameTime)
+
+    mousePos, islClick, isrClick, isNewClick = mouseData
+    hoveredCoords = endlessRenderer.cellAt(mousePos)
+    if hoveredCoords is not None and isNewClick and not board.isOver:
+        if isrClick:
+            board.toggleFlag(*hoveredCoords)
+        elif islClick and not board.window(*hoveredCoords, 1, 1)[0, 0] & CELL_FLAGGED:
+            board.reveal(*hoveredCoords)
+    frameProfiler.mark("input")
 
+    endlessRenderer(screen, hoveredCoords, islClick or isrClick)
+    frameProfiler.mark("cells")
+
+    deltaModeEnabled = deltaModeButton(screen, mouseData, deltaModeEnabled)
     virtualLocation = mainMenuButton(screen, mouseData, virtualLocation)
+    mainGlyphs(screen, "Revealed: {}".format(board.revealedSafeAmount), mineCountColors[int(board.isOver)], center=mineCountCenter)
 
-    return virtualLocation, field, fieldDimensions, mineAmount
+    return virtualLocation, endlessRenderer, deltaModeEnabled
 
 
-buttonSize = min(windowSize)/(30/buttonScale)
-buttonSizeVector = Vector(buttonSize for _ in range(2)) #buttons are always square
-buttonMargin = windowSize[0]/(300/buttonScale)
-fieldDimensions = Vector(5, 15)
-fieldStartPos = (windowSize - (Vector(fieldDimensions.components[:2])-Vector(1, 1))*(buttonSize+buttonMargin)) / 2 #where the top left corner of the field is placed, will be set again once fieldDimensions is defined after selecting difficulty
-mineCountCenter = Vector(windowCenter[0], windowSize[1]/10)
+def renderLayeredFrame(screen: pg.Surface, mouseData: tuple[tuple, bool, bool, bool], board: BoardSlice, layeredRenderer: ViewportRenderer, deltaModeEnabled: bool, cameraInput, frameTime, layerStep):
+    """Plays a 3D board one layer at a time, layerStep moves to a deeper (positive) or shallower layer. Creates the renderer if layeredRenderer is None.
+    Returns the location, the renderer and the delta mode"""
+    virtualLocation = LOC_LAYERED
+    if layeredRenderer is None:
+        layeredRenderer = ViewportRenderer(board, pg.Rect(0, windowSize[1]/5, windowSize[0], windowSize[1]*0.8), buttonSize, buttonMargin, tiles("viewport"), bounds=board.dimensions)
+        layeredRenderer.centerOn(board.dimensions[0]/2, board.dimensions[1]/2)
+    if board.useDelta != deltaModeEnabled:
+        board.setDeltaMode(deltaModeEnabled)
+    if layerStep:
+        board.select(board.depth[0] + layerStep)
 
-defaultButtonColors = [(23, 55, 83), (27, 67, 83), (33, 118, 156), (52, 119, 163), (39, 123, 179), (22, 130, 201)] #passive ground color, hovered ground color, clicked ground color, passive border color, hovered border color, clicked border color
-buttonColors = [(55, 74, 84), (81, 117, 135), (116, 176, 207), (186, 181, 255), (52, 207, 235), (173, 2, 119)] #passive color, hovered color, clicked color, revealed color, highlight color (hidden), highlight color (revealed)
-numberColors = [(0, 0, 0), (55, 41, 255), (0, 156, 18), (240, 24, 24), (195, 0, 230), (255, 215, 36), (0, 138, 207), (116, 32, 161), (252, 3, 161)]
-deltaButtonColors = defaultButtonColors
-mainMenuButtonColors = defaultButtonColors
-difficultyButtonColors = defaultButtonColors
-exitButtonColors = defaultButtonColors
-timedModeButtonColors = defaultButtonColors
-customModeButtonColors = defaultButtonColors
-mineCountColors = [(0, 0, 0), (191, 34, 34)]
+    moveCamera(layeredRenderer, cameraInput, mouseData[0], frameTime)
 
-deltaModeButton = DeltaButton(Vector(windowSize[0]-buttonSize*5, windowSize[1]/10), Vector(max(windowSize[0]/24, 20) for _ in range(2)), deltaButtonColors, "Δ")
-mainMenuButton = MainMenuButton(Vector(buttonSize*5, windowSize[1]/10), Vector(max(windowSize[0]/24, 20) for _ in range(2)), mainMenuButtonColors, pg.image.load("Assets/back_arrow.png"))
+    mousePos, islClick, isrClick, isNewClick = mouseData
+    hoveredCoords = None if layeredRenderer.isOverview else layeredRenderer.cellAt(mousePos) #like in the game, cells are too small to aim at in the overview
+    if hoveredCoords is not None and isNewClick and not board.isOver:
+        if isrClick:
+            board.toggleFlag(*hoveredCoords)
+        elif islClick and not board.cells[hoveredCoords] & CELL_FLAGGED:
+            board.reveal(*hoveredCoords)
+    frameProfiler.mark("input")
 
-titleText = Text(Vector(windowCenter[0], windowSize[1]/7), titleFont, "3D Minesweeper")
-timeText = TimeText(Vector(windowSize[0]*0.5, windowSize[1]*0.9))
-timedModeButton = TimedModeButton(Vector(windowSize[0]-buttonSize*5, windowSize[1]/10), Vector(max(windowSize[0]/24, 20) for _ in range(2)), timedModeButtonColors, "Timed:")
+    layeredRenderer(screen, hoveredCoords, islClick or isrClick)
+    frameProfiler.mark("cells")
 
-with open("highscores.json", "r") as f:
-    highscores = json.load(f)
+    deltaModeEnabled = deltaModeButton(screen, mouseData, deltaModeEnabled)
+    virtualLocation = mainMenuButton(screen, mouseData, virtualLocation)
+    mainGlyphs(screen, "Layer {}/{}  Mines left: {}".format(board.depth[0] + 1, board.board.dimensions[2], board.mineAmount - board.flagAmount), mineCountColors[int(board.isOver and not board.won)], center=mineCountCenter)
 
-DIFFICULTY_DEFAULT = 0
-#these are named for easy access to dictionary via dict[difficulty]
-DIFFICULTY_EASY = "easy"
-DIFFICULTY_MEDIUM = "medium"
-DIFFICULTY_HARD = "hard"
-DIFFICULTY_CUSTOM = "custom"
-difficultyList = (DIFFICULTY_EASY, DIFFICULTY_MEDIUM, DIFFICULTY_HARD, DIFFICULTY_CUSTOM)
-difficultyNames = {DIFFICULTY_EASY: "Easy", DIFFICULTY_MEDIUM: "Medium", DIFFICULTY_HARD: "Hard", DIFFICULTY_CUSTOM: "Custom"}
-difficultySettingDict = {DIFFICULTY_EASY: (Vector(10, 10), 6, False, DIFFICULTY_EASY), DIFFICULTY_MEDIUM: (Vector(17, 15), 30, False, DIFFICULTY_MEDIUM), DIFFICULTY_HARD: (Vector(30, 19), 60, False, DIFFICULTY_HARD)}
-difficulty = DIFFICULTY_DEFAULT
+    return virtualLocation, layeredRenderer, deltaModeEnabled
 
-LOC_MAIN_MENU = 0
-LOC_INGAME_UNTIMED = 1
-LOC_INGAME_TIMED = 2
-LOC_CUSTOM_MENU = 3
-LOC_EXIT = -1 #will be set to -1 for one frame before quitting the game
-virtualLocation = LOC_MAIN_MENU
-isIngame = lambda virtualLocation: virtualLocation in (LOC_INGAME_UNTIMED, LOC_INGAME_TIMED)
-isTimed = False
 
-difficultyButtonSpread = 0.2
-difficultyButtonOffset = Vector(0, windowSize[1]*0.1)
-highscoreDisplayOffset = Vector(windowSize[0]/6+windowSize[0]/12, 0)
-difficultySelectButtons: list[DifficultySelectButton] = []
-difficultyHighscoreTexts: list[Text] = []
-for i, iterDifficulty in enumerate(difficultyList[:-1]):
-    difficultySelectButtons.append(DifficultySelectButton(difficultyButtonOffset + windowCenter + Vector(0, windowSize[1])*(i-1)*difficultyButtonSpread, Vector(windowSize[0]/6, windowSize[1]/10), difficultyButtonColors, difficultyNames[iterDifficulty], difficultySettingDict[iterDifficulty]))
-    difficultyHighscoreTexts.append(Text(difficultyButtonOffset + windowCenter + Vector(0, windowSize[1])*(i-1)*difficultyButtonSpread+highscoreDisplayOffset, mainFont))
+def customSettingsError(width, height, depth, mineAmount):
+    """Returns why the entered custom settings can't be played, None if they are fine"""
+    if not (1 <= width <= maxCustomSize and 1 <= height <= maxCustomSize):
+        return "Width and height must be 1 to {}".format(maxCustomSize)
+    if not 1 <= depth <= maxCustomDepth:
+        return "Depth must be 1 to {}".format(maxCustomDepth)
+    if depth > 1 and width*height*depth > maxCustomSize**2:
+        return "3D boards hold at most {} cells".format(maxCustomSize**2)
+    if mineAmount >= width*height*depth:
+        return "At most {} mines fit".format(width*height*depth - 1)
+    return None
+
 
-customModeButton = GenericLocationButton(Vector(buttonSize*8, 17*windowSize[1]/20), Vector(windowSize[0]/6, windowSize[1]/10), customModeButtonColors, "Custom", LOC_CUSTOM_MENU)
-customModeTitle = Text(Vector(windowCenter[0], windowSize[1]/9), titleFont, "Custom Mode")
+def renderCustomMenuFrame(screen, mouseData, events, customError):
+    """customError is the message shown for the last invalid start, it stays until the next start attempt"""
+    virtualLocation = LOC_CUSTOM_MENU
+    field = board = fieldDimensions = mineAmount = None
 
-exitButton = ExitButton(Vector(windowSize[0]/9, windowSize[1]/10), Vector(windowSize[0]/8, windowSize[1]/9), exitButtonColors)
+    customModeTitle(screen)
+    for inputField in customInputFields:
+        inputField(screen, mouseData, events)
+
+    if customStartButton(screen, mouseData, virtualLocation) != virtualLocation:
+        width, height, depth, mineAmount = (inputField.number for inputField in customInputFields)
+        if (customError := customSettingsError(width, height, depth, mineAmount)) is None and depth > 1:
+            layeredBoard, start = generateFallback((width, height, depth), mineAmount) #layered boards aren't recorded, replays only describe 2D boards
+            board = BoardSlice(layeredBoard, start[2:] if start is not None else None) #shows the layer the start opened
+            virtualLocation = LOC_LAYERED
+        elif customError is None:
+            fieldDimensions = Vector(width, height)
+            field, board = buildGame((fieldDimensions, mineAmount, False, DIFFICULTY_CUSTOM), False)
+            startRecording(field, board)
+            virtualLocation = LOC_INGAME_UNTIMED #custom boards have no highscore
+        else:
+            mineAmount = None
+    if customError:
+        customErrorText(screen, customError)
 
-imageSize = buttonSizeVector*0.7
-mineImage = pg.transform.scale(pg.image.load("Assets/mine.png").convert_alpha(), (buttonSizeVector*0.9).components)
-flagImage = pg.transform.scale(pg.image.load("Assets/flag.png").convert_alpha(), (buttonSizeVector*0.7).components)
+    virtualLocation = mainMenuButton(screen, mouseData, virtualLocation)
 
-field = fieldDimensions = mineAmount = None #set default value (values will be set accordingly once difficulty is selected)
+    return virtualLocation, field, board, fieldDimensions, mineAmount, customError
+
+
+def openWindow() -> pg.Surface:
+    """Creates the window and everything placed relative to its size"""
+    global windowSize, windowCenter, buttonSize, buttonSizeVector, buttonMargin, mineCountCenter, mainFont, titleFont, mainGlyphs
+    global deltaModeButton, mainMenuButton, titleText, timeText, timedModeButton, noGuessModeButton, exitButton, difficultySelectButtons, difficultyHighscoreTexts
+    global customModeButton, endlessModeButton, customModeTitle, customInputFields, customStartButton, customErrorText
+    pg.init()
+    screensize = detectScreenSize()
+    screencenter = 0.5 * screensize
+
+    if useFullscreen:
+        windowSize = screensize
+        windowCenter = screencenter
+        screen = pg.display.set_mode((0, 0), pg.FULLSCREEN) #(0, 0) makes fullscreen window fit to screen size without being stretched
+    else:
+        screen = pg.display.set_mode((windowSize := (screensize*windowResizeFactor)).components)
+        windowCenter = windowSize*0.5
+
+    pg.display.set_caption("2D-Minesweeper")
+    pg.display.set_icon(assets.image("mine.png"))
+
+    mainFont = assets.font(2/35*windowSize[0])
+    titleFont = assets.font(3/40*windowSize[0])
+    mainGlyphs = GlyphCache(mainFont) #for text that changes every frame
+
+    buttonSize = min(windowSize)/(30/buttonScale)
+    buttonSizeVector = Vector(buttonSize for _ in range(2)) #buttons are always square
+    buttonMargin = windowSize[0]/(300/buttonScale)
+    mineCountCenter = Vector(windowCenter[0], windowSize[1]/10)
+
+    deltaModeButton = DeltaButton(Vector(windowSize[0]-buttonSize*5, windowSize[1]/10), Vector(max(windowSize[0]/24, 20) for _ in range(2)), deltaButtonColors, "Δ", mainFont)
+    mainMenuButton = MainMenuButton(Vector(buttonSize*5, windowSize[1]/10), Vector(max(windowSize[0]/24, 20) for _ in range(2)), mainMenuButtonColors, assets.image("back_arrow.png"), LOC_MAIN_MENU)
+
+    titleText = Text(Vector(windowCenter[0], windowSize[1]/7), titleFont, "3D Minesweeper")
+    timeText = TimeText(Vector(windowSize[0]*0.5, windowSize[1]*0.9), mainGlyphs)
+    timedModeButton = TimedModeButton(Vector(windowSize[0]-buttonSize*5, windowSize[1]/10), Vector(max(windowSize[0]/24, 20) for _ in range(2)), timedModeButtonColors, "Timed:", mainFont)
+    noGuessModeButton = TimedModeButton(Vector(windowSize[0]-buttonSize*5, windowSize[1]/10+max(windowSize[0]/24, 20)*2), Vector(max(windowSize[0]/24, 20) for _ in range(2)), timedModeButtonColors, "No guess:", mainFont)
+
+    difficultyButtonOffset = Vector(0, windowSize[1]*0.1)
+    highscoreDisplayOffset = Vector(windowSize[0]/6+windowSize[0]/12, 0)
+    difficultySelectButtons = []
+    difficultyHighscoreTexts = []
+    for i, iterDifficulty in enumerate(difficultyList[:-1]):
+        difficultySelectButtons.append(DifficultySelectButton(difficultyButtonOffset + windowCenter + Vector(0, windowSize[1])*(i-1)*difficultyButtonSpread, Vector(windowSize[0]/6, windowSize[1]/10), difficultyButtonColors, difficultyNames[iterDifficulty], difficultySettingDict[iterDifficulty]))
+        difficultyHighscoreTexts.append(Text(difficultyButtonOffset + windowCenter + Vector(0, windowSize[1])*(i-1)*difficultyButtonSpread+highscoreDisplayOffset, mainFont))
 
-playing = True
-while playing:
-    isNewClick = False
-    screen.fill((100, 100, 100))
+    customModeButton = GenericLocationButton(Vector(buttonSize*8, 17*windowSize[1]/20), Vector(windowSize[0]/6, windowSize[1]/10), customModeButtonColors, "Custom", mainFont, LOC_CUSTOM_MENU)
+    endlessModeButton = GenericLocationButton(Vector(windowSize[0]-buttonSize*8, 17*windowSize[1]/20), Vector(windowSize[0]/6, windowSize[1]/10), customModeButtonColors, "Endless", mainFont, LOC_ENDLESS)
+    customModeTitle = Text(Vector(windowCenter[0], windowSize[1]/9), titleFont, "Custom Mode")
+    customInputFields = [InputField(Vector(windowCenter[0]+windowSize[0]/12, windowSize[1]*(0.27+i*0.11)), Vector(windowSize[0]/6, windowSize[1]/10), text, customModeButtonColors, mainGlyphs, value) for i, (text, value) in enumerate((("Width:", "100"), ("Height:", "100"), ("Depth:", "1"), ("Mines:", "1500")))]
+    customStartButton = GenericLocationButton(Vector(windowCenter[0], windowSize[1]*0.75), Vector(windowSize[0]/6, windowSize[1]/10), customModeButtonColors, "Start", mainFont, LOC_INGAME_UNTIMED)
+    customErrorText = Text(Vector(windowCenter[0], windowSize[1]*0.88), mainFont)
 
-    for event in pg.event.get():
-        if event.type == pg.QUIT:
-            virtualLocation = LOC_EXIT
-            playing = False
-        
-        if event.type == pg.MOUSEBUTTONDOWN:
-            isNewClick = True
-        
-        if event.type == pg.KEYDOWN:
-            if event.key == pg.K_d and isIngame(virtualLocation):
-                deltaModeEnabled = bool((int(deltaModeEnabled)+1)%2)
+    exitButton = ExitButton(Vector(windowSize[0]/9, windowSize[1]/10), Vector(windowSize[0]/8, windowSize[1]/9), exitButtonColors, mainFont, LOC_EXIT)
+    return screen
 
-    mousePos = Vector(pg.mouse.get_pos())
-    islClick, isrClick = pg.mouse.get_pressed()[0], pg.mouse.get_pressed()[2] #will be true as long as the click button is held
-    mouseData = (mousePos, islClick, isrClick, isNewClick)
 
-    if virtualLocation == LOC_MAIN_MENU:
-        virtualLocation, field, fieldDimensions, isTimed, mineAmount, difficulty = renderMainMenuFrame(screen, mouseData, isTimed, highscores)
+def main():
+    global boardPrefetcher
+    screen = openWindow()
+    scoreStore = ScoreStore(dataPath(scorePath))
+    scoreStore.importHighscores(dataPath("highscores.json")) #best times kept by earlier versions
+    boardPrefetcher = Prefetcher(lambda key: buildGame(difficultySettingDict[key[0]], key[1]), [(iterDifficulty, False) for iterDifficulty in difficultyList[:-1]]) #keys are (difficulty, isNoGuess)
 
-    elif isIngame(virtualLocation):
-        virtualLocation, field, deltaModeEnabled, highscores = renderIngameFrame(field, fieldDimensions, screen, mouseData, deltaModeButton, deltaModeEnabled, (mineAmount, mineCountCenter, mineCountColors), mainMenuButton, virtualLocation, difficulty, highscores)
-        if not isIngame(virtualLocation):
-            difficulty = DIFFICULTY_DEFAULT
+    difficulty = DIFFICULTY_DEFAULT
+    virtualLocation = LOC_MAIN_MENU
+    isTimed = False
+    isNoGuess = False
+    isDeltaMode = deltaModeEnabled #the parameter only sets how the game starts
+    customError = None
+    overlayRect = None #where the profiler overlay was drawn last frame
+    profilerGlyphs = None #created when the overlay is first shown
+
+    field = board = fieldDimensions = mineAmount = None #set default value (values will be set accordingly once difficulty is selected)
+    boardRenderer = None
+    hintData = None #shown while the hint key is toggled on
+    probabilityWorker = None #thread computing the heatmap, started the first time it is shown
+    showHeatmap = False
+    endlessRenderer = None #holds the endless board while it is played
+    layeredRenderer = None #camera of the 3D board while it is played
+    viewRenderer = None #camera of the current game, only drawn through once the board overflows the window or the camera was moved
+    clickTime = startClickTime = None #time of the last click and of the click that started the game
+    startLatencies = [] #seconds from the click on a difficulty until the first ingame frame is shown
+
+    clock = pg.time.Clock()
+    isIdle = False #no input and no location change last frame, so the next frame would look the same
+    startCpuTime, startWallTime = time.process_time(), time.perf_counter()
+
+    playing = True
+    while playing:
+        clock.tick(frameRate)
+        isTicking = virtualLocation == LOC_INGAME_TIMED and not timeText.paused
+        events = []
+        if useIdleWait and isIdle:
+            #the running clock shows tenths of a second, wake up in time for the next one
+            timeout = int(100 - timeText.currentClock()*1000 % 100) + 1 if isTicking else idleTimeout
+            if (event := pg.event.wait(timeout)).type != pg.NOEVENT:
+                events.append(event)
+        frameProfiler.startFrame() #sleeping until input isn't part of the frame
+        events += pg.event.get()
+        previousLocation = virtualLocation
+        isIdle = not events
+
+        isNewClick = False
+        cameraInput = [0, [0, 0]] #mouse wheel steps and middle button drag distance
+        layerStep = 0 #layers to move through on a 3D board
+        updateRects = None #None updates the whole window
+        if not (useDirtyRendering and isIngame(virtualLocation)): #the dirty renderer keeps the previous frame on screen
+            screen.fill(backgroundColor)
+
+        for event in events:
+            if event.type == pg.QUIT:
+                virtualLocation = LOC_EXIT
+                playing = False
     
-    elif virtualLocation == LOC_CUSTOM_MENU:
-        virtualLocation, field, fieldDimensions, mineAmount = renderCustomMenuFrame(screen, mouseData)
-
-    elif virtualLocation == LOC_EXIT:
-        playing = False
+            if event.type == pg.MOUSEBUTTONDOWN:
+                isNewClick = True
+                clickTime = time.perf_counter()
     
-    pg.display.update()
-
-pg.quit()
+            if event.type == pg.MOUSEWHEEL:
+                cameraInput[0] += event.y
+
+            if event.type == pg.MOUSEMOTION and event.buttons[1]:
+                cameraInput[1][0] += event.rel[0]
+                cameraInput[1][1] += event.rel[1]
+
+            if event.type == pg.KEYDOWN:
+                if event.key == pg.K_d and (isIngame(virtualLocation) or virtualLocation in (LOC_ENDLESS, LOC_LAYERED)):
+                    isDeltaMode = bool((int(isDeltaMode)+1)%2)
+                if event.key == pg.K_h and isIngame(virtualLocation):
+                    hintData = None if hintData else requestHint(board)
+                if event.key == pg.K_m and isIngame(virtualLocation):
+                    showHeatmap = not showHeatmap
+                    probabilityWorker = probabilityWorker or ProbabilityWorker()
+                    if not showHeatmap:
+                        probabilityWorker.untrack()
+                if event.key == pg.K_p:
+                    frameProfiler.toggle()
+                if event.key in (pg.K_PAGEUP, pg.K_PAGEDOWN):
+                    layerStep += 1 if event.key == pg.K_PAGEDOWN else -1
+
+        mousePos = Vector(pg.mouse.get_pos())
+        islClick, isrClick = pg.mouse.get_pressed()[0], pg.mouse.get_pressed()[2] #will be true as long as the click button is held
+        mouseData = (mousePos, islClick, isrClick, isNewClick)
+        frameProfiler.mark("events")
+
+        isStarting = False
+        if virtualLocation == LOC_MAIN_MENU:
+            virtualLocation, field, board, fieldDimensions, isTimed, isNoGuess, mineAmount, difficulty = renderMainMenuFrame(screen, mouseData, isTimed, isNoGuess, scoreStore)
+            isStarting = isIngame(virtualLocation) #the first ingame frame is rendered next frame
+
+        elif isIngame(virtualLocation):
+            heatmap = None
+            if showHeatmap:
+                probabilityWorker.track(board) #does nothing if the board is already tracked
+                heatmap = probabilityWorker.latest() #the last frame's overlay stays hidden until the new state is computed
+            virtualLocation, field, board, isDeltaMode, boardRenderer, hintData, viewRenderer, updateRects = renderIngameFrame(field, board, fieldDimensions, screen, mouseData, deltaModeButton, isDeltaMode, (mineAmount, mineCountCenter, mineCountColors), mainMenuButton, virtualLocation, boardRenderer, hintData, viewRenderer, cameraInput, clock.get_time()/1000, heatmap)
+            if not isIngame(virtualLocation):
+                difficulty = DIFFICULTY_DEFAULT
+                if probabilityWorker is not None: #the heatmap of the left game isn't needed anymore
+                    probabilityWorker.untrack()
+
+        elif virtualLocation == LOC_ENDLESS:
+            virtualLocation, endlessRenderer, isDeltaMode = renderEndlessFrame(screen, mouseData, endlessRenderer, isDeltaMode, cameraInput, clock.get_time()/1000)
+            if virtualLocation != LOC_ENDLESS: #leaving throws the board and its stored chunks away
+                endlessRenderer.board.close()
+                endlessRenderer = None
+
+        elif virtualLocation == LOC_LAYERED:
+            virtualLocation, layeredRenderer, isDeltaMode = renderLayeredFrame(screen, mouseData, board, layeredRenderer, isDeltaMode, cameraInput, clock.get_time()/1000, layerStep)
+            if virtualLocation != LOC_LAYERED:
+                layeredRenderer = None
+
+        elif virtualLocation == LOC_CUSTOM_MENU:
+            virtualLocation, field, board, fieldDimensions, mineAmount, customError = renderCustomMenuFrame(screen, mouseData, events, customError)
+            if isIngame(virtualLocation):
+                difficulty = DIFFICULTY_CUSTOM
+                isStarting = True
+
+        elif virtualLocation == LOC_EXIT:
+            playing = False
 
-#update highscores to json file
-with open("highscores.json", "w") as writeFile:
-    json.dump(highscores, writeFile)
+        if overlayRect is not None and updateRects is not None: #the dirty renderer has to clear the last overlay, its size changes with the numbers
+            restoreArea(screen, overlayRect, boardRenderer)
+            updateRects.append(overlayRect)
+        overlayRect = None
+        if frameProfiler.enabled:
+            profilerGlyphs = profilerGlyphs or GlyphCache(assets.font(1/70*windowSize[0]))
+            overlayRect = frameProfiler.draw(screen, profilerGlyphs, (0, int(windowSize[1]/5)))
+            if updateRects is not None:
+                updateRects.append(overlayRect)
+        frameProfiler.mark("widgets")
+
+        if updateRects is None:
+            pg.display.update()
+        else:
+            pg.display.update(updateRects)
+        frameProfiler.mark("display")
+        frameProfiler.endFrame()
+
+        if startClickTime is not None and isIngame(virtualLocation): #the first ingame frame was just shown
+            startLatencies.append(time.perf_counter() - startClickTime)
+        startClickTime = clickTime if isStarting else None
+        isIdle = isIdle and virtualLocation == previousLocation and not ((virtualLocation in (LOC_ENDLESS, LOC_LAYERED) or isIngame(virtualLocation)) and any(pg.key.get_pressed()[key] for key in (pg.K_LEFT, pg.K_RIGHT, pg.K_UP, pg.K_DOWN))) #keep scrolling while an arrow key is held
+        isIdle = isIdle and not (showHeatmap and isIngame(virtualLocation) and probabilityWorker.latest() is None) #keep polling until the heatmap is ready
+
+    pg.quit()
+    noGuessGenerator.close()
+    if endlessRenderer is not None:
+        endlessRenderer.board.close()
+    frameProfiler.close()
+    print("average CPU usage: {:.1f}% (frame cap {} fps, idle wait {})".format((time.process_time() - startCpuTime)/(time.perf_counter() - startWallTime)*100, frameRate, "on" if useIdleWait else "off"))
+    boardPrefetcher.close()
+    if startLatencies:
+        print("game start latency ({} games, prefetch {}): median {:.1f} ms, max {:.1f} ms".format(len(startLatencies), "on" if usePrefetch else "off", sorted(startLatencies)[len(startLatencies)//2]*1000, max(startLatencies)*1000))
+    if noGuessPercentiles := noGuessGenerator.latencyPercentiles():
+        print("no-guess generation ({} boards, {} workers): {}".format(len(noGuessGenerator.latencies), noGuessGenerator.workers, ", ".join("p{} {:.1f} ms".format(percentile, seconds*1000) for percentile, seconds in noGuessPercentiles.items())))
+    scoreStore.close()
+
+
+if __name__ == "__main__": #worker processes started by the no-guess pool run this file again under another name, they must not open a window
+    main()
@@ -0,0 +1,81 @@
+"""Generates boards that can be solved from their start cell without guessing.
+Candidate boards are generated and checked by the solver in a pool of worker processes, only the winning seed is sent back."""
+import concurrent.futures
+import os
+import threading
+import time
+import numpy as np
+from board import Board
+from generator import NoSafeStartError, generateBoard, generateFallback
+from solver import solve
+
+
+candidatesPerTask = 8 #small tasks keep the pool responsive once a board was found or the timeout is reached
+
+
+def searchSeeds(dimensions, mineAmount, seeds):
+    """Runs in a worker process. Returns the first seed whose board the solver finishes without guessing, None if there is none"""
+    for seed in seeds:
+        try:
+            board, _ = generateBoard(dimensions, mineAmount, seed)
+        except NoSafeStartError:
+            continue
+        if solve(board, allowGuessing=False):
+            return seed
+    return None
+
+
+class NoGuessGenerator:
+    """Process pool searching for no-guess boards. The pool is only started when the first board is requested"""
+    def __init__(self, workers=None, seed=None):
+        self.workers = workers or max((os.cpu_count() or 2) - 1, 1)
+        self.rng = np.random.default_rng(seed)
+        self.pool = None
+        self.latencies = [] #seconds per generate call, including fallbacks
+        self.lock = threading.Lock() #generate may be called from a prefetch thread and the game loop at once
+
+    def submit(self, dimensions, mineAmount) -> concurrent.futures.Future:
+        seeds = [int(seed) for seed in self.rng.integers(2**63, size=candidatesPerTask)]
+        return self.pool.submit(searchSeeds, dimensions, mineAmount, seeds)
+
+    def generate(self, dimensions, mineAmount, timeout) -> tuple[Board, tuple, bool, int]:
+        """Returns a board with its start cell already revealed, the start cell, whether the board is guaranteed no-guess and its seed.
+        Falls back to a normal board if none was found within timeout seconds, generateFallback recreates either from the seed"""
+        with self.lock:
+            return self.generateLocked(dimensions, mineAmount, timeout)
+
+    def generateLocked(self, dimensions, mineAmount, timeout) -> tuple[Board, tuple, bool, int]:
+        start = time.perf_counter()
+        dimensions = (int(dimensions[0]), int(dimensions[1]))
+        if self.pool is None:
+            self.pool = concurrent.futures.ProcessPoolExecutor(self.workers)
+
+        pending = {self.submit(dimensions, mineAmount) for _ in range(self.workers*2)} #keep every worker busy while results come back
+        foundSeed = None
+        try:
+            while foundSeed is None and (remaining := start + timeout - time.perf_counter()) > 0:
+                done, pending = concurrent.futures.wait(pending, remaining, concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    if foundSeed is None:
+                        foundSeed = future.result()
+                        if foundSeed is None:
+                            pending.add(self.submit(dimensions, mineAmount))
+        except concurrent.futures.BrokenExecutor: #a worker died, hand out a normal board and start a new pool next time
+            self.pool = None
+        for future in pending: #tasks that already started finish their few candidates and are ignored
+            future.cancel()
+
+        seed = int(self.rng.integers(2**63)) if foundSeed is None else foundSeed
+        board, startCell = generateFallback(dimensions, mineAmount, seed) #regenerating from the seed is cheaper than sending the board between processes
+        self.latencies.append(time.perf_counter() - start)
+        return board, startCell, foundSeed is not None, seed
+
+    def latencyPercentiles(self, percentiles=(50, 90, 99)) -> dict:
+        if not self.latencies:
+            return {}
+        return {percentile: float(value) for percentile, value in zip(percentiles, np.percentile(self.latencies, percentiles))}
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
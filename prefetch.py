@@ -0,0 +1,59 @@
+import collections
+import threading
+
+
+class Prefetcher:
+    """Prepares one result per key in a background thread, so taking it later doesn't have to wait for build(key).
+    Taking a result immediately starts preparing the next one for that key"""
+    def __init__(self, build, keys=()):
+        self.build = build
+        self.ready = {}
+        self.queued = collections.deque() #keys waiting to be built, in order
+        self.building = None #key the thread is building right now
+        self.isClosed = False
+        self.stateChanged = threading.Condition() #guards everything above, notified whenever a key is queued or a build finishes
+        self.thread = threading.Thread(target=self.run, daemon=True) #never keeps the game from exiting
+        self.thread.start()
+        for key in keys:
+            self.prefetch(key)
+
+    def run(self):
+        while True:
+            with self.stateChanged:
+                self.stateChanged.wait_for(lambda: self.queued or self.isClosed)
+                if self.isClosed:
+                    return
+                key = self.building = self.queued.popleft()
+            try:
+                result = self.build(key)
+            except Exception: #a failed build is retried synchronously by take
+                result = None
+            with self.stateChanged:
+                self.building = None
+                if result is not None:
+                    self.ready[key] = result
+                self.stateChanged.notify_all()
+
+    def prefetch(self, key):
+        with self.stateChanged:
+            if key in self.ready or key in self.queued or key == self.building:
+                return
+            self.queued.append(key)
+            self.stateChanged.notify_all()
+
+    def take(self, key):
+        """Hands over the prepared result. Only waits if it is being built right now, a key that is still queued is dropped and built right away"""
+        with self.stateChanged:
+            if key in self.queued: #building it here doesn't wait for the keys queued before it
+                self.queued.remove(key)
+            self.stateChanged.wait_for(lambda: key != self.building)
+            result = self.ready.pop(key, None)
+        if result is None:
+            result = self.build(key)
+        self.prefetch(key)
+        return result
+
+    def close(self):
+        with self.stateChanged:
+            self.isClosed = True
+            self.stateChanged.notify_all()
@@ -0,0 +1,266 @@
+"""Exact mine probabilities of every hidden cell, given the revealed counts, the placed flags and the remaining mine amount.
+The frontier is split into independent components. Cells of a component covered by exactly the same constraints are merged into
+classes, whose mine amounts are enumerated with binomial weights instead of trying every cell on its own. Hidden cells away from the
+frontier are all alike, so they are handled analytically. Flags are trusted, a wrong flag makes the constraints unsolvable."""
+import collections
+import functools
+import math
+import threading
+import time
+import numpy as np
+from board import Board
+from solver import Frontier
+
+
+cancelCheckInterval = 2048 #enumeration steps between checks whether the result is still wanted
+
+
+class ProbabilityCancelled(Exception):
+    """Raised inside of a computation whose board changed before it finished"""
+
+
+def constraintComponents(frontier: Frontier) -> list[list[tuple[tuple, int]]]:
+    """Splits the frontier constraints into groups that share no cells. Every constraint is (flat indices of its hidden cells, missing mines)"""
+    parents = list(range(len(frontier.cells))) #union find over the frontier's local ids
+    def root(localId):
+        while parents[localId] != localId:
+            parents[localId] = parents[parents[localId]]
+            localId = parents[localId]
+        return localId
+
+    constraints = []
+    for bitset, mineAmount in frontier.constraints.items():
+        localIds = [localId for localId in range(bitset.bit_length()) if bitset >> localId & 1]
+        for localId in localIds[1:]:
+            parents[root(localId)] = root(localIds[0])
+        constraints.append((localIds, mineAmount))
+
+    components = {}
+    for localIds, mineAmount in constraints:
+        components.setdefault(root(localIds[0]), []).append((tuple(int(frontier.cells[localId]) for localId in localIds), mineAmount))
+    return list(components.values())
+
+
+def solveComponent(constraints, isCancelled) -> tuple[list[int], dict[int, int], dict[int, list[int]]]:
+    """Enumerates every mine placement of one component that satisfies all of its constraints.
+    Returns the cells of every class, the amount of placements per total mine amount and, per total mine amount,
+    the summed up mines of every class over those placements. Counts are exact python ints"""
+    classCells = {} #constraints covering a cell -> cells covered by exactly those
+    for cell in sorted({cell for cells, _ in constraints for cell in cells}):
+        classCells.setdefault(tuple(i for i, (cells, _) in enumerate(constraints) if cell in cells), []).append(cell)
+
+    #classes are visited breadth first along shared constraints, so constraints are completed early and cut off dead ends early
+    signatures = list(classCells)
+    constraintClasses = collections.defaultdict(list)
+    for classIndex, signature in enumerate(signatures):
+        for constraint in signature:
+            constraintClasses[constraint].append(classIndex)
+    order, seen = [], {0}
+    queue = collections.deque([0])
+    while queue:
+        classIndex = queue.popleft()
+        order.append(classIndex)
+        for constraint in signatures[classIndex]:
+            for neighbor in constraintClasses[constraint]:
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    queue.append(neighbor)
+    signatures = [signatures[classIndex] for classIndex in order]
+    sizes = [len(classCells[signature]) for signature in signatures]
+    classes = [classCells[signature] for signature in signatures]
+
+    missing = [mineAmount for _, mineAmount in constraints]
+    capacity = [0]*len(constraints) #cells of unassigned classes per constraint
+    for signature, size in zip(signatures, sizes):
+        for constraint in signature:
+            capacity[constraint] += size
+
+    amounts = {} #total mines -> placements
+    classMines = {} #total mines -> mines per class summed over the placements
+    values = [-1]*len(sizes)
+    weights = [1]*(len(sizes) + 1) #placements of the classes before each depth
+    mines = [0]*(len(sizes) + 1)
+    depth = steps = 0
+    while depth >= 0:
+        steps += 1
+        if steps % cancelCheckInterval == 0 and isCancelled():
+            raise ProbabilityCancelled()
+        if depth == len(sizes):
+            total = mines[depth]
+            weight = weights[depth]
+            amounts[total] = amounts.get(total, 0) + weight
+            perClass = classMines.setdefault(total, [0]*len(sizes))
+            for classIndex, value in enumerate(values):
+                if value:
+                    perClass[classIndex] += weight*value
+            depth -= 1
+            continue
+
+        signature, size = signatures[depth], sizes[depth]
+        if values[depth] < 0: #entering this class, its cells no longer count as open
+            for constraint in signature:
+                capacity[constraint] -= size
+        else: #trying the next amount, take back the last one
+            for constraint in signature:
+                missing[constraint] += values[depth]
+
+        value = values[depth] + 1
+        while value <= size:
+            if any(missing[constraint] < value for constraint in signature): #more mines only get worse
+                value = size + 1
+            elif all(missing[constraint] - value <= capacity[constraint] for constraint in signature):
+                break
+            else:
+                value += 1
+        if value > size: #every amount was tried, go back to the previous class
+            for constraint in signature:
+                capacity[constraint] += size
+            values[depth] = -1
+            depth -= 1
+            continue
+
+        values[depth] = value
+        for constraint in signature:
+            missing[constraint] -= value
+        weights[depth + 1] = weights[depth]*math.comb(size, value)
+        mines[depth + 1] = mines[depth] + value
+        depth += 1
+    return classes, amounts, classMines
+
+
+def convolve(a: dict, b: dict, limit) -> dict:
+    """Placement counts of two independent groups together, mine totals above limit can't happen and are dropped"""
+    result = {}
+    for aMines, aAmount in a.items():
+        for bMines, bAmount in b.items():
+            if aMines + bMines <= limit:
+                result[aMines + bMines] = result.get(aMines + bMines, 0) + aAmount*bAmount
+    return result
+
+
+class ProbabilityEngine:
+    """Computes mine probabilities. Solved components are kept by their constraints, a move only changes the components
+    around it, so the others come from the cache"""
+    def __init__(self, cacheSize=4096):
+        self.cache = collections.OrderedDict()
+        self.cacheSize = cacheSize
+        self.hits = self.misses = 0
+
+    def solve(self, constraints, isCancelled):
+        key = tuple(sorted(constraints))
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            self.hits += 1
+            return self.cache[key]
+        self.misses += 1
+        result = solveComponent(key, isCancelled)
+        self.cache[key] = result
+        if len(self.cache) > self.cacheSize:
+            self.cache.popitem(last=False)
+        return result
+
+    def __call__(self, board: Board, isCancelled=lambda: False) -> np.ndarray:
+        """Mine probability of every cell by flat index, NaN for revealed and flagged cells and for every cell if the flags contradict the counts.
+        Raises ProbabilityCancelled once isCancelled returns True"""
+        hidden = np.flatnonzero(~board.revealed.reshape(-1) & ~board.flagged.reshape(-1))
+        probabilities = np.full(board.cells.size, np.nan)
+        remainingMines = board.mineAmount - board.flagAmount
+        if hidden.size == 0 or board.isOver or remainingMines < 0:
+            return probabilities
+
+        frontier = Frontier(board)
+        components = [self.solve(constraints, isCancelled) for constraints in constraintComponents(frontier)]
+        interiorAmount = hidden.size - len(frontier.cells)
+        @functools.lru_cache(maxsize=None) #the binomials of big boards have thousands of digits, each total is only computed once
+        def interiorWays(mines):
+            return math.comb(interiorAmount, remainingMines - mines) if 0 <= remainingMines - mines <= interiorAmount else 0
+
+        #placements of all components but one, from products of the ones before and after it
+        before = [{0: 1}]
+        for _, amounts, _ in components:
+            before.append(convolve(before[-1], amounts, remainingMines))
+        after = [{0: 1}]
+        for _, amounts, _ in reversed(components):
+            after.append(convolve(after[-1], amounts, remainingMines))
+        after.reverse()
+        total = sum(amount*interiorWays(mines) for mines, amount in before[-1].items())
+        if total == 0: #no placement fits the counts and flags
+            return probabilities
+
+        for i, (classes, amounts, classMines) in enumerate(components):
+            if isCancelled():
+                raise ProbabilityCancelled()
+            others = convolve(before[i], after[i + 1], remainingMines)
+            #placements of everything outside of the component for each mine amount inside of it
+            outside = {mines: sum(amount*interiorWays(mines + otherMines) for otherMines, amount in others.items()) for mines in amounts}
+            for classIndex, cells in enumerate(classes):
+                expectedMines = sum(perClass[classIndex]*outside[mines] for mines, perClass in classMines.items())
+                probabilities[cells] = expectedMines/total/len(cells) #python ints divide exactly before rounding to a float
+        if interiorAmount:
+            interior = np.setdiff1d(hidden, frontier.cells, assume_unique=True)
+            interiorMines = sum(amount*interiorWays(mines)*(remainingMines - mines) for mines, amount in before[-1].items())
+            probabilities[interior] = interiorMines/total/interiorAmount
+        return probabilities
+
+
+class ProbabilityWorker:
+    """Keeps the probabilities of one board up to date on a background thread, so the game loop never waits for them.
+    Every change of the board cancels the computation of the old state and starts over, latest returns None until the current state is done"""
+    def __init__(self, engine: ProbabilityEngine = None):
+        self.engine = engine or ProbabilityEngine()
+        self.board = None
+        self.listenedBoard = None #the last board a change listener was added to
+        self.version = 0 #bumped on every change of the tracked board
+        self.snapshot = None #(version, copy of the board) still to compute
+        self.result = None #(version, probabilities)
+        self.computeTimes = [] #seconds per finished computation
+        self.wakeUp = threading.Condition()
+        self.thread = threading.Thread(target=self.run, daemon=True) #never keeps the game from exiting
+        self.thread.start()
+
+    def track(self, board: Board):
+        """Starts computing the probabilities of board and follows its changes, switching away from the previous board"""
+        if board is self.board:
+            return
+        self.board = board
+        if board is not self.listenedBoard: #a board tracked again after untrack still has its listener
+            self.listenedBoard = board
+            board.onChange(lambda changedCells: self.changed(board))
+        self.changed(board)
+
+    def untrack(self):
+        """Stops following the tracked board. The running computation is cancelled, nothing is copied or computed until the next track"""
+        with self.wakeUp:
+            self.board = None
+            self.version += 1
+            self.snapshot = None
+
+    def changed(self, board: Board):
+        if board is not self.board: #change listeners can't be removed, old boards keep calling
+            return
+        snapshot = Board.__new__(Board)
+        snapshot.__dict__.update(board.__dict__)
+        snapshot.cells = board.cells.copy() #the game loop keeps changing the board while the worker reads the copy
+        with self.wakeUp:
+            self.version += 1
+            self.snapshot = (self.version, snapshot)
+            self.wakeUp.notify()
+
+    def latest(self) -> np.ndarray:
+        """Probabilities of the tracked board's current state by flat index, None while they are being computed"""
+        result = self.result
+        return result[1] if result is not None and result[0] == self.version else None
+
+    def run(self):
+        while True:
+            with self.wakeUp:
+                self.wakeUp.wait_for(lambda: self.snapshot is not None)
+                version, board = self.snapshot
+                self.snapshot = None
+            start = time.perf_counter()
+            try:
+                probabilities = self.engine(board, lambda: self.version != version)
+            except ProbabilityCancelled:
+                continue
+            self.computeTimes.append(time.perf_counter() - start)
+            self.result = (version, probabilities)
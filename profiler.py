@@ -0,0 +1,120 @@
+"""Times the phases of every frame of the game loop, shown as an overlay and optionally written to a CSV trace"""
+import collections
+import csv
+import time
+import numpy as np
+import pygame as pg
+
+
+class InstanceCounter:
+    """Counts how many objects of a class are created by wrapping its __init__, only while installed"""
+    def __init__(self, cls):
+        self.cls = cls
+        self.count = 0
+        self.originalInit = None
+
+    def install(self):
+        if self.originalInit is not None:
+            return
+        self.originalInit = originalInit = self.cls.__init__
+        def countingInit(instance, *args, **kwargs):
+            self.count += 1
+            originalInit(instance, *args, **kwargs)
+        self.cls.__init__ = countingInit
+
+    def uninstall(self):
+        if self.originalInit is not None:
+            self.cls.__init__ = self.originalInit
+            self.originalInit = None
+
+    def take(self) -> int:
+        """Returns the amount of instances created since the last call"""
+        count, self.count = self.count, 0
+        return count
+
+
+class FrameProfiler:
+    """Measures the time between marks of a frame. Every mark adds the time since the previous mark (or the frame start) to its phase.
+    Does nothing while disabled, so the marks can stay in the game loop"""
+    def __init__(self, phases, window=300, tracePath=None, counter: InstanceCounter = None):
+        self.phases = tuple(phases)
+        self.window = window #amount of frames the percentiles are taken over
+        self.tracePath = tracePath
+        self.counter = counter
+        self.enabled = False
+        self.history = collections.deque(maxlen=window) #(phase times in seconds..., counted instances) per frame
+        self.frameTimes = dict.fromkeys(self.phases, 0.0)
+        self.lastMark = None
+        self.frameNumber = 0
+        self.traceFile = self.traceWriter = None
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        if self.enabled:
+            self.history.clear()
+            if self.counter is not None:
+                self.counter.install()
+                self.counter.take()
+            if self.tracePath is not None and self.traceFile is None:
+                self.traceFile = open(self.tracePath, "w", newline="")
+                self.traceWriter = csv.writer(self.traceFile)
+                self.traceWriter.writerow(["frame", *("{} ms".format(phase) for phase in self.phases), "instances"])
+        else:
+            if self.counter is not None:
+                self.counter.uninstall()
+            self.lastMark = None
+
+    def startFrame(self):
+        if self.enabled:
+            self.frameTimes = dict.fromkeys(self.phases, 0.0)
+            self.lastMark = time.perf_counter()
+
+    def mark(self, phase):
+        if self.enabled and self.lastMark is not None:
+            now = time.perf_counter()
+            self.frameTimes[phase] += now - self.lastMark
+            self.lastMark = now
+
+    def endFrame(self):
+        if not (self.enabled and self.lastMark is not None):
+            return
+        instances = self.counter.take() if self.counter is not None else 0
+        self.history.append((*self.frameTimes.values(), instances))
+        self.frameNumber += 1
+        if self.traceWriter is not None:
+            self.traceWriter.writerow([self.frameNumber, *("{:.4f}".format(seconds*1000) for seconds in self.frameTimes.values()), instances])
+
+    def percentiles(self, percentiles=(50, 99)) -> dict:
+        """Maps every phase (and "total") to its percentiles in milliseconds over the last frames, "instances" to the per frame counts"""
+        if not self.history:
+            return {}
+        history = np.array(self.history)
+        history[:, :-1] *= 1000
+        columns = [*self.phases, "instances"]
+        result = {name: np.percentile(history[:, i], percentiles) for i, name in enumerate(columns)}
+        result["total"] = np.percentile(history[:, :-1].sum(axis=1), percentiles)
+        return result
+
+    def draw(self, screen: pg.Surface, glyphs, topleft, color=(255, 255, 255), backgroundColor=(30, 30, 30)) -> pg.Rect:
+        """Draws the rolling p50/p99 of every phase, returns the covered rect"""
+        percentiles = self.percentiles()
+        lines = ["phase p50 / p99 ms"]
+        for name in (*self.phases, "total"):
+            if name in percentiles:
+                lines.append("{}: {:.2f} / {:.2f}".format(name, *percentiles[name]))
+        if self.counter is not None and "instances" in percentiles:
+            lines.append("{} per frame: {:.0f} / {:.0f}".format(self.counter.cls.__name__, *percentiles["instances"]))
+
+        lineHeight = glyphs.font.get_linesize()
+        rect = pg.Rect(topleft, (max(glyphs.font.size(line)[0] for line in lines) + lineHeight, lineHeight*(len(lines) + 1)))
+        screen.fill(backgroundColor, rect)
+        for i, line in enumerate(lines):
+            glyphs(screen, line, color, topleft=(rect.x + lineHeight//2, rect.y + lineHeight//2 + i*lineHeight))
+        return rect
+
+    def close(self):
+        if self.traceFile is not None:
+            self.traceFile.close()
+            self.traceFile = self.traceWriter = None
+        if self.counter is not None:
+            self.counter.uninstall()
@@ -0,0 +1,367 @@
+import pygame as pg
+import numpy as np
+import re
+from board import CELL_FLAGGED, CELL_MINE, CELL_REVEALED, Board, maxDimensions
+
+
+#cell render states, a cell is only redrawn when its state changes
+STATE_HIDDEN = 0
+STATE_FLAGGED = 1
+STATE_MINE = 2
+STATE_COUNT = 32 #revealed cells are STATE_COUNT + displayCount, delta mode may make displayCount negative (down to -26 on 3D boards)
+STATE_HOVERED = 64
+STATE_PRESSED = 128
+STATE_HIGHLIGHT = 256 #border of a hidden cell next to the hovered one
+STATE_HIGHLIGHT_SELF = 512 #border of the hovered cell itself
+STATE_HINT_SAFE = 1024 #hint markers are drawn as an inner border
+STATE_HINT_MINE = 2048
+STATE_HINT_GUESS = 4096
+hintStates = (STATE_HINT_SAFE, STATE_HINT_MINE, STATE_HINT_GUESS)
+STATE_HEAT_SHIFT = 13 #mine probability overlay, levels 1 to heatLevels are stored from this bit on, 0 has no overlay
+heatLevels = 11 #steps of 10%
+STATE_BASE_MASK = STATE_HOVERED - 1
+
+maxDirtyRects = 64 #if more cells changed than this, a single bounding rect is updated instead
+lodCellStep = 10 #pixels per cell below which a ViewportRenderer draws the overview texture instead of single cells
+maxZoom = 4
+maxCount = 3**maxDimensions - 1 #most neighbors a cell can have, delta mode counts go as far below zero
+
+
+def cellStates(cells: np.ndarray, displayCounts: np.ndarray, useDelta, hoveredCoords=None, isPressed=False) -> np.ndarray:
+    """Render states of packed cells (see Board.cells), hoveredCoords is relative to the given cells"""
+    revealed, flagged, mines = (cells & CELL_REVEALED) != 0, (cells & CELL_FLAGGED) != 0, (cells & CELL_MINE) != 0
+    states = np.zeros(cells.shape, dtype=np.int32)
+    states[flagged] = STATE_FLAGGED
+    revealedSafe = revealed & ~mines
+    states[revealedSafe] = STATE_COUNT + displayCounts[revealedSafe]
+    states[revealed & mines] = STATE_MINE
+
+    if hoveredCoords is not None:
+        x, y = hoveredCoords
+        states[x, y] |= STATE_HOVERED | (STATE_PRESSED if isPressed else 0) | STATE_HIGHLIGHT_SELF
+        neighborhood = (slice(max(x-1, 0), x+2), slice(max(y-1, 0), y+2))
+        highlighted = ~(revealed[neighborhood] | (flagged[neighborhood] & useDelta)) #only highlight if target isn't revealed and isn't flagged
+        states[neighborhood][highlighted] |= STATE_HIGHLIGHT
+    return states
+
+
+def heatStates(probabilities: np.ndarray) -> np.ndarray:
+    """Render state bits of mine probabilities, NaN (no probability) gets no overlay"""
+    levels = np.rint(np.nan_to_num(probabilities, nan=-1/(heatLevels - 1))*(heatLevels - 1)).astype(np.int32) + 1
+    return levels << STATE_HEAT_SHIFT
+
+
+def heatColor(colors, level):
+    """Overlay color of a heat level, blended from the safe to the mine hint color"""
+    share = (level - 1)/(heatLevels - 1)
+    return tuple(round(safe + (mine - safe)*share) for safe, mine in zip(colors[0], colors[1]))
+
+
+def cellAt(mousePos, fieldStartPos, buttonSize, buttonMargin, dimensions):
+    """Maps a screen position straight to the (x, y) index of the cell under it. Returns None outside of the field and in the margins between cells"""
+    cellStep = buttonSize + buttonMargin
+    index = []
+    for axis in range(2):
+        offset = mousePos[axis] - fieldStartPos[axis]
+        cell = int(offset // cellStep)
+        if not (0 <= cell < dimensions[axis] and 0 < offset - cell*cellStep < buttonSize):
+            return None
+        index.append(cell)
+    return tuple(index)
+
+
+class GlyphCache:
+    """Renders text from cached pieces: digits are cached one by one, everything between them as a whole, so changing numbers never rasterize again"""
+    def __init__(self, font: pg.font.Font):
+        self.font = font
+        self.glyphs = {}
+
+    def glyph(self, text, color) -> pg.Surface:
+        if (text, color) not in self.glyphs:
+            self.glyphs[(text, color)] = self.font.render(text, True, color)
+        return self.glyphs[(text, color)]
+
+    def __call__(self, screen: pg.Surface, text, color, **position) -> pg.Rect:
+        """Blits text to the screen, position is given like for Surface.get_rect, e.g. center=(x, y). Returns the covered rect"""
+        glyphs = [self.glyph(piece, color) for piece in re.findall(r"\d|\D+", text)]
+        rect = pg.Rect(0, 0, sum(glyph.get_width() for glyph in glyphs), max((glyph.get_height() for glyph in glyphs), default=0))
+        for key, value in position.items():
+            setattr(rect, key, value)
+        x = rect.x
+        blitSequence = []
+        for glyph in glyphs:
+            blitSequence.append((glyph, (x, rect.y)))
+            x += glyph.get_width()
+        screen.blits(blitSequence, False)
+        return rect
+
+
+class TileCache:
+    """Pre-rendered count digits and fully composited cell tiles for every render state. Tiles are built on first use and only thrown away when the cell size changes"""
+    def __init__(self, colors, numberColors, countFont: pg.font.Font, flagImage: pg.Surface, mineImage: pg.Surface, imageOffset=0, hintColors=((40, 200, 90), (220, 50, 50), (240, 200, 40))):
+        self.colors = colors
+        self.hintColors = hintColors #safe, mine, best guess
+        self.numberColors = numberColors
+        self.baseImages = (flagImage, mineImage)
+        self.flagImage = flagImage
+        self.mineImage = mineImage
+        self.imageOffset = imageOffset #mine image centering is approximately 1 pixel off
+        self.baseDigits = {displayCount: countFont.render(str(displayCount), True, numberColors[displayCount%len(numberColors)]) for displayCount in range(-maxCount, maxCount + 1)} #delta mode can make counts negative
+        self.digits = self.baseDigits
+        self.baseCellSize = None #images and digits are made for the first cell size, other sizes scale them
+        self.cellSize = None
+        self.tiles = {}
+
+    def resize(self, cellSize):
+        cellSize = round(cellSize)
+        if cellSize == self.cellSize:
+            return
+        if self.baseCellSize is None:
+            self.baseCellSize = cellSize
+        self.cellSize = cellSize
+        self.tiles = {}
+        scale = cellSize/self.baseCellSize
+        scaled = lambda image: image if scale == 1 else pg.transform.smoothscale(image, (max(round(image.get_width()*scale), 1), max(round(image.get_height()*scale), 1)))
+        self.flagImage, self.mineImage = (scaled(image) for image in self.baseImages)
+        self.digits = {displayCount: scaled(digit) for displayCount, digit in self.baseDigits.items()}
+
+    def __getitem__(self, state) -> pg.Surface:
+        state = int(state)
+        if state not in self.tiles:
+            self.tiles[state] = self.composite(state)
+        return self.tiles[state]
+
+    def composite(self, state) -> pg.Surface:
+        tile = pg.Surface((self.cellSize, self.cellSize))
+        rect = tile.get_rect()
+        base = state & STATE_BASE_MASK
+        if base >= STATE_MINE: #revealed
+            tile.fill(self.colors[3])
+        else:
+            tile.fill(self.colors[int(bool(state & STATE_HOVERED)) + int(bool(state & STATE_PRESSED))])
+
+        if heatLevel := state >> STATE_HEAT_SHIFT:
+            overlay = pg.Surface(rect.size, pg.SRCALPHA)
+            overlay.fill((*heatColor(self.hintColors, heatLevel), 140))
+            tile.blit(overlay, rect)
+
+        if base == STATE_FLAGGED:
+            tile.blit(self.flagImage, self.flagImage.get_rect(center=rect.center))
+        elif base == STATE_MINE:
+            tile.blit(self.mineImage, self.mineImage.get_rect(center=(rect.centerx - self.imageOffset, rect.centery - self.imageOffset)))
+        elif base > STATE_MINE and base != STATE_COUNT: #revealed cells with a count of 0 stay empty
+            digit = self.digits[base - STATE_COUNT]
+            tile.blit(digit, digit.get_rect(center=rect.center))
+
+        if state & STATE_HIGHLIGHT:
+            pg.draw.rect(tile, self.colors[4], rect, 2)
+        elif state & STATE_HIGHLIGHT_SELF:
+            pg.draw.rect(tile, self.colors[5], rect, 2)
+
+        for hintState, hintColor in zip(hintStates, self.hintColors):
+            if state & hintState:
+                pg.draw.rect(tile, hintColor, rect.inflate(-6, -6), 2)
+        return tile
+
+
+class BoardRenderer:
+    """Keeps the field on a persistent off-screen surface and only redraws cells whose state or hover status changed"""
+    def __init__(self, board: Board, fieldStartPos, buttonSize, buttonMargin, tiles: TileCache, background):
+        self.board = board
+        self.origin = (int(fieldStartPos[0]), int(fieldStartPos[1]))
+        self.buttonSize = buttonSize
+        self.cellStep = buttonSize + buttonMargin
+        self.tiles = tiles
+        self.tiles.resize(buttonSize)
+        self.background = background
+
+        width, height = board.dimensions
+        self.surface = pg.Surface((int(width*self.cellStep) + 1, int(height*self.cellStep) + 1))
+        self.surface.fill(background) #margins between cells are never drawn over
+        self.lastStates = np.full(board.dimensions, -1, dtype=np.int32) #-1 never matches, so the first frame draws every cell
+        self.fullRedraw = True
+
+    def cellRect(self, x, y) -> pg.Rect:
+        """Rect of a cell relative to the off-screen surface"""
+        return pg.Rect(round(x*self.cellStep), round(y*self.cellStep), round(self.buttonSize), round(self.buttonSize))
+
+    def screenRect(self) -> pg.Rect:
+        return self.surface.get_rect(topleft=self.origin)
+
+    def invalidate(self):
+        """Forces every cell to be redrawn on the next frame, e.g. after the screen was drawn over"""
+        self.lastStates.fill(-1)
+        self.fullRedraw = True
+
+    def cellStates(self, hoveredCoords, isPressed, hints=None, heatmap=None) -> np.ndarray:
+        states = cellStates(self.board.cells, self.board.displayCounts, self.board.useDelta, hoveredCoords, isPressed)
+        if hints:
+            flatStates = states.reshape(-1)
+            for hintState, cells in zip(hintStates, hints):
+                flatStates[list(cells)] |= hintState
+        if heatmap is not None:
+            states |= heatStates(heatmap).reshape(states.shape)
+        return states
+
+    def __call__(self, screen: pg.Surface, hoveredCoords, isPressed, hints=None, heatmap=None) -> list[pg.Rect]:
+        """Redraws changed cells and copies them to the screen. hints are the flat indices of cells to mark as safe, mine and best guess,
+        heatmap the mine probability of every cell by flat index. Returns the screen rects that have to be passed to pg.display.update"""
+        states = self.cellStates(hoveredCoords, isPressed, hints, heatmap)
+        changed = np.argwhere(states != self.lastStates)
+        self.lastStates = states
+
+        rects = [self.cellRect(x, y) for x, y in changed]
+        self.surface.blits([(self.tiles[states[x, y]], rect) for (x, y), rect in zip(changed, rects)], False)
+        if self.fullRedraw:
+            screen.fill(self.background)
+            screen.blit(self.surface, self.origin)
+            self.fullRedraw = False
+            return [screen.get_rect()]
+        if len(rects) > maxDirtyRects:
+            rects = [rects[0].unionall(rects[1:])]
+
+        dirtyRects = []
+        for rect in rects:
+            screen.blit(self.surface, rect.move(self.origin), rect)
+            dirtyRects.append(rect.move(self.origin))
+        return dirtyRects
+
+
+class ViewportRenderer:
+    """Draws the visible part of a board through a pan and zoom camera, every frame straight from the tile cache.
+    Works for boards without fixed dimensions (see chunks.ChunkedBoard) too, bounds limits the drawn cells to a board's dimensions.
+    When zoomed out so far that cells get smaller than lodCellStep pixels, bounded boards are drawn from an overview texture with one pixel per cell instead"""
+    def __init__(self, board, screenRect: pg.Rect, buttonSize, buttonMargin, tiles: TileCache, camera=(0, 0), bounds=None):
+        self.board = board
+        self.screenRect = pg.Rect(screenRect)
+        self.baseButtonSize = buttonSize
+        self.baseCellStep = buttonSize + buttonMargin
+        self.tiles = tiles
+        self.camera = [float(camera[0]), float(camera[1])] #field position in pixels shown at the top left corner of screenRect
+        self.bounds = bounds
+        self.zoom = 1
+        self.isMoved = False #whether the camera was ever panned or zoomed
+        self.overview = None #built on the first zoomed out frame, then kept up to date through board.onChange
+        self.overviewCache = None #(key, scaled overview) of the last frame, reused while nothing moved or changed
+        self.overviewVersion = 0
+
+    @property
+    def buttonSize(self):
+        return self.baseButtonSize*self.zoom
+
+    @property
+    def cellStep(self):
+        return self.baseCellStep*self.zoom
+
+    @property
+    def minZoom(self):
+        if self.bounds is None: #without an overview the cells have to stay big enough to be drawn one by one
+            return lodCellStep/self.baseCellStep
+        fitZoom = min(self.screenRect.width/self.bounds[0], self.screenRect.height/self.bounds[1])/self.baseCellStep #the whole board fits on screen
+        return min(fitZoom, 1)
+
+    def centerOn(self, x, y):
+        """Moves the camera so the cell is in the middle of screenRect"""
+        self.camera = [(x + 0.5)*self.cellStep - self.screenRect.width/2, (y + 0.5)*self.cellStep - self.screenRect.height/2]
+
+    def pan(self, dx, dy):
+        if dx or dy:
+            self.camera[0] += dx
+            self.camera[1] += dy
+            self.isMoved = True
+
+    def zoomAt(self, factor, screenPos):
+        """Zooms by factor while keeping the field point under screenPos in place"""
+        zoom = min(max(self.zoom*factor, self.minZoom), maxZoom)
+        if zoom == self.zoom:
+            return
+        anchor = (screenPos[0] - self.screenRect.x, screenPos[1] - self.screenRect.y)
+        self.camera = [(self.camera[axis] + anchor[axis])*zoom/self.zoom - anchor[axis] for axis in range(2)]
+        self.zoom = zoom
+        self.isMoved = True
+
+    @property
+    def isOverview(self):
+        return self.bounds is not None and self.cellStep < lodCellStep
+
+    def visibleCells(self) -> tuple[int, int, int, int]:
+        """(x, y, width, height) of the cells at least partly inside screenRect, within bounds if there are any"""
+        left, top = int(self.camera[0] // self.cellStep), int(self.camera[1] // self.cellStep)
+        right, bottom = int((self.camera[0] + self.screenRect.width) // self.cellStep), int((self.camera[1] + self.screenRect.height) // self.cellStep)
+        if self.bounds is not None:
+            left, top = max(left, 0), max(top, 0)
+            right, bottom = min(right, self.bounds[0] - 1), min(bottom, self.bounds[1] - 1)
+        return left, top, max(right - left + 1, 0), max(bottom - top + 1, 0)
+
+    def cellAt(self, mousePos):
+        """Field coordinates of the cell under a screen position, None outside of screenRect or bounds and in the margins between cells"""
+        if not self.screenRect.collidepoint(mousePos[0], mousePos[1]):
+            return None
+        fieldPos = (mousePos[0] - self.screenRect.x + self.camera[0], mousePos[1] - self.screenRect.y + self.camera[1])
+        cell = tuple(int(position // self.cellStep) for position in fieldPos)
+        if self.bounds is not None and not (0 <= cell[0] < self.bounds[0] and 0 <= cell[1] < self.bounds[1]):
+            return None
+        if not self.isOverview and not all(0 < position - index*self.cellStep < self.buttonSize for position, index in zip(fieldPos, cell)):
+            return None
+        return cell
+
+    def __call__(self, screen: pg.Surface, hoveredCoords, isPressed, hints=None, heatmap=None):
+        """hints are the flat indices of cells to mark as safe, mine and best guess, heatmap the mine probability of every cell by flat index.
+        Both only work on bounded boards"""
+        x, y, width, height = self.visibleCells()
+        self.board.setViewport(x, y, width, height)
+        if width == 0 or height == 0:
+            return
+        previousClip = screen.get_clip()
+        screen.set_clip(self.screenRect)
+        if self.isOverview:
+            self.drawOverview(screen, x, y, width, height)
+        else:
+            self.drawCells(screen, x, y, width, height, hoveredCoords, isPressed, hints, heatmap)
+        screen.set_clip(previousClip)
+
+    def drawCells(self, screen, x, y, width, height, hoveredCoords, isPressed, hints, heatmap):
+        self.tiles.resize(self.buttonSize)
+        cells, displayCounts = self.board.displayWindow(x, y, width, height)
+        relativeHover = None
+        if hoveredCoords is not None and 0 <= hoveredCoords[0] - x < width and 0 <= hoveredCoords[1] - y < height:
+            relativeHover = (hoveredCoords[0] - x, hoveredCoords[1] - y)
+        states = cellStates(cells, displayCounts, self.board.useDelta, relativeHover, isPressed)
+        if hints:
+            for hintState, hinted in zip(hintStates, hints):
+                hintX, hintY = np.divmod(np.fromiter(hinted, dtype=np.intp, count=len(hinted)), self.bounds[1])
+                visible = (hintX >= x) & (hintX < x + width) & (hintY >= y) & (hintY < y + height)
+                states[hintX[visible] - x, hintY[visible] - y] |= hintState
+        if heatmap is not None:
+            states |= heatStates(heatmap.reshape(self.bounds)[x:x+width, y:y+height])
+
+        #positions are rounded once per row and column, tiles are looked up once per distinct state
+        columns = np.round(self.screenRect.x + (x + np.arange(width))*self.cellStep - self.camera[0]).astype(int).tolist()
+        rows = np.round(self.screenRect.y + (y + np.arange(height))*self.cellStep - self.camera[1]).astype(int).tolist()
+        tiles = {state: self.tiles[state] for state in np.unique(states).tolist()}
+        screen.blits([(tiles[state], (column, row)) for column, columnStates in zip(columns, states.tolist()) for row, state in zip(rows, columnStates)], False)
+
+    def overviewColors(self, cells: np.ndarray) -> np.ndarray:
+        """Mapped pixel colors of packed cells for the overview texture"""
+        palette = np.array([self.overview.map_rgb(color) for color in (self.tiles.colors[0], self.tiles.hintColors[1], self.tiles.colors[3], (0, 0, 0))], dtype=np.uint32) #hidden, flagged, revealed, revealed mine
+        codes = np.where(cells & CELL_REVEALED, np.where(cells & CELL_MINE, 3, 2), np.where(cells & CELL_FLAGGED, 1, 0))
+        return palette[codes]
+
+    def updateOverview(self, changedCells: np.ndarray):
+        """Board change listener, only the changed pixels are written"""
+        x, y = np.divmod(changedCells, self.bounds[1])
+        pixels = pg.surfarray.pixels2d(self.overview)
+        pixels[x, y] = self.overviewColors(self.board.cells.reshape(-1)[changedCells])
+        del pixels #unlocks the surface
+        self.overviewVersion += 1
+
+    def drawOverview(self, screen, x, y, width, height):
+        if self.overview is None:
+            self.overview = pg.Surface(self.bounds)
+            pg.surfarray.blit_array(self.overview, self.overviewColors(self.board.cells))
+            self.board.onChange(self.updateOverview)
+        key = (x, y, width, height, self.zoom, self.overviewVersion)
+        if self.overviewCache is None or self.overviewCache[0] != key:
+            size = (max(round(width*self.cellStep), 1), max(round(height*self.cellStep), 1))
+            self.overviewCache = (key, pg.transform.scale(self.overview.subsurface((x, y, width, height)), size))
+        screen.blit(self.overviewCache[1], (round(self.screenRect.x + x*self.cellStep - self.camera[0]), round(self.screenRect.y + y*self.cellStep - self.camera[1])))
@@ -0,0 +1,160 @@
+"""Compact binary game records and a headless replayer.
+A replay holds what generateFallback needs to recreate the board (dimensions, mine amount and seed) plus every action of the player.
+Actions are stored as varints: the milliseconds since the previous action shifted left by the action bits, followed by the zigzag
+encoded distance to the previously used cell for reveals and flags. A file of replays is a sequence of length prefixed records."""
+import time
+from board import CELL_FLAGGED, CELL_REVEALED
+from generator import generateFallback
+
+
+ACTION_REVEAL = 0
+ACTION_FLAG = 1
+ACTION_DELTA_OFF = 2
+ACTION_DELTA_ON = 3
+actionBits = 2
+cellActions = (ACTION_REVEAL, ACTION_FLAG) #only these store a cell
+
+replayMagic = b"MSR"
+replayVersion = 1
+
+
+class ReplayError(ValueError):
+    """Raised when replay data is truncated or not a replay"""
+
+
+def writeVarint(out: bytearray, value):
+    while value > 0x7f:
+        out.append(value & 0x7f | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def readVarint(data: bytes, position) -> tuple[int, int]:
+    """Returns the value and the position after it"""
+    value = shift = 0
+    while True:
+        if position >= len(data):
+            raise ReplayError("Replay ends inside of a number")
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+
+class Replay:
+    """Board parameters and the actions of one game as (milliseconds since the start, action, flat cell index or -1) tuples.
+    clock returns seconds, it only matters while recording"""
+    def __init__(self, dimensions, mineAmount, seed, actions=None, clock=time.perf_counter):
+        self.dimensions = (int(dimensions[0]), int(dimensions[1]))
+        self.mineAmount = int(mineAmount)
+        self.seed = int(seed)
+        self.actions = actions if actions is not None else []
+        self.clock = clock
+        self.startTime = clock()
+
+    def __repr__(self):
+        return "Replay(dimensions: {}, mines: {}, seed: {}, actions: {})".format(self.dimensions, self.mineAmount, self.seed, len(self.actions))
+
+    def restartClock(self):
+        """Called when the game is shown, boards may be prepared long before that"""
+        self.startTime = self.clock()
+
+    def record(self, action, cell=-1):
+        timestamp = max(round((self.clock() - self.startTime)*1000), self.actions[-1][0] if self.actions else 0) #never goes back in time, so the deltas stay positive
+        self.actions.append((timestamp, action, int(cell)))
+
+    def encode(self) -> bytes:
+        out = bytearray(replayMagic)
+        out.append(replayVersion)
+        for value in (*self.dimensions, self.mineAmount, len(self.actions)):
+            writeVarint(out, value)
+        out += self.seed.to_bytes(8, "little")
+        previousTime = previousCell = 0
+        for timestamp, action, cell in self.actions:
+            writeVarint(out, (timestamp - previousTime) << actionBits | action)
+            previousTime = timestamp
+            if action in cellActions:
+                distance = cell - previousCell
+                writeVarint(out, distance << 1 if distance >= 0 else (-distance << 1) - 1) #zigzag, small distances in both directions stay small
+                previousCell = cell
+        return bytes(out)
+
+    @classmethod
+    def decode(cls, data: bytes) -> "Replay":
+        if data[:len(replayMagic)] != replayMagic or len(data) <= len(replayMagic) or data[len(replayMagic)] != replayVersion:
+            raise ReplayError("Not a version {} replay".format(replayVersion))
+        position = len(replayMagic) + 1
+        width, position = readVarint(data, position)
+        height, position = readVarint(data, position)
+        mineAmount, position = readVarint(data, position)
+        actionAmount, position = readVarint(data, position)
+        if position + 8 > len(data):
+            raise ReplayError("Replay ends inside of the seed")
+        seed = int.from_bytes(data[position:position+8], "little")
+        position += 8
+
+        actions = []
+        timestamp = cell = 0
+        for _ in range(actionAmount):
+            packed, position = readVarint(data, position)
+            timestamp += packed >> actionBits
+            action = packed & (1 << actionBits) - 1
+            if action in cellActions:
+                distance, position = readVarint(data, position)
+                cell += -(distance + 1 >> 1) if distance & 1 else distance >> 1
+                actions.append((timestamp, action, cell))
+            else:
+                actions.append((timestamp, action, -1))
+        return cls((width, height), mineAmount, seed, actions)
+
+
+def appendReplay(path, replay: Replay):
+    """Adds a replay to the end of a replay file, the file is created if it doesn't exist"""
+    data = replay.encode()
+    prefix = bytearray()
+    writeVarint(prefix, len(data))
+    with open(path, "ab") as f:
+        f.write(prefix + data) #a single write, so a crash can only cut off the last record
+
+
+def readReplays(path):
+    """Yields every replay of a replay file. A record cut off by a crash ends the file"""
+    with open(path, "rb") as f:
+        data = f.read()
+    position = 0
+    while position < len(data):
+        try:
+            length, start = readVarint(data, position)
+        except ReplayError:
+            return
+        if start + length > len(data):
+            return
+        yield Replay.decode(data[start:start+length])
+        position = start + length
+
+
+def play(replay: Replay):
+    """Recreates the board and applies every action the way Button.handleInput and the delta mode toggle do.
+    Returns the board and the timestamp in milliseconds of the action that ended the game, None if it never ended"""
+    board, _ = generateFallback(replay.dimensions, replay.mineAmount, replay.seed)
+    height = replay.dimensions[1]
+    endTime = None
+    for timestamp, action, cell in replay.actions:
+        if action == ACTION_REVEAL:
+            if not board.cells.flat[cell] & (CELL_REVEALED | CELL_FLAGGED):
+                board.reveal(*divmod(cell, height))
+        elif action == ACTION_FLAG:
+            board.toggleFlag(*divmod(cell, height))
+        else:
+            board.setDeltaMode(action == ACTION_DELTA_ON)
+        if endTime is None and board.isOver:
+            endTime = timestamp
+    return board, endTime
+
+
+def verifyTime(replay: Replay, claimedSeconds, tolerance=0.1) -> bool:
+    """Whether the replay wins its board within the claimed time. tolerance covers the frames between the last click and the clock stopping"""
+    board, endTime = play(replay)
+    return board.won and endTime is not None and endTime/1000 <= claimedSeconds + tolerance
@@ -0,0 +1,130 @@
+"""Append-only store of finished timed games. Every game is one fixed size record with a checksum, written with a single write
+and synced to disk, so a crash loses at most the game that was being written. Opening the store drops a torn record at the end
+and skips records whose checksum doesn't match.
+Winning times are kept sorted per difficulty, so the best time, top N, ranks and percentiles never scan the history. The sorted times are
+saved next to the store when it is closed, opening it again only reads the records appended since then."""
+import bisect
+import json
+import os
+import struct
+import time
+import zlib
+import numpy as np
+
+
+recordFormat = struct.Struct("<16sdd?") #difficulty, seconds, unix time the game finished, won
+checksumFormat = struct.Struct("<I") #crc32 of the record, follows it
+recordSize = recordFormat.size + checksumFormat.size
+recordDtype = np.dtype([("difficulty", "S16"), ("seconds", "<f8"), ("finishedAt", "<f8"), ("won", "?"), ("checksum", "<u4")]) #the same layout, for reading every record at once
+
+
+class ScoreStore:
+    """Scores of finished timed games in an append-only file. syncWrites trades append speed for losing nothing on a power cut"""
+    def __init__(self, path="scores.bin", syncWrites=True):
+        self.path = path
+        self.indexPath = path + ".index.npz"
+        self.syncWrites = syncWrites
+        self.times = {} #difficulty -> sorted winning times in seconds
+        self.gameAmounts = {} #difficulty -> finished games, won or not
+        self.skippedAmount = 0 #records dropped because their checksum didn't match
+        self.load()
+        self.file = open(path, "ab")
+
+    def __repr__(self):
+        return "ScoreStore(path: {}, games: {}, wins: {})".format(self.path, sum(self.gameAmounts.values()), sum(len(times) for times in self.times.values()))
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        fileSize = os.path.getsize(self.path)
+        indexedSize = self.loadIndex(fileSize)
+        with open(self.path, "rb") as f:
+            f.seek(indexedSize)
+            data = f.read()
+        completeSize = len(data) - len(data) % recordSize
+        if completeSize != len(data): #the last write was torn, appending behind it would shift every following record
+            with open(self.path, "r+b") as f:
+                f.truncate(indexedSize + completeSize)
+
+        records = np.frombuffer(data, dtype=recordDtype, count=completeSize//recordSize)
+        checksums = np.fromiter((zlib.crc32(data[start:start+recordFormat.size]) for start in range(0, completeSize, recordSize)), dtype=np.uint32, count=len(records))
+        valid = checksums == records["checksum"]
+        self.skippedAmount = int((~valid).sum())
+        records = records[valid]
+        for difficulty in set(records["difficulty"].tolist()): #np.unique would import numpy.ma, which costs more than the rest of the startup
+            ofDifficulty = records[records["difficulty"] == difficulty]
+            name = difficulty.decode()
+            self.gameAmounts[name] = self.gameAmounts.get(name, 0) + len(ofDifficulty)
+            self.times[name] = np.sort(np.concatenate((self.times.get(name, []), ofDifficulty["seconds"][ofDifficulty["won"]]))).tolist()
+
+    def loadIndex(self, fileSize):
+        """Takes the sorted times from the index file. Returns the size of the store it covers, 0 if it is missing or doesn't fit the store"""
+        if not os.path.exists(self.indexPath):
+            return 0
+        try:
+            with np.load(self.indexPath) as index:
+                indexedSize = int(index["indexedSize"])
+                if indexedSize > fileSize or indexedSize % recordSize: #the store was replaced or cut, the index is of no use
+                    return 0
+                bounds = np.cumsum(index["winAmounts"]).tolist()
+                for name, gameAmount, times in zip(index["names"].tolist(), index["gameAmounts"].tolist(), np.split(index["times"], bounds[:-1])):
+                    self.gameAmounts[name] = gameAmount
+                    self.times[name] = times.tolist()
+        except (OSError, ValueError, KeyError): #a broken index is rebuilt from the store
+            self.gameAmounts, self.times = {}, {}
+            return 0
+        return indexedSize
+
+    def saveIndex(self):
+        """Writes the sorted times next to the store, replacing the old index in one step so a crash can't leave half of one"""
+        names = sorted(self.gameAmounts)
+        temporaryPath = self.indexPath + ".tmp.npz"
+        np.savez(temporaryPath, indexedSize=self.file.tell(), names=np.array(names, dtype=str), gameAmounts=np.array([self.gameAmounts[name] for name in names], dtype=np.int64),
+                 winAmounts=np.array([len(self.times.get(name, [])) for name in names], dtype=np.int64), times=np.array([seconds for name in names for seconds in self.times.get(name, [])], dtype=np.float64))
+        os.replace(temporaryPath, self.indexPath)
+
+    def add(self, difficulty, seconds, won, finishedAt=None):
+        record = recordFormat.pack(difficulty.encode(), seconds, time.time() if finishedAt is None else finishedAt, won)
+        self.file.write(record + checksumFormat.pack(zlib.crc32(record))) #a single write per record
+        self.file.flush()
+        if self.syncWrites:
+            os.fsync(self.file.fileno())
+        self.gameAmounts[difficulty] = self.gameAmounts.get(difficulty, 0) + 1
+        if won:
+            bisect.insort(self.times.setdefault(difficulty, []), seconds)
+
+    def best(self, difficulty):
+        """Fastest winning time in seconds, None if the difficulty was never won"""
+        times = self.times.get(difficulty)
+        return times[0] if times else None
+
+    def top(self, difficulty, amount=10) -> list:
+        return self.times.get(difficulty, [])[:amount]
+
+    def rank(self, difficulty, seconds):
+        """Place a winning time would get, 1 is the best"""
+        return bisect.bisect_left(self.times.get(difficulty, []), seconds) + 1
+
+    def percentile(self, difficulty, percent):
+        """Winning time that percent of all wins are at least as fast as, None without any wins"""
+        times = self.times.get(difficulty)
+        if not times:
+            return None
+        return times[min(int(len(times)*percent/100), len(times) - 1)]
+
+    def importHighscores(self, path="highscores.json"):
+        """Adds the best times of the old highscore file, which only kept one time per difficulty, if the store is still empty"""
+        if self.gameAmounts or not os.path.exists(path):
+            return
+        with open(path) as f:
+            try:
+                highscores = json.load(f)
+            except ValueError: #the file was shipped empty
+                return
+        for difficulty, seconds in highscores.items():
+            if seconds > 0:
+                self.add(difficulty, seconds, True, finishedAt=0)
+
+    def close(self):
+        self.saveIndex()
+        self.file.close()
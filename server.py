@@ -0,0 +1,225 @@
+"""Headless game server, many boards in one process without any window. Clients send one JSON object per line and get one JSON object per line back,
+answers come in the order of the requests. Every request may carry an "id" that is sent back with the answer.
+    {"cmd": "new", "difficulty": "easy"|"medium"|"hard"|"custom", "seed": int, "dimensions": [w, h], "mines": int}  seed is optional, dimensions and mines only for custom
+    {"cmd": "reveal"|"flag"|"chord", "game": id, "cell": [x, y]}
+    {"cmd": "state", "game": id, "since": version}  every cell that changed after the given version, 0 sends all of them
+    {"cmd": "close", "game": id}
+    {"cmd": "stats"}
+Answers to new, reveal, flag, chord and state hold the game's version and only the cells that changed as flat indices with their values:
+the count of a revealed cell, VALUE_HIDDEN, VALUE_FLAGGED or VALUE_MINE. Failed requests are answered with "ok": false and an error message.
+Games belong to the connection that started them and are dropped when it closes. The rules are the ones of Board, like in the game and in replay.play.
+python server.py [port or path of a Unix socket], benchmarks/server_benchmark.py runs a load test against it"""
+import asyncio
+import itertools
+import json
+import math
+import sys
+import numpy as np
+from board import CELL_COUNT_MASK, CELL_FLAGGED, CELL_MINE, CELL_REVEALED, Board, maxDimensions
+from generator import difficultyPresets, generateFallback
+
+
+VALUE_HIDDEN = -1
+VALUE_FLAGGED = -2
+VALUE_MINE = -3 #only the mine that ended the game is ever revealed
+
+defaultPort = 8765
+gameLimit = 10000 #games a single connection may keep open at once
+cellLimit = 1 << 20 #largest custom board
+
+
+class ProtocolError(ValueError):
+    """Raised for requests the server can't carry out, the message is sent back to the client"""
+
+
+def isInteger(value):
+    """JSON true and false arrive as bools, which Python counts as ints"""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def cellValues(cells: np.ndarray) -> np.ndarray:
+    """What a player sees of packed cells, using the VALUE_ constants for everything but revealed counts"""
+    values = (cells & CELL_COUNT_MASK).astype(np.int8)
+    values[(cells & CELL_REVEALED) == 0] = VALUE_HIDDEN
+    values[(cells & CELL_FLAGGED) != 0] = VALUE_FLAGGED
+    values[(cells & (CELL_REVEALED | CELL_MINE)) == (CELL_REVEALED | CELL_MINE)] = VALUE_MINE
+    return values
+
+
+class Session:
+    """One hosted board. The cells its change listener reports are collected until the answer to the request that changed them is built"""
+    def __init__(self, board: Board, seed):
+        self.board = board
+        self.seed = seed
+        self.version = 1 #the start cell was revealed before the session existed, it counts as the first change
+        self.cellVersions = ((board.cells.reshape(-1) & CELL_REVEALED) != 0).astype(np.uint32) #version of the last change of every cell, 0 if it never changed
+        self.pending = []
+        board.onChange(self.pending.append)
+
+    def commit(self) -> np.ndarray:
+        """Flat indices of the cells changed since the last commit, each once"""
+        if not self.pending:
+            return np.empty(0, dtype=np.intp)
+        changed = np.unique(np.concatenate(self.pending))
+        self.pending.clear()
+        self.version += 1
+        self.cellVersions[changed] = self.version
+        return changed
+
+    def changedSince(self, version) -> np.ndarray:
+        return np.flatnonzero(self.cellVersions > version)
+
+    def answer(self, changed: np.ndarray) -> dict:
+        return {"version": self.version, "cells": changed.tolist(), "values": cellValues(self.board.cells.reshape(-1)[changed]).tolist(), "over": self.board.isOver, "won": self.board.won}
+
+
+class GameServer:
+    """Hosts the games of every connection, handle is the callback for asyncio.start_server and asyncio.start_unix_server"""
+    def __init__(self):
+        self.gameAmount = 0
+        self.requestAmount = 0
+        self.gameIds = itertools.count(1)
+        self.commands = {"new": self.newGame, "reveal": self.reveal, "flag": self.flag, "chord": self.chord, "state": self.state, "close": self.closeGame, "stats": self.stats}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        games = {} #game id -> Session, only visible to this connection
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError: #readline reports a line longer than the stream's limit this way
+                    break
+                if not line:
+                    break
+                writer.write(self.respond(line, games))
+                await writer.drain()
+        except ConnectionError: #the client went away
+            pass
+        finally:
+            self.gameAmount -= len(games)
+            writer.close()
+
+    def respond(self, line: bytes, games: dict) -> bytes:
+        self.requestAmount += 1
+        requestId = None
+        try:
+            try:
+                request = json.loads(line)
+            except ValueError:
+                raise ProtocolError("Request is not valid JSON")
+            if not isinstance(request, dict):
+                raise ProtocolError("Request is not a JSON object")
+            requestId = request.get("id")
+            command = self.commands.get(request.get("cmd")) if isinstance(request.get("cmd"), str) else None
+            if command is None:
+                raise ProtocolError("Unknown command {!r}".format(request.get("cmd")))
+            answer = command(request, games)
+            answer["ok"] = True
+        except ProtocolError as error:
+            answer = {"ok": False, "error": str(error)}
+        if requestId is not None:
+            answer["id"] = requestId
+        return json.dumps(answer, separators=(",", ":")).encode() + b"\n"
+
+    def newGame(self, request, games) -> dict:
+        if len(games) >= gameLimit:
+            raise ProtocolError("Connection already has {} open games".format(gameLimit))
+        difficulty = request.get("difficulty", "easy")
+        if not isinstance(difficulty, str):
+            raise ProtocolError("Unknown difficulty {!r}".format(difficulty))
+        if difficulty == "custom":
+            dimensions, mineAmount = request.get("dimensions"), request.get("mines")
+            if not (isinstance(dimensions, list) and 1 <= len(dimensions) <= maxDimensions and all(isInteger(size) and size > 0 for size in dimensions)):
+                raise ProtocolError("Custom dimensions have to be a list of 1 to {} positive integers".format(maxDimensions))
+            cellAmount = math.prod(dimensions)
+            if cellAmount > cellLimit:
+                raise ProtocolError("Custom boards have at most {} cells".format(cellLimit))
+            if not (isInteger(mineAmount) and 0 <= mineAmount < cellAmount):
+                raise ProtocolError("Mines have to be an integer from 0 to {}".format(cellAmount - 1))
+        elif difficulty in difficultyPresets:
+            dimensions, mineAmount = difficultyPresets[difficulty]
+        else:
+            raise ProtocolError("Unknown difficulty {!r}".format(difficulty))
+        seed = request.get("seed")
+        if seed is None:
+            seed = int(np.random.default_rng().integers(2**63)) #sent back, so the game can be replayed
+        elif not (isInteger(seed) and 0 <= seed < 2**63):
+            raise ProtocolError("Seed has to be an integer from 0 to 2**63 - 1")
+
+        board, _ = generateFallback(dimensions, mineAmount, seed)
+        gameId = next(self.gameIds)
+        games[gameId] = session = Session(board, seed)
+        self.gameAmount += 1
+        return {"game": gameId, "dimensions": list(board.dimensions), "mines": mineAmount, "seed": seed, **session.answer(session.changedSince(0))}
+
+    def session(self, request, games) -> Session:
+        gameId = request.get("game")
+        session = games.get(gameId) if isInteger(gameId) else None #lists can't be looked up and true would find game 1
+        if session is None:
+            raise ProtocolError("Unknown game {!r}".format(request.get("game")))
+        return session
+
+    def cell(self, request, session: Session) -> tuple:
+        cell = request.get("cell")
+        if not (isinstance(cell, list) and all(isInteger(coordinate) for coordinate in cell) and session.board.inBounds(*cell)):
+            raise ProtocolError("Cell {!r} is not on the board".format(cell))
+        return tuple(cell)
+
+    def reveal(self, request, games) -> dict:
+        session = self.session(request, games)
+        cell = self.cell(request, session)
+        if not session.board.isOver and not session.board.cells[cell] & (CELL_REVEALED | CELL_FLAGGED): #the same checks as Button.handleInput
+            session.board.reveal(*cell)
+        return session.answer(session.commit())
+
+    def flag(self, request, games) -> dict:
+        session = self.session(request, games)
+        cell = self.cell(request, session)
+        if not session.board.isOver:
+            session.board.toggleFlag(*cell)
+        return session.answer(session.commit())
+
+    def chord(self, request, games) -> dict:
+        session = self.session(request, games)
+        cell = self.cell(request, session)
+        if not session.board.isOver:
+            session.board.chord(*cell)
+        return session.answer(session.commit())
+
+    def state(self, request, games) -> dict:
+        session = self.session(request, games)
+        since = request.get("since", 0)
+        if not isInteger(since):
+            raise ProtocolError("Version has to be an integer")
+        return session.answer(session.changedSince(since))
+
+    def closeGame(self, request, games) -> dict:
+        self.session(request, games)
+        del games[request["game"]]
+        self.gameAmount -= 1
+        return {}
+
+    def stats(self, request, games) -> dict:
+        return {"games": self.gameAmount, "requests": self.requestAmount}
+
+
+async def serve(address=defaultPort, server: GameServer = None):
+    """address is a port on localhost, 0 picks a free one, or the path of a Unix socket. Prints where it listens once it accepts connections"""
+    server = server or GameServer()
+    if isinstance(address, int):
+        listener = await asyncio.start_server(server.handle, "127.0.0.1", address)
+        host, port = listener.sockets[0].getsockname()[:2]
+        print("listening on {}:{}".format(host, port), flush=True)
+    else:
+        listener = await asyncio.start_unix_server(server.handle, address)
+        print("listening on {}".format(address), flush=True)
+    async with listener:
+        await listener.serve_forever()
+
+
+if __name__ == "__main__":
+    address = sys.argv[1] if len(sys.argv) > 1 else str(defaultPort)
+    try:
+        asyncio.run(serve(int(address) if address.isdigit() else address))
+    except KeyboardInterrupt:
+        pass
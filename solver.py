@@ -0,0 +1,137 @@
+"""Plays boards using only what a player can see: the counts of revealed cells and the placed flags."""
+import time
+import numpy as np
+from board import CELL_FLAGGED, Board, cellCoordinates, neighborMatrix
+from generator import NoSafeStartError, generateBoard
+from replay import ACTION_FLAG, ACTION_REVEAL
+
+
+class Frontier:
+    """Constraints of the revealed cells next to hidden ones. Unknown cells get local ids, every constraint is stored
+    as a bitset (python int) of the local ids it covers plus the amount of mines still missing among them"""
+    def __init__(self, board: Board):
+        revealed = board.revealed.reshape(-1)
+        flagged = board.flagged.reshape(-1)
+        counts = board.counts.reshape(-1)
+        hidden = ~revealed & ~flagged
+
+        numbered = np.flatnonzero(revealed & ~board.mines.reshape(-1) & (counts > 0))
+        neighbors = neighborMatrix(numbered, board.dimensions)
+        inField = neighbors >= 0
+        neighbors = np.where(inField, neighbors, 0)
+        isUnknown = inField & hidden[neighbors]
+        missing = counts[numbered].astype(np.int64) - (inField & flagged[neighbors]).sum(axis=1)
+
+        active = isUnknown.any(axis=1)
+        neighbors, isUnknown, missing = neighbors[active], isUnknown[active], missing[active]
+        self.cells = np.unique(neighbors[isUnknown]) #flat index of every local id
+        localIds = np.searchsorted(self.cells, neighbors)
+
+        self.constraints = {} #bitset -> missing mines, identical constraints from different cells merge
+        for row, unknownRow, mineAmount in zip(localIds, isUnknown, missing):
+            bitset = 0
+            for localId in row[unknownRow]:
+                bitset |= 1 << int(localId)
+            self.constraints[bitset] = int(mineAmount)
+
+    def deduce(self) -> tuple[set, set]:
+        """Returns the flat indices of cells that are certainly safe and certainly mines"""
+        safe, mines = 0, 0
+        constraints = list(self.constraints.items())
+        for bitset, mineAmount in constraints: #single cell rules
+            if mineAmount == 0:
+                safe |= bitset
+            elif mineAmount == bitset.bit_count():
+                mines |= bitset
+
+        if not (safe or mines):
+            cellConstraints = {} #local id -> constraints covering it, to only compare overlapping pairs
+            for i, (bitset, _) in enumerate(constraints):
+                remaining = bitset
+                while remaining:
+                    lowest = remaining & -remaining
+                    cellConstraints.setdefault(lowest, []).append(i)
+                    remaining ^= lowest
+            checked = set()
+            for overlapping in cellConstraints.values():
+                for i in overlapping:
+                    for j in overlapping:
+                        if i == j or (i, j) in checked:
+                            continue
+                        checked.add((i, j))
+                        (a, aMines), (b, bMines) = constraints[i], constraints[j]
+                        onlyA, onlyB = a & ~b, b & ~a
+                        if aMines - bMines == onlyA.bit_count(): #every cell only a has must be a mine, which leaves none for the cells only b has (covers subsets too)
+                            mines |= onlyA
+                            safe |= onlyB
+        return self.toCells(safe), self.toCells(mines)
+
+    def toCells(self, bitset) -> set:
+        return {int(self.cells[localId]) for localId in range(bitset.bit_length()) if bitset >> localId & 1}
+
+    def guess(self, board: Board, rng: np.random.Generator = None) -> int:
+        """Picks the hidden cell that is least likely to be a mine by a simple estimate.
+        Frontier cells use the highest density of the constraints covering them, all other hidden cells the density of the remaining mines.
+        Returns None if every hidden cell is flagged"""
+        rng = rng if rng is not None else np.random.default_rng()
+        hidden = np.flatnonzero(~board.revealed.reshape(-1) & ~board.flagged.reshape(-1))
+        if hidden.size == 0: #some flags are wrong, but there is nothing left to click
+            return None
+        risk = {}
+        for bitset, mineAmount in self.constraints.items():
+            density = mineAmount/bitset.bit_count()
+            for cell in self.toCells(bitset):
+                risk[cell] = max(risk.get(cell, 0), density)
+        interior = np.setdiff1d(hidden, self.cells, assume_unique=True)
+        if interior.size:
+            interiorRisk = max(board.mineAmount - board.flagAmount, 0)/hidden.size
+            if not risk or interiorRisk <= min(risk.values()):
+                return int(rng.choice(interior))
+        lowest = min(risk.values())
+        return int(rng.choice([cell for cell, cellRisk in risk.items() if cellRisk == lowest]))
+
+
+def hint(board: Board) -> tuple[set, set]:
+    """One round of deductions on the current board state, nothing is changed. Returns the flat indices of safe cells and of mines"""
+    return Frontier(board).deduce()
+
+
+def solve(board: Board, rng: np.random.Generator = None, allowGuessing=True, recorder=None) -> bool:
+    """Plays the board until it is won or lost, only guessing when nothing can be deduced. Returns whether it was won.
+    Without guessing, the solver gives up and returns False as soon as it gets stuck. recorder (see replay.Replay) gets every click"""
+    rng = rng if rng is not None else np.random.default_rng()
+    while not board.isOver:
+        frontier = Frontier(board)
+        safe, mines = frontier.deduce()
+        if not (safe or mines):
+            if not allowGuessing:
+                return False
+            guess = frontier.guess(board, rng)
+            if guess is None:
+                return False
+            safe = {guess}
+        for cell in mines:
+            if not board.cells.flat[cell] & CELL_FLAGGED:
+                board.toggleFlag(*cellCoordinates(cell, board.dimensions))
+                if recorder is not None:
+                    recorder.record(ACTION_FLAG, cell)
+        for cell in safe:
+            board.reveal(*cellCoordinates(cell, board.dimensions))
+            if recorder is not None:
+                recorder.record(ACTION_REVEAL, cell)
+    return board.won
+
+
+def solveBatch(dimensions, mineAmount, games, seed=0) -> dict:
+    """Generates and solves many boards. Returns the amount of games and wins, the win rate and the boards solved per second"""
+    rng = np.random.default_rng(seed)
+    wins = 0
+    start = time.perf_counter()
+    for _ in range(games):
+        try:
+            board, _ = generateBoard(dimensions, mineAmount, rng.integers(2**63))
+        except NoSafeStartError: #the solver starts with a guess
+            board, _ = generateBoard(dimensions, mineAmount, rng.integers(2**63), safeStart=False)
+        wins += solve(board, rng)
+    elapsed = time.perf_counter() - start
+    return {"games": games, "wins": wins, "winRate": wins/games, "boardsPerSecond": games/elapsed}
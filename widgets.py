@@ -0,0 +1,241 @@
+"""Menu widgets shared by every screen. They get their font and the location they lead to passed in, so importing them needs no window"""
+import time
+import pygame as pg
+from vectors_likeablejuniper import Vector
+from renderer import GlyphCache
+
+
+def convertTime(seconds):
+    if seconds == "-":
+        return seconds
+    minutes = int(seconds // 60)
+    seconds  = round(seconds - minutes*60, 1)
+    return "{}:{}".format(minutes, seconds)
+
+
+class Text:
+    def __init__(self, center, font: pg.font.Font, text=None):
+        self.center = center
+        self.font = font
+        self.glyphs = GlyphCache(font)
+        if text:
+            self.textObj = self.font.render(text, True, (0, 0, 0))
+            self.textRect = self.textObj.get_rect(center=self.center)
+    
+    def __call__(self, screen: pg.Surface, dynamicText=None):
+        if dynamicText:
+            self.glyphs(screen, dynamicText, (0, 0, 0), center=self.center)
+        else:
+            screen.blit(self.textObj, self.textRect)
+
+
+class TimeText:
+    def __init__(self, center, glyphs: GlyphCache):
+        self.glyphs = glyphs
+        self.startTime = time.time()
+        self.lastPausedTime = self.startTime
+        self.paused = False
+        #prevent time text from moving around from recentering every call by setting position on initiate
+        textObj = glyphs.font.render(convertTime(0), True, (0, 0, 0))
+        textRect = textObj.get_rect(center=center)
+        self.position = textRect[:2]
+    
+    def __call__(self, screen: pg.Surface):
+        seconds = (self.lastPausedTime if self.paused else time.time()) - self.startTime
+        self.glyphs(screen, convertTime(seconds), (0, 0, 0), topleft=self.position)
+
+    def restartClock(self):
+        self.startTime = time.time()
+        self.paused = False
+
+    def pause(self):
+        self.paused = True
+        self.lastPausedTime = time.time()
+    
+    def currentClock(self):
+        return (self.lastPausedTime if self.paused else time.time()) - self.startTime
+
+
+class DeltaButton:
+    """Specifically for a button which has a toggleable function and displays whether or not its toggled"""
+    def __init__(self, center: Vector, dimensions: Vector, colors, text, font: pg.font.Font):
+        self.position = center - 0.5*dimensions
+        self.dimensions = dimensions
+        self.colors = colors
+        self.textObj = font.render(text, True, (0, 0, 0))
+        textRect = self.textObj.get_rect(center=[center[0]-self.dimensions[0]*0.5, center[1]])
+        textRect.centerx -= textRect.width*0.5 + 10
+        self.textRect = textRect
+        self.crossRectScale = 0.6
+        self.crossRect = (self.position+self.dimensions*(1-self.crossRectScale)/2).components + (self.dimensions*self.crossRectScale).components
+
+    def __call__(self, screen: pg.Surface, mouseData, deltaModeEnabled):
+        mousePos, islClick, isrClick, isNewClick = mouseData
+        isHovered = self.position < mousePos < self.position + self.dimensions
+        isNewlClick = islClick and isNewClick
+
+        screen.blit(self.textObj, self.textRect)
+
+        pg.draw.rect(screen, self.colors[int(isHovered)+int(islClick and isHovered)], self.position.components+self.dimensions.components) #ground color
+        pg.draw.rect(screen, self.colors[2+int(isHovered)+int(islClick and isHovered)], self.position.components+self.dimensions.components, 3) #border color
+
+        if deltaModeEnabled:
+            pg.draw.line(screen, (161, 7, 2), self.crossRect[:2], (Vector(self.crossRect[:2])+self.dimensions*self.crossRectScale).components, 3)
+            pg.draw.line(screen, (161, 7, 2), (Vector(self.crossRect[:2])+Vector(self.dimensions[0]*self.crossRectScale, 0)).components, (Vector(self.crossRect[:2])+Vector(0, self.dimensions[0]*self.crossRectScale)).components, 3)
+
+        if isNewlClick and isHovered:
+            deltaModeEnabled = bool((int(deltaModeEnabled)+1) % 2)
+
+        return deltaModeEnabled
+
+
+class TimedModeButton:
+    """Specifically for a button which has a toggleable function and displays whether or not its toggled"""
+    def __init__(self, center: Vector, dimensions: Vector, colors, text, font: pg.font.Font):
+        self.position = center - 0.5*dimensions
+        self.dimensions = dimensions
+        self.colors = colors
+        self.textObj = font.render(text, True, (0, 0, 0))
+        textRect = self.textObj.get_rect(center=[center[0]-self.dimensions[0]*0.5, center[1]])
+        textRect.centerx -= textRect.width*0.5 + 10
+        self.textRect = textRect
+        self.crossRectScale = 0.6
+        self.crossRect = (self.position+self.dimensions*(1-self.crossRectScale)/2).components + (self.dimensions*self.crossRectScale).components
+
+    def __call__(self, screen: pg.Surface, mouseData, isTimed):
+        mousePos, islClick, isrClick, isNewClick = mouseData
+        isHovered = self.position < mousePos < self.position + self.dimensions
+        isNewlClick = islClick and isNewClick
+
+        screen.blit(self.textObj, self.textRect)
+
+        pg.draw.rect(screen, self.colors[int(isHovered)+int(islClick and isHovered)], self.position.components+self.dimensions.components) #ground color
+        pg.draw.rect(screen, self.colors[2+int(isHovered)+int(islClick and isHovered)], self.position.components+self.dimensions.components, 3) #border color
+
+        if isTimed:
+            pg.draw.line(screen, (161, 7, 2), self.crossRect[:2], (Vector(self.crossRect[:2])+self.dimensions*self.crossRectScale).components, 3)
+            pg.draw.line(screen, (161, 7, 2), (Vector(self.crossRect[:2])+Vector(self.dimensions[0]*self.crossRectScale, 0)).components, (Vector(self.crossRect[:2])+Vector(0, self.dimensions[0]*self.crossRectScale)).components, 3)
+
+        if isNewlClick and isHovered:
+            isTimed = bool((int(isTimed)+1) % 2)
+
+        return isTimed
+
+
+class MainMenuButton:
+    def __init__(self, center: Vector, dimensions: Vector, colors, icon: pg.Surface, targetLocation):
+        self.position = center - 0.5*dimensions
+        self.center = center
+        self.dimensions = dimensions
+        self.colors = colors
+        self.icon = pg.transform.scale(icon, self.dimensions*0.6)
+        self.iconRect = self.icon.get_rect()
+        self.iconRect.center = self.center
+        self.targetLocation = targetLocation
+    
+    def __call__(self, screen, mouseData, virtualLocation):
+        mousePos, islClick, isrClick, isNewClick = mouseData
+        isHovered = self.position < mousePos < self.position + self.dimensions
+        isNewlClick = islClick and isNewClick
+
+        pg.draw.rect(screen, self.colors[int(isHovered)+int(islClick and isHovered)], self.position.components+self.dimensions.components) #ground color
+        pg.draw.rect(screen, self.colors[2+int(isHovered)+int(islClick and isHovered)], self.position.components+self.dimensions.components, 3) #border color
+
+        screen.blit(self.icon, self.iconRect)
+
+        if isNewClick and isHovered:
+            virtualLocation = self.targetLocation
+
+        return virtualLocation
+
+
+class ExitButton:
+    def __init__(self, center: Vector, dimensions: Vector, colors, font: pg.font.Font, targetLocation):
+        self.position = center - 0.5*dimensions
+        self.center = center
+        self.dimensions = dimensions
+        self.colors = colors
+        self.textObj = font.render("Exit", True, (0, 0, 0))
+        self.textRect = self.textObj.get_rect(center=self.center)
+        self.targetLocation = targetLocation
+    
+    def __call__(self, screen: pg.Surface, mouseData, virtualLocation):
+        mousePos, islClick, isrClick, isNewClick = mouseData
+        isHovered = self.position < mousePos < self.position + self.dimensions
+        isNewlClick = islClick and isNewClick
+
+        pg.draw.rect(screen, self.colors[int(isHovered)+int(islClick and isHovered)], self.position.components+self.dimensions.components) #ground color
+        pg.draw.rect(screen, self.colors[2+int(isHovered)+int(islClick and isHovered)], self.position.components+self.dimensions.components, 3) #border color
+
+        screen.blit(self.textObj, self.textRect)
+
+        if isNewlClick and isHovered:
+            return self.targetLocation
+
+        return virtualLocation
+
+
+class GenericLocationButton:
+    def __init__(self, center: Vector, dimensions: Vector, colors, text, font: pg.font.Font, targetLocation):
+        self.position = center - 0.5*dimensions
+        self.center = center
+        self.dimensions = dimensions
+        self.colors = colors
+        self.textObj = font.render(text, True, (0, 0, 0))
+        self.textRect = self.textObj.get_rect(center=self.center)
+        self.targetLocation = targetLocation
+    
+    def __call__(self, screen: pg.Surface, mouseData, virtualLocation):
+        mousePos, islClick, isrClick, isNewClick = mouseData
+        isHovered = self.position < mousePos < self.position + self.dimensions
+        isNewlClick = islClick and isNewClick
+
+        pg.draw.rect(screen, self.colors[int(isHovered)+int(islClick and isHovered)], self.position.components+self.dimensions.components) #ground color
+        pg.draw.rect(screen, self.colors[2+int(isHovered)+int(islClick and isHovered)], self.position.components+self.dimensions.components, 3) #border color
+        screen.blit(self.textObj, self.textRect)
+
+        if isNewlClick and isHovered:
+            return self.targetLocation
+
+        return virtualLocation
+
+
+class InputField:
+    """Box for a whole number, clicking it focuses it and typed digits are only taken while it is focused"""
+    def __init__(self, center: Vector, dimensions: Vector, text, colors, glyphs: GlyphCache, value="", maxLength=7):
+        self.center = center
+        self.dimensions = dimensions
+        self.position = self.center - 0.5*self.dimensions
+        self.colors = colors
+        self.glyphs = glyphs
+        self.textObj = glyphs.font.render(text, True, (0, 0, 0))
+        textRect = self.textObj.get_rect(center=[center[0]-self.dimensions[0]*0.5, center[1]])
+        textRect.centerx -= textRect.width*0.5 + 10
+        self.textRect = textRect
+        self.value = value
+        self.maxLength = maxLength
+        self.focused = False
+
+    def __call__(self, screen: pg.Surface, mouseData, events):
+        mousePos, islClick, isrClick, isNewClick = mouseData
+        isHovered = self.position < mousePos < self.position + self.dimensions
+        if isNewClick and islClick:
+            self.focused = isHovered #clicking anywhere else takes the focus away
+
+        if self.focused:
+            for event in events:
+                if event.type != pg.KEYDOWN:
+                    continue
+                if event.key == pg.K_BACKSPACE:
+                    self.value = self.value[:-1]
+                elif len(event.unicode) == 1 and "0" <= event.unicode <= "9" and len(self.value) < self.maxLength: #isdigit also takes digits like "²" that int() rejects
+                    self.value += event.unicode
+
+        screen.blit(self.textObj, self.textRect)
+        pg.draw.rect(screen, self.colors[int(isHovered)+int(self.focused)], self.position.components+self.dimensions.components) #ground color
+        pg.draw.rect(screen, self.colors[2+int(isHovered)+int(self.focused)], self.position.components+self.dimensions.components, 3) #border color
+        self.glyphs(screen, self.value, (0, 0, 0), center=self.center.components)
+
+    @property
+    def number(self):
+        return int(self.value) if self.value else 0